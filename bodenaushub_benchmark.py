@@ -0,0 +1,296 @@
+# bodenaushub_benchmark.py
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.spatial.distance import cdist
+
+from modules.bodenaushub import (
+    build_spatial_indices,
+    calculate_bounding_box,
+    compute_volume_pyramid,
+    decimate_triangles_set,
+    create_raster,
+    create_raster_axes,
+    integrate_mean_heights,
+    interpolate_height_for_points,
+    interpolate_height_for_points_loop,
+    interpolate_point_grid,
+    rasterize_height_grids,
+    rasterize_triangles,
+    solve_unbalanced_transport_problem,
+)
+from modules.footprint import upward_faces
+
+# Größe des synthetischen Geländes (Anzahl Gitterzellen je Richtung, je Zelle zwei Dreiecke)
+grid_cells = 20
+# Rastergröße für die Interpolation
+cell_size = 0.5
+# Größe des Geländes für den Index-Benchmark (ca. 2 * n² Dreiecke)
+large_grid_cells = 300
+# Anzahl der Bauphasen für den Benchmark der gemeinsamen Interpolation
+num_phases = 6
+# Anzahl der Überschuss- bzw. Defizitpunkte für den Vergleich der Transportlöser (PuLP nur bis zur ersten Größe)
+transport_sizes = (150, 1000)
+# Rastergröße (Zellen je Richtung) für den Vergleich mit dem Mehrskalenverfahren
+multiscale_cells = 30
+
+
+# --- Synthetisches Gelände --- #
+def create_synthetic_terrain(num_cells, size=10.0, seed=0):
+    """
+    Erstellt ein unregelmäßiges TIN-Gelände (zwei Dreiecke je Gitterzelle, zufällige Höhen, gemischte Reihenfolge).
+
+    :param num_cells: Anzahl der Gitterzellen je Richtung
+    :param size: Kantenlänge des Geländes [m]
+    :param seed: Startwert des Zufallsgenerators
+    :return: Dreiecksarray der Form (2 * num_cells², 3, 3) als float32 (wie numpy-stl)
+    """
+    rng = np.random.default_rng(seed)
+    coords = np.linspace(0.0, size, num_cells + 1)
+    xv, yv = np.meshgrid(coords, coords)
+    zv = rng.normal(scale=1.0, size=xv.shape)
+    vertices = np.stack([xv, yv, zv], axis=-1)
+
+    v00 = vertices[:-1, :-1].reshape(-1, 3)
+    v10 = vertices[:-1, 1:].reshape(-1, 3)
+    v01 = vertices[1:, :-1].reshape(-1, 3)
+    v11 = vertices[1:, 1:].reshape(-1, 3)
+    triangles = np.concatenate([
+        np.stack([v00, v10, v11], axis=1),
+        np.stack([v00, v11, v01], axis=1),
+    ])
+    return triangles[rng.permutation(len(triangles))].astype(np.float32)
+
+def create_split_box(size=(4.0, 3.0, 2.0)):
+    """
+    Erstellt einen Quader mit getrennten Eckpunkten je Seitenfläche (24 Eckpunkte, 12 Dreiecke, Normalen nach
+    außen), wie ihn IfcOpenShell für einen Geländekörper liefert.
+
+    :param size: Kantenlängen in x-, y- und z-Richtung [m]
+    :return: Eckpunkte der Form (24, 3) und Dreiecke der Form (12, 3)
+    """
+    corners = np.array([[x, y, z] for z in (0, 1) for y in (0, 1) for x in (0, 1)], dtype=np.float64) * size
+    # Je Seitenfläche die vier Ecken gegen den Uhrzeigersinn von außen gesehen
+    quads = [(0, 2, 3, 1), (4, 5, 7, 6), (0, 1, 5, 4), (2, 6, 7, 3), (0, 4, 6, 2), (1, 3, 7, 5)]
+    vertices = np.concatenate([corners[list(quad)] for quad in quads])
+    faces = np.concatenate([[[4 * i, 4 * i + 1, 4 * i + 2], [4 * i, 4 * i + 2, 4 * i + 3]] for i in range(6)])
+    return vertices, faces
+
+
+# --- Plausibilitätsprüfungen --- #
+def check_upward_faces():
+    """Prüft, dass upward_faces von einem Körper mit getrennten Eckpunkten nur die Oberseite behält."""
+    vertices, faces = create_split_box()
+    top_faces = upward_faces(vertices, faces)
+    if len(top_faces) != 2 or not np.allclose(vertices[top_faces][:, :, 2], 2.0):
+        raise AssertionError(f"upward_faces: {len(top_faces)} statt 2 Dreiecke der Oberseite")
+    open_faces = upward_faces(vertices, faces[:-2])
+    if len(open_faces) != len(faces) - 2:
+        raise AssertionError("upward_faces: offene Fläche wurde beschnitten")
+    print(f"upward_faces: Quader mit {len(vertices)} Eckpunkten auf {len(top_faces)} Dreiecke der Oberseite "
+          f"beschränkt, offene Fläche unverändert")
+
+# --- Benchmarks --- #
+def benchmark_interpolation(triangles_set, raster_points):
+    """Vergleicht die Schleifen-Interpolation mit der vektorisierten Variante (Laufzeit und Ergebnis)."""
+    start = time.perf_counter()
+    df_loop = interpolate_height_for_points_loop(raster_points, triangles_set)
+    time_loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df_vec = interpolate_height_for_points(raster_points, triangles_set)
+    time_vec = time.perf_counter() - start
+
+    for idx in range(len(triangles_set)):
+        z_loop = df_loop[f'z{idx}'].to_numpy(dtype=np.float64)
+        z_vec = df_vec[f'z{idx}'].to_numpy(dtype=np.float64)
+        same_coverage = np.array_equal(np.isnan(z_loop), np.isnan(z_vec))
+        max_diff = np.nanmax(np.abs(z_loop - z_vec)) if np.any(~np.isnan(z_loop)) else 0.0
+        print(f"z{idx}: gleiche Abdeckung: {same_coverage}, maximale Abweichung: {max_diff:.2e} m")
+
+    print(f"Schleife:     {time_loop:8.3f} s")
+    print(f"Vektorisiert: {time_vec:8.3f} s  (Faktor {time_loop / time_vec:.1f})")
+
+
+def benchmark_spatial_index(num_cells, cell_size):
+    """Misst Aufbauzeit, Speicher und Abfragedurchsatz des Dreiecksindex auf einem größeren Gelände."""
+    triangles_set = [create_synthetic_terrain(num_cells, size=num_cells / 2, seed=2)]
+    bounding_box = calculate_bounding_box(triangles_set)
+    raster_points = create_raster(bounding_box, cell_size)
+    print(f"Rasterpunkte: {len(raster_points)}, Dreiecke: {len(triangles_set[0])}")
+
+    spatial_indices = build_spatial_indices(triangles_set)
+
+    start = time.perf_counter()
+    df_index = interpolate_height_for_points(raster_points, triangles_set, spatial_indices=spatial_indices)
+    time_index = time.perf_counter() - start
+
+    # Vollständige Suche nur auf einer Stichprobe, da sie O(Punkte x Dreiecke) kostet
+    sample = raster_points[::max(len(raster_points) // 2000, 1)]
+    start = time.perf_counter()
+    df_dense = interpolate_height_for_points(sample, triangles_set)
+    time_dense = (time.perf_counter() - start) * len(raster_points) / len(sample)
+
+    z_index = df_index['z0'].to_numpy()[::max(len(raster_points) // 2000, 1)]
+    print(f"Index = vollständige Suche: {np.allclose(z_index, df_dense['z0'].to_numpy(), equal_nan=True)}")
+    stats = spatial_indices[0]['stats']
+    print(f"Index:       Aufbau {stats['build_time']:.3f} s, Speicher {stats['memory_bytes'] / 1e6:.2f} MB, "
+          f"Abfrage {stats['query_throughput']:.0f} Punkte/s, Interpolation {time_index:.3f} s")
+    print(f"Ohne Index:  Interpolation ca. {time_dense:.1f} s (hochgerechnet)")
+
+    start = time.perf_counter()
+    height_grids = rasterize_height_grids(bounding_box, cell_size, triangles_set)
+    time_scanline = time.perf_counter() - start
+    same = np.array_equal(height_grids['z_grids'][0].ravel(), df_index['z0'].to_numpy(), equal_nan=True)
+    print(f"Rasterung:   {time_scanline:.3f} s, identisch zur Punktabfrage: {same}")
+
+
+def benchmark_phases(num_cells, num_states, cell_size):
+    """
+    Vergleicht die Interpolation aller Bauphasen auf einem gemeinsamen Raster (jeder Zustand einmal) mit
+    paarweisen Läufen je Phase, in denen jeder innere Zustand doppelt interpoliert wird.
+    """
+    triangles_set = [create_synthetic_terrain(num_cells, size=num_cells / 2, seed=seed) for seed in range(num_states)]
+    bounding_box = calculate_bounding_box(triangles_set)
+    raster_points = create_raster(bounding_box, cell_size)
+
+    start = time.perf_counter()
+    df_states = interpolate_height_for_points(raster_points, triangles_set, spatial_indices=build_spatial_indices(triangles_set))
+    time_states = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for idx in range(num_states - 1):
+        pair = triangles_set[idx:idx + 2]
+        interpolate_height_for_points(raster_points, pair, spatial_indices=build_spatial_indices(pair))
+    time_pairs = time.perf_counter() - start
+
+    print(f"{num_states} Zustände: gemeinsames Raster {time_states:.3f} s, paarweise je Phase {time_pairs:.3f} s, "
+          f"{len(df_states)} Rasterpunkte")
+
+def benchmark_exact_volume(num_cells, coarse_cell_size=5.0, fine_cell_sizes=(1.0, 0.5, 0.25)):
+    """Vergleicht die exakte Zellintegration auf groben Zellen mit der Mittelpunktabtastung auf feinen Zellen."""
+    terrain_0 = create_synthetic_terrain(num_cells, size=num_cells / 2, seed=3)
+    terrain_1 = create_synthetic_terrain(num_cells, size=num_cells / 2, seed=4)
+    bounding_box = calculate_bounding_box([terrain_0, terrain_1])
+
+    start = time.perf_counter()
+    x_coords, y_coords = create_raster_axes(bounding_box, coarse_cell_size)
+    z_0, coverage_0 = integrate_mean_heights(x_coords, y_coords, coarse_cell_size, terrain_0)
+    z_1, coverage_1 = integrate_mean_heights(x_coords, y_coords, coarse_cell_size, terrain_1)
+    exact = np.nansum((z_1 - z_0) * np.minimum(np.minimum(coverage_0, coverage_1), 1.0)) * coarse_cell_size ** 2
+    print(f"Exakt ({coarse_cell_size} m):      {exact:12.4f} m³ in {time.perf_counter() - start:.3f} s")
+
+    for cell_size in fine_cell_sizes:
+        start = time.perf_counter()
+        x_coords, y_coords = create_raster_axes(bounding_box, cell_size)
+        z_0 = rasterize_triangles(x_coords, y_coords, terrain_0)[0]
+        z_1 = rasterize_triangles(x_coords, y_coords, terrain_1)[0]
+        sampled = np.nansum(z_1 - z_0) * cell_size ** 2
+        print(f"Abgetastet ({cell_size} m): {sampled:12.4f} m³ in {time.perf_counter() - start:.3f} s, "
+              f"Abweichung {abs(sampled - exact):.4f} m³")
+
+def benchmark_pyramid(num_cells, cell_sizes=(2.0, 1.0, 0.5, 0.25, 0.125)):
+    """Vergleicht die Auflösungspyramide (alle Stufen) mit der direkten Interpolation der feinsten Stufe."""
+    triangles_set = [create_synthetic_terrain(num_cells, size=num_cells, seed=5),
+                     create_synthetic_terrain(num_cells, size=num_cells, seed=6)]
+    bounding_box = calculate_bounding_box(triangles_set)
+    spatial_indices = build_spatial_indices(triangles_set)
+
+    start = time.perf_counter()
+    levels = compute_volume_pyramid(triangles_set, bounding_box, cell_sizes, spatial_indices)
+    pyramid_time = time.perf_counter() - start
+    print(f"Erste Schätzung nach {levels[0]['elapsed']:.3f} s, alle {len(levels)} Stufen in {pyramid_time:.3f} s")
+
+    start = time.perf_counter()
+    interpolate_point_grid(create_raster(bounding_box, cell_sizes[-1]), triangles_set, spatial_indices=spatial_indices)
+    print(f"Direkt ({cell_sizes[-1]} m): {time.perf_counter() - start:.3f} s, "
+          f"in der Pyramide {levels[-1]['time']:.3f} s ({levels[-1]['hint_rate']:.0%} Dreiecke übernommen)")
+def benchmark_decimation(num_cells, max_error=0.01):
+    """Vergleicht Dreiecksanzahl, Interpolationszeit und Volumen vor und nach der Vereinfachung der Netze."""
+    triangles_set = []
+    for seed in (7, 8):
+        # Glattes Gelände (Böschung mit Wellen), auf dem sich die Vereinfachung lohnt
+        triangles = create_synthetic_terrain(num_cells, size=num_cells, seed=seed)
+        x, y = triangles[:, :, 0], triangles[:, :, 1]
+        triangles[:, :, 2] = 0.05 * x + np.sin(x / 7.0 + seed) * np.cos(y / 11.0)
+        triangles_set.append(triangles)
+    bounding_box = calculate_bounding_box(triangles_set)
+    raster_points = create_raster(bounding_box, cell_size)
+
+    start = time.perf_counter()
+    simplified_set, _ = decimate_triangles_set(triangles_set, max_error)
+    decimation_time = time.perf_counter() - start
+
+    for label, meshes in (("Original", triangles_set), ("Vereinfacht", simplified_set)):
+        start = time.perf_counter()
+        spatial_indices = build_spatial_indices(meshes)
+        grid = interpolate_point_grid(raster_points, meshes, spatial_indices=spatial_indices)
+        volume = np.nansum(grid['z1'] - grid['z0']) * cell_size ** 2
+        print(f"{label}: Index und Interpolation {time.perf_counter() - start:.3f} s, Volumen {volume:.4f} m³")
+    print(f"Vereinfachung: {decimation_time:.3f} s")
+def create_transport_points(num_points, seed=0):
+    """Erstellt zufällige Überschuss- und Defizitpunkte (Überschuss überwiegt) samt Distanzmatrix."""
+    rng = np.random.default_rng(seed)
+    excess_df = pd.DataFrame({'x': rng.uniform(0, 300, num_points), 'y': rng.uniform(0, 300, num_points),
+                              'volumen_diff': rng.uniform(0.1, 3.0, num_points)})
+    deficit_df = pd.DataFrame({'x': rng.uniform(0, 300, num_points), 'y': rng.uniform(0, 300, num_points),
+                               'volumen_diff': -rng.uniform(0.1, 2.5, num_points)})
+    distance_matrix = cdist(excess_df[['x', 'y']].values, deficit_df[['x', 'y']].values)
+    return excess_df, deficit_df, distance_matrix
+def benchmark_transport(sizes, depot_distance=100.0):
+    """Vergleicht die Lösungsverfahren des Transportproblems (Laufzeit und Gesamtkosten)."""
+    for num_points in sizes:
+        excess_df, deficit_df, distance_matrix = create_transport_points(num_points)
+        solvers = ('highs', 'network_simplex', 'column_generation')
+        if num_points == sizes[0]:
+            solvers = ('pulp',) + solvers
+        for solver in solvers:
+            start = time.perf_counter()
+            total_costs = solve_unbalanced_transport_problem(
+                excess_df, deficit_df, distance_matrix, depot_distance, solver=solver
+            )[7]
+            print(f"Transport {num_points} x {num_points}, {solver}: Gesamtkosten {total_costs:.4f} "
+                  f"in {time.perf_counter() - start:.3f} s")
+def create_earthwork_points(num_cells, seed=0):
+    """Erstellt Abtrag- und Auftragszellen eines Rasters mit großräumig getrennten Bereichen (lange Transporte)."""
+    rng = np.random.default_rng(seed)
+    x, y = np.meshgrid(np.arange(num_cells) + 0.5, np.arange(num_cells) + 0.5)
+    x, y = x.ravel(), y.ravel()
+    volumes = np.sin(x / (num_cells / 6)) + np.cos(y / (num_cells / 8)) + 0.3 * rng.standard_normal(len(x)) + 0.1
+    point_df = pd.DataFrame({'x': x, 'y': y, 'volumen_diff': volumes})
+    return point_df[point_df['volumen_diff'] > 0], point_df[point_df['volumen_diff'] < 0]
+def benchmark_multiscale(num_cells, depot_distance=100.0):
+    """
+    Vergleicht Spaltengenerierung, Mehrskalenverfahren und Sinkhorn-Näherung auf einem Raster mit getrennten
+    Abtrag-/Auftragsbereichen.
+    """
+    excess_df, deficit_df = create_earthwork_points(num_cells)
+    for solver in ('column_generation', 'multiscale', 'sinkhorn'):
+        start = time.perf_counter()
+        total_costs = solve_unbalanced_transport_problem(
+            excess_df, deficit_df, None, depot_distance, solver=solver
+        )[7]
+        print(f"Transport {len(excess_df)} x {len(deficit_df)} (Raster), {solver}: Gesamtkosten {total_costs:.4f} "
+              f"in {time.perf_counter() - start:.3f} s")
+
+
+def main():
+    check_upward_faces()
+    triangles_set = [create_synthetic_terrain(grid_cells, seed=0), create_synthetic_terrain(grid_cells, seed=1)]
+    bounding_box = calculate_bounding_box(triangles_set)
+    raster_points = create_raster(bounding_box, cell_size)
+    print(f"Rasterpunkte: {len(raster_points)}, Dreiecke je Zustand: {len(triangles_set[0])}")
+
+    benchmark_interpolation(triangles_set, raster_points)
+    benchmark_spatial_index(large_grid_cells, cell_size)
+    benchmark_phases(large_grid_cells // 3, num_phases, cell_size)
+    benchmark_exact_volume(large_grid_cells // 3)
+    benchmark_pyramid(large_grid_cells // 3)
+    benchmark_decimation(large_grid_cells // 3)
+    benchmark_transport(transport_sizes)
+    benchmark_multiscale(multiscale_cells)
+
+
+if __name__ == "__main__":
+    main()
@@ -419,6 +419,34 @@ def main():
     # Hover-Effekte für das Eingabefeld der Rastergröße hinzufügen
     add_hover_effect(entry_cell_size, hover_bg="#505050", normal_bg="#404040")
 
+    # Rastergröße per Konvergenzstudie bestimmen (eingegebene Größe x 8 bis Größe / 8)
+    auto_cell_size_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(
+        frame_eingaben,
+        text="automatisch bestimmen",
+        variable=auto_cell_size_var,
+        bg="#213563",
+        fg="#FFFFFF",
+        selectcolor="#404040",
+        activebackground="#213563",
+        activeforeground="#FFFFFF",
+        font=("Arial", 16)
+    ).grid(row=0, column=2, padx=10, pady=10, sticky='w')
+
+    # Vorab Zwischenstände auf gröberen Rastern anzeigen (Auflösungspyramide, standardmäßig aus)
+    preview_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(
+        frame_eingaben,
+        text="Zwischenstände anzeigen",
+        variable=preview_var,
+        bg="#213563",
+        fg="#FFFFFF",
+        selectcolor="#404040",
+        activebackground="#213563",
+        activeforeground="#FFFFFF",
+        font=("Arial", 16)
+    ).grid(row=1, column=2, padx=10, pady=10, sticky='w')
+
     # Eingabefeld für Depot-Distanz (depot_distance)
     tk.Label(
         frame_eingaben,
@@ -457,7 +485,9 @@ def main():
             cell_size_var,
             depot_distance_var,
             label_volume,
-            label_work
+            label_work,
+            auto_cell_size_var,
+            preview_var
         ),
         relief="flat",
         fg="#FFFFFF",
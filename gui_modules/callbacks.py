@@ -5,7 +5,7 @@ import ast
 import os
 
 from gui_modules.gui_helpers import open_in_blender, open_stl_in_blender
-from modules.bodenaushub import perform_bodenaushub, visualize_results, export_transport_plan_to_csv
+from modules.bodenaushub import perform_bodenaushub, visualize_results, export_transport_plan_to_csv, point_grid_to_df
 from modules.lichtraumprofil import create_lrp_and_perform_clash_detection
 from utils.helpers import generate_output_file_path, parse_property_conditions  # Allgemeine Funktionen importieren
 from modules.property_filter import open_model, filter_elements_in_model, color_elements  # Importiere die filter_properties-Funktion
@@ -83,10 +83,10 @@ def on_create_lrp_and_clash_detection(entry_1, entry_conditions, input_ifc_file,
     except Exception as e:
         messagebox.showerror("Fehler", f"Fehler bei der Verarbeitung: {e}")
 def select_stl_file(button, var_name, zustand0_file_var, zustand1_file_var):
-    """Öffnet einen Dateidialog zum Auswählen der STL-Datei."""
+    """Öffnet einen Dateidialog zum Auswählen der STL-Datei (oder eines Geländemodells als IFC/XYZ/ASCII-Raster)."""
     print(f"select_stl_file aufgerufen für: {var_name}")
     file_path = filedialog.askopenfilename(
-        filetypes=[("STL Files", "*.stl")],
+        filetypes=[("STL Files", "*.stl"), ("Geländemodelle (IFC, XYZ, ASCII-Raster)", "*.ifc *.xyz *.txt *.csv *.asc")],
         title="STL-Datei auswählen"
     )
     if file_path:
@@ -106,7 +106,8 @@ def open_specific_stl_in_blender(stl_file_var, blender_executable, open_stl_scri
         messagebox.showwarning("Warnung", "Bitte zuerst eine STL-Datei auswählen.")
         return
     open_stl_in_blender([stl_file], blender_executable, open_stl_script)
-def start_bodenaushub(zustand0_file_var, zustand1_file_var, cell_size_var, depot_distance_var, label_volume, label_work):
+def start_bodenaushub(zustand0_file_var, zustand1_file_var, cell_size_var, depot_distance_var, label_volume, label_work,
+                      auto_cell_size_var=None, preview_var=None):
     """
     Startet die Bodenaushub-Berechnung und aktualisiert die GUI entsprechend.
 
@@ -116,6 +117,10 @@ def start_bodenaushub(zustand0_file_var, zustand1_file_var, cell_size_var, depot
     :param depot_distance_var: DoubleVar für die Deponie-Distanz
     :param label_volume: Label-Widget für das Ergebnis der minimalen Arbeit
     :param label_work: Label-Widget für die Mengen/Arbeit von/zur Deponie
+    :param auto_cell_size_var: Optionale BooleanVar; wenn gesetzt, wird die Rastergröße per Konvergenzstudie
+                               zwischen der 8-fachen und einem Achtel der eingegebenen Größe bestimmt
+    :param preview_var: Optionale BooleanVar; wenn gesetzt, werden vorab Zwischenstände auf gröberen Rastern
+                        (8-, 4- und 2-fache Rastergröße) angezeigt
     """
 
     zustand0_file = zustand0_file_var.get()
@@ -127,14 +132,46 @@ def start_bodenaushub(zustand0_file_var, zustand1_file_var, cell_size_var, depot
         messagebox.showerror("Fehler", "Bitte beide STL-Dateien auswählen.")
         return
 
-    try:
-        # Berechnung durchführen
-        results = perform_bodenaushub(
-            zustand0_file,
-            zustand1_file,
-            depot_distance,
-            cell_size
+    def show_level(level):
+        # Zwischenergebnis jeder Pyramidenstufe sofort anzeigen
+        label_volume.config(
+            text=f"Zwischenstand bei {level['cell_size']:g} m Raster: Überschüsse: {level['total_excess']:.2f} m³, "
+                 f"Defizite: {level['total_deficit']:.2f} m³, Differenz gesamt: {level['total_difference']:.2f} m³."
         )
+        label_volume.update_idletasks()
+
+    try:
+        cell_size_message = ""
+        if auto_cell_size_var is not None and auto_cell_size_var.get():
+            # Rastergröße per Konvergenzstudie (Toleranz 1 %) bestimmen; die Eingabe bleibt die Startgröße
+            results = perform_bodenaushub(
+                zustand0_file,
+                zustand1_file,
+                depot_distance,
+                cell_size * 8,
+                min_cell_size=cell_size / 8,
+                on_level=show_level,
+                convergence_tolerance=0.01
+            )
+            cell_size_message = f" Rastergröße (Konvergenzstudie): {results['convergence_study']['cell_size']:g} m."
+        elif preview_var is not None and preview_var.get():
+            # Berechnung durchführen, vorab grobe Stufen (8-, 4- und 2-fache Rastergröße) als Schätzung
+            results = perform_bodenaushub(
+                zustand0_file,
+                zustand1_file,
+                depot_distance,
+                cell_size,
+                pyramid_cell_sizes=[cell_size * 8, cell_size * 4, cell_size * 2],
+                on_level=show_level
+            )
+        else:
+            # Berechnung durchführen
+            results = perform_bodenaushub(
+                zustand0_file,
+                zustand1_file,
+                depot_distance,
+                cell_size
+            )
 
         total_excess = results['total_excess']
         total_deficit = results['total_deficit']
@@ -157,6 +194,7 @@ def start_bodenaushub(zustand0_file_var, zustand1_file_var, cell_size_var, depot
         # Label neu beschriften
         label_volume.config(
             text=f"Überschüsse: {total_excess:.2f} m³, Defizite: {total_deficit:.2f} m³, Differenz gesamt: {total_difference:.2f} m³."
+                 f"{cell_size_message}"
         )
         label_work.config(
             text=f"Minimale Arbeit (gesamt): {min_work:.2f} m³·m, davon {min_work_external:.2f} m³·m {depot_message}"
@@ -195,7 +233,7 @@ def start_bodenaushub(zustand0_file_var, zustand1_file_var, cell_size_var, depot
             results['bounding_box'],
             results['raster_points'],
             results['triangles_set'],
-            results['point_df'],
+            point_grid_to_df(results['point_grid']),
         )
 
     except Exception as e:
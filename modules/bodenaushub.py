@@ -1,43 +1,114 @@
 # bodenaushub.py
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
 import numpy as np
 import pandas as pd
 import pulp
 from scipy.spatial.distance import cdist
-from stl import mesh
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 from matplotlib.patches import Polygon
 from matplotlib.colors import LinearSegmentedColormap
 
+from modules.decimation import decimate_terrain
+from modules.footprint import calculate_footprint_mask
+from modules.mesh_cache import cache_enabled, load_heights_cached, load_mesh_cached, load_spatial_index_cached
+from modules.pipeline import run_stages
+from modules.spatial_index import build_triangle_grid_index, query_triangle_grid_index
+from modules.transport_solvers import (
+    solve_transport_column_generation,
+    solve_transport_highs,
+    solve_transport_multiscale,
+    solve_transport_network_simplex,
+    solve_transport_sinkhorn,
+)
+from modules.terrain_io import (
+    read_terrain_file, mapped_file, weld_vertices, is_indexed_mesh, mesh_num_triangles, mesh_vertices, triangle_corners,
+    mesh_triangles
+)
+
 import tkinter as tk
 
 # --- Funktionen zur Berechnung der Volumen (-differenzen) des Rasters --- #
-def load_stl_files(file_0, file_1):
+def load_stl_files(*files, indexed=False, weld_tolerance=1e-6):
     """
-    Lädt zwei STL-Dateien und gibt die Dreiecksarrays zurück.
-
-    :param file_0: Pfad zur ersten STL-Datei
-    :param file_1: Pfad zur zweiten STL-Datei
-    :return: Dreiecksarrays von beiden STL-Dateien
+    Lädt beliebig viele STL-Dateien (Zustand 0, 1, ..., z. B. Bauphasen) und gibt die Dreiecksarrays zurück.
+    Digitale Geländemodelle als XYZ-Punkte oder ESRI-ASCII-Raster und die Geländeelemente von IFC-Dateien werden
+    über read_terrain_file direkt als indizierte Netze geladen.
+
+    :param files: Pfade zu den STL-, IFC-, XYZ- oder ASCII-Rasterdateien in der Reihenfolge der Zustände
+    :param indexed: Wenn True, werden die Eckpunkte verschweißt und indizierte Netze
+                    ({'vertices': (V, 3), 'faces': (N, 3) int32}) zurückgegeben
+    :param weld_tolerance: Schweißtoleranz für indizierte Netze [m]
+    :return: Liste der Dreiecksarrays (binäre Dateien als schreibgeschützte Memory-Map) bzw. indizierten Netze
     """
-    mesh0 = mesh.Mesh.from_file(file_0)
-    mesh1 = mesh.Mesh.from_file(file_1)
-
-    triangles_0 = mesh0.vectors
-    triangles_1 = mesh1.vectors
-
-    triangles_set = [triangles_0, triangles_1]
-
-    print("STL-Dateien geladen:")
-    print(f"Zustand 0: {file_0}, Anzahl Dreiecke: {len(triangles_0)}")
-    print(f"Zustand 1: {file_1}, Anzahl Dreiecke: {len(triangles_1)}")
+    triangles_set = [read_terrain_file(file_path) for file_path in files]
+    if indexed:
+        triangles_set = [
+            triangles if is_indexed_mesh(triangles) else weld_vertices(triangles, weld_tolerance)
+            for triangles in triangles_set
+        ]
+
+    print("Geländedateien geladen:")
+    for idx, file_path in enumerate(files):
+        print(f"Zustand {idx}: {file_path}, Anzahl Dreiecke: {mesh_num_triangles(triangles_set[idx])}")
+    if indexed:
+        for idx, terrain_mesh in enumerate(triangles_set):
+            indexed_bytes = terrain_mesh['vertices'].nbytes + terrain_mesh['faces'].nbytes
+            stl_bytes = mesh_num_triangles(terrain_mesh) * 9 * terrain_mesh['vertices'].itemsize
+            print(f"Zustand {idx}: {len(terrain_mesh['vertices'])} Eckpunkte nach dem Verschweißen, "
+                  f"Speicher {indexed_bytes / 1e6:.2f} MB statt {stl_bytes / 1e6:.2f} MB")
 
     return triangles_set
+def load_stl_files_cached(*files, indexed=False, weld_tolerance=1e-6, epsilon=1e-6):
+    """
+    Lädt beliebig viele STL-Dateien samt Dreiecksindex über den persistenten Netz-Cache (modules/mesh_cache.py).
+    Bei wiederholten Läufen mit denselben Dateien werden die Arrays nur noch als Memory-Map geöffnet.
+
+    :param files: Pfade zu den STL-Dateien in der Reihenfolge der Zustände
+    :param indexed: Indizierte Netze statt Dreiecksarrays laden
+    :param weld_tolerance: Schweißtoleranz für indizierte Netze [m]
+    :param epsilon: Toleranzwert für den Dreiecksindex
+    :return: Liste der Netze und Liste der zugehörigen Dreiecksindizes
+    """
+    triangles_set = []
+    spatial_indices = []
+    for idx, file_path in enumerate(files):
+        terrain_mesh, mesh_key = load_mesh_cached(file_path, indexed, weld_tolerance)
+        triangles_set.append(terrain_mesh)
+        spatial_indices.append(load_spatial_index_cached(terrain_mesh, mesh_key, epsilon))
+        print(f"Zustand {idx}: {file_path}, Anzahl Dreiecke: {mesh_num_triangles(terrain_mesh)}")
+    return triangles_set, spatial_indices
+def decimate_triangles_set(triangles_set, max_error):
+    """
+    Vereinfacht die Netze aller Zustände mit garantierter Höhenabweichung (modules/decimation.py), bevor sie
+    interpoliert werden. Die Volumen ändern sich dadurch je Zelle um höchstens max_error x Zellfläche.
+
+    :param triangles_set: Liste der Dreiecksarrays bzw. indizierten Netze
+    :param max_error: Zulässige Höhenabweichung der vereinfachten Netze [m]
+    :return: Liste der vereinfachten Netze und Liste der Berichte (Dreiecksanzahlen, erreichte Abweichung)
+    """
+    meshes = []
+    reports = []
+    for idx, terrain_mesh in enumerate(triangles_set):
+        print(f"Zustand {idx}:", end=" ")
+        simplified_mesh, report = decimate_terrain(terrain_mesh, max_error)
+        meshes.append(simplified_mesh)
+        reports.append(report)
+
+    num_before = sum(report['num_triangles_before'] for report in reports)
+    num_after = sum(report['num_triangles_after'] for report in reports)
+    print(f"Vereinfachung gesamt: {num_before} -> {num_after} Dreiecke, "
+          f"größte Höhenabweichung {max(report['max_error'] for report in reports) * 1000:.1f} mm")
+    return meshes, reports
 def calculate_bounding_box(triangles_set):
     # Extrahiere alle x- und y-Werte aus den Dreiecksarrays
-    all_x = [triangles[:, :, 0].flatten() for triangles in triangles_set]
-    all_y = [triangles[:, :, 1].flatten() for triangles in triangles_set]
+    all_x = [mesh_vertices(triangles)[:, 0] for triangles in triangles_set]
+    all_y = [mesh_vertices(triangles)[:, 1] for triangles in triangles_set]
 
     # Berechne die Maxima und Minima für jedes Modell
     min_x_list = [np.min(x) for x in all_x]
@@ -59,7 +130,14 @@ def calculate_bounding_box(triangles_set):
     }
     print("Überlappende Bounding Box:", bounding_box)
     return bounding_box
-def create_raster(bounding_box, cell_size):
+def create_raster_axes(bounding_box, cell_size):
+    """
+    Berechnet die Koordinaten der Zellmittelpunkte entlang der x- und y-Achse des Rasters.
+
+    :param bounding_box: Dictionary mit min_x, max_x, min_y, max_y
+    :param cell_size: Größe der Zelle
+    :return: x-Koordinaten (nx,) und y-Koordinaten (ny,) der Zellmittelpunkte
+    """
     min_x = bounding_box["min_x"]
     max_x = bounding_box["max_x"]
     min_y = bounding_box["min_y"]
@@ -76,14 +154,819 @@ def create_raster(bounding_box, cell_size):
     x_coords = np.linspace(min_x + cell_size / 2, adjusted_max_x - cell_size / 2, num_cells_x)
     y_coords = np.linspace(min_y + cell_size / 2, adjusted_max_y - cell_size / 2, num_cells_y)
 
+    return x_coords, y_coords
+def create_raster(bounding_box, cell_size):
+    x_coords, y_coords = create_raster_axes(bounding_box, cell_size)
+
     xv, yv = np.meshgrid(x_coords, y_coords)
     raster_points = np.column_stack([xv.ravel(), yv.ravel()])
 
     return raster_points
-def interpolate_height_for_points(raster_points, triangles_set, epsilon=1e-6):
+def iter_raster_tiles(bounding_box, cell_size, tile_size=512):
+    """
+    Erzeugt das Raster von create_raster kachelweise und lazy, ohne alle Zellmittelpunkte auf einmal anzulegen.
+    Über alle Kacheln hinweg entstehen genau die Punkte von create_raster.
+
+    :param bounding_box: Dictionary mit min_x, max_x, min_y, max_y
+    :param cell_size: Größe der Zelle
+    :param tile_size: Kantenlänge einer Kachel in Zellen
+    :return: Generator über Tupel (Kachelnummer, Rasterpunkte der Kachel als (n, 2)-Array)
+    """
+    x_coords, y_coords = create_raster_axes(bounding_box, cell_size)
+    tile_id = 0
+    for iy0 in range(0, len(y_coords), tile_size):
+        for ix0 in range(0, len(x_coords), tile_size):
+            xv, yv = np.meshgrid(x_coords[ix0:ix0 + tile_size], y_coords[iy0:iy0 + tile_size])
+            yield tile_id, np.column_stack([xv.ravel(), yv.ravel()])
+            tile_id += 1
+def prepare_triangles(triangles):
+    """
+    Bereitet ein Dreiecksarray für die blockweise baryzentrische Interpolation vor.
+    Degenerierte Dreiecke (Fläche 0) werden verworfen, die Reihenfolge der übrigen Dreiecke bleibt erhalten.
+
+    :param triangles: Array der Form (T, 3, 3) mit den Eckpunkten (x, y, z) der Dreiecke oder indiziertes Netz
+    :return: Dictionary mit den Eckpunkt-Koordinaten als float64-Spalten und der doppelten Dreiecksfläche
+    """
+    a, b, c = (triangle_corners(triangles, corner).astype(np.float64) for corner in range(3))
+
+    # Doppelte Fläche in der xy-Ebene
+    area2 = np.abs((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0]))
+    valid = area2 > 0  # Degenerierte Dreiecke überspringen
+
+    return {
+        'ax': a[valid, 0], 'ay': a[valid, 1], 'az': a[valid, 2],
+        'bx': b[valid, 0], 'by': b[valid, 1], 'bz': b[valid, 2],
+        'cx': c[valid, 0], 'cy': c[valid, 1], 'cz': c[valid, 2],
+        'area2': area2[valid],
+        'index': np.flatnonzero(valid)
+    }
+def calculate_barycentric_weights(px, py, tri, epsilon=1e-6):
+    """
+    Berechnet die flächenbasierten baryzentrischen Gewichte für einen Block von Punkten gegen einen Block von Dreiecken.
+
+    :param px: x-Koordinaten der Punkte, Form (P, 1)
+    :param py: y-Koordinaten der Punkte, Form (P, 1)
+    :param tri: Block aus prepare_triangles (Spalten der Form (T,))
+    :param epsilon: Toleranzwert für numerische Stabilität
+    :return: Gewichte w1, w2, w3 und Maske "Punkt liegt im Dreieck", jeweils Form (P, T)
+    """
+    w1 = np.abs((tri['bx'] - px) * (tri['cy'] - py) - (tri['by'] - py) * (tri['cx'] - px))
+    w2 = np.abs((tri['ax'] - px) * (tri['cy'] - py) - (tri['ay'] - py) * (tri['cx'] - px))
+    w3 = np.abs((tri['ax'] - px) * (tri['by'] - py) - (tri['ay'] - py) * (tri['bx'] - px))
+    w1 /= tri['area2']
+    w2 /= tri['area2']
+    w3 /= tri['area2']
+
+    # Die Gewichte sind Flächenverhältnisse und damit nie negativ; ihre Summe ist nur innerhalb des Dreiecks 1
+    inside = (w1 + w2 + w3) <= 1 + epsilon
+    return w1, w2, w3, inside
+def interpolate_heights(raster_points, triangles, epsilon=1e-6, point_block=512, triangle_block=2048, spatial_index=None,
+                        out=None):
+    """
+    Interpoliert die Höhen aller Rasterpunkte für einen Dreieckssatz mittels baryzentrischer Interpolation.
+    Die Berechnung erfolgt blockweise (Punkte x Dreiecke) mit NumPy. Wie in der Schleifenvariante
+    gewinnt das erste Dreieck (in Dateireihenfolge), das den Punkt enthält.
+
+    :param raster_points: NumPy-Array der Form (N, 2) mit den Punkten (x, y)
+    :param triangles: Array der Form (T, 3, 3) mit den Dreiecken
+    :param epsilon: Toleranzwert für numerische Stabilität
+    :param point_block: Anzahl der Punkte pro Block
+    :param triangle_block: Anzahl der Dreiecke pro Block
+    :param spatial_index: Optionaler Index aus build_triangle_grid_index; dann werden je Punkt nur die
+                          Dreiecke seines Buckets geprüft
+    :param out: Optionales vorbelegtes Array der Form (N,) (z. B. eine Spalte von create_point_grid)
+    :return: NumPy-Array der Form (N,) mit den Höhen, NaN wenn kein Dreieck den Punkt enthält
+    """
+    raster_points = np.asarray(raster_points, dtype=np.float64)
+    tri = prepare_triangles(triangles)
+    if spatial_index is not None:
+        return interpolate_heights_indexed(
+            raster_points, tri, mesh_num_triangles(triangles), spatial_index, epsilon, out=out
+        )
+    num_triangles = len(tri['area2'])
+
+    z = np.full(len(raster_points), np.nan) if out is None else out
+    if out is not None:
+        z.fill(np.nan)
+    for p_start in range(0, len(raster_points), point_block):
+        # Indizes der Punkte im Block, für die noch keine Höhe gefunden wurde
+        open_idx = np.arange(p_start, min(p_start + point_block, len(raster_points)))
+
+        for t_start in range(0, num_triangles, triangle_block):
+            if len(open_idx) == 0:
+                break
+            block = {key: value[t_start:t_start + triangle_block] for key, value in tri.items()}
+
+            px = raster_points[open_idx, 0][:, None]
+            py = raster_points[open_idx, 1][:, None]
+            w1, w2, w3, inside = calculate_barycentric_weights(px, py, block, epsilon)
+
+            hit = inside.any(axis=1)
+            if not hit.any():
+                continue
+            rows = np.flatnonzero(hit)
+            cols = inside[rows].argmax(axis=1)  # Erstes passendes Dreieck im Block
+
+            z[open_idx[rows]] = (
+                block['az'][cols]
+                + w2[rows, cols] * (block['bz'][cols] - block['az'][cols])
+                + w3[rows, cols] * (block['cz'][cols] - block['az'][cols])
+            )
+            open_idx = open_idx[~hit]
+    return z
+def interpolate_heights_indexed(raster_points, tri, num_triangles, spatial_index, epsilon=1e-6, point_block=65536,
+                                out=None, return_triangles=False):
+    """
+    Interpoliert die Höhen mithilfe des Dreiecksindex: Für jeden Punkt werden nur die Kandidaten-Dreiecke
+    aus seinem Bucket geprüft. Das Ergebnis ist identisch zur vollständigen Suche.
+
+    :param raster_points: NumPy-Array der Form (N, 2) mit den Punkten (x, y)
+    :param tri: Vorbereitete Dreiecke aus prepare_triangles
+    :param num_triangles: Anzahl der ursprünglichen Dreiecke (inkl. degenerierter)
+    :param spatial_index: Index aus build_triangle_grid_index über dieselben Dreiecke
+    :param epsilon: Toleranzwert für numerische Stabilität
+    :param point_block: Anzahl der Punkte pro Abfrageblock
+    :param out: Optionales vorbelegtes Array der Form (N,) für die Höhen
+    :param return_triangles: Zusätzlich die Nummer des gefundenen Dreiecks je Punkt zurückgeben
+    :return: NumPy-Array der Form (N,) mit den Höhen, NaN wenn kein Dreieck den Punkt enthält
+             (mit return_triangles zusätzlich die Dreiecksnummern, -1 ohne Treffer)
+    """
+    # Zuordnung ursprüngliche Dreiecksnummer -> Zeile in tri (-1 für degenerierte Dreiecke)
+    lookup = np.full(num_triangles, -1, dtype=np.int64)
+    lookup[tri['index']] = np.arange(len(tri['index']))
+
+    z = np.full(len(raster_points), np.nan) if out is None else out
+    if out is not None:
+        z.fill(np.nan)
+    found = np.full(len(raster_points), -1, dtype=np.int64) if return_triangles else None
+    for p_start in range(0, len(raster_points), point_block):
+        points = raster_points[p_start:p_start + point_block]
+        point_ids, triangle_ids = query_triangle_grid_index(spatial_index, points)
+        triangle_ids = lookup[triangle_ids]
+        keep = triangle_ids >= 0
+        point_ids, triangle_ids = point_ids[keep], triangle_ids[keep]
+
+        candidates = {key: value[triangle_ids] for key, value in tri.items()}
+        w1, w2, w3, inside = calculate_barycentric_weights(
+            points[point_ids, 0], points[point_ids, 1], candidates, epsilon
+        )
+
+        # Paare sind je Punkt nach Dreiecksnummer sortiert: der erste Treffer ist das erste passende Dreieck
+        hits = np.flatnonzero(inside)
+        hit_points, first = np.unique(point_ids[hits], return_index=True)
+        sel = hits[first]
+        z[p_start + hit_points] = (
+            candidates['az'][sel]
+            + w2[sel] * (candidates['bz'][sel] - candidates['az'][sel])
+            + w3[sel] * (candidates['cz'][sel] - candidates['az'][sel])
+        )
+        if return_triangles:
+            found[p_start + hit_points] = tri['index'][triangle_ids[sel]]
+    if return_triangles:
+        return z, found
+    return z
+def interpolate_heights_hinted(raster_points, triangles, hint_ids, spatial_index, epsilon=1e-6):
+    """
+    Interpoliert die Höhen mit einem vermuteten Dreieck je Punkt (z. B. dem Dreieck der übergeordneten Zelle
+    einer gröberen Rasterstufe). Liegt ein Punkt deutlich innerhalb seines vermuteten Dreiecks, entfällt die
+    Indexabfrage; alle übrigen Punkte werden über den Dreiecksindex gesucht. Für überschneidungsfreie Netze
+    ergibt sich dieselbe Höhe wie bei der vollständigen Suche.
+
+    :param raster_points: NumPy-Array der Form (N, 2) mit den Punkten (x, y)
+    :param triangles: Array der Form (T, 3, 3) mit den Dreiecken oder indiziertes Netz
+    :param hint_ids: Vermutete Dreiecksnummer je Punkt (Form (N,), -1 ohne Vermutung)
+    :param spatial_index: Index aus build_triangle_grid_index über dieselben Dreiecke
+    :param epsilon: Toleranzwert für numerische Stabilität
+    :return: Höhen (N,), Dreiecksnummer je Punkt (N,), -1 ohne Treffer und Anteil der bestätigten Vermutungen
+    """
+    raster_points = np.asarray(raster_points, dtype=np.float64)
+    tri = prepare_triangles(triangles)
+    num_triangles = mesh_num_triangles(triangles)
+    lookup = np.full(num_triangles, -1, dtype=np.int64)
+    lookup[tri['index']] = np.arange(len(tri['index']))
+
+    z = np.full(len(raster_points), np.nan)
+    found = np.full(len(raster_points), -1, dtype=np.int64)
+    hint_ids = np.asarray(hint_ids, dtype=np.int64)
+    hint_rows = np.where(hint_ids >= 0, lookup[np.clip(hint_ids, 0, max(num_triangles - 1, 0))], -1)
+    hinted = np.flatnonzero(hint_rows >= 0)
+
+    candidates = {key: value[hint_rows[hinted]] for key, value in tri.items()}
+    w1, w2, w3, inside = calculate_barycentric_weights(
+        raster_points[hinted, 0], raster_points[hinted, 1], candidates, epsilon
+    )
+    # Nur Punkte mit Abstand zu allen Kanten übernehmen; Punkte im Toleranzband einer Kante könnten auch in
+    # einem früheren Nachbardreieck liegen und werden wie gewohnt gesucht
+    confirmed = inside & (np.minimum(np.minimum(w1, w2), w3) > epsilon)
+    sel = hinted[confirmed]
+    z[sel] = (
+        candidates['az'][confirmed]
+        + w2[confirmed] * (candidates['bz'][confirmed] - candidates['az'][confirmed])
+        + w3[confirmed] * (candidates['cz'][confirmed] - candidates['az'][confirmed])
+    )
+    found[sel] = hint_ids[sel]
+
+    rest = np.ones(len(raster_points), dtype=bool)
+    rest[sel] = False
+    rest = np.flatnonzero(rest)
+    if len(rest):
+        z[rest], found[rest] = interpolate_heights_indexed(
+            raster_points[rest], tri, num_triangles, spatial_index, epsilon, return_triangles=True
+        )
+    return z, found, len(sel) / max(len(raster_points), 1)
+def triangle_hints_for_points(level, state, raster_points):
+    """
+    Übernimmt die gefundenen Dreiecke einer Rasterstufe (compute_volume_pyramid) als Vermutung für beliebige
+    Punkte: Jeder Punkt erhält das Dreieck der Zelle der Stufe, in der er liegt.
+
+    :param level: Ergebnis einer Rasterstufe mit 'bounding_box', 'cell_size' und 'triangle_ids'
+    :param state: Nummer des Zustands
+    :param raster_points: NumPy-Array der Form (N, 2) mit den Punkten (x, y)
+    :return: Vermutete Dreiecksnummer je Punkt (Form (N,), -1 ohne Vermutung)
+    """
+    triangle_ids = level['triangle_ids'][state]
+    ny, nx = triangle_ids.shape
+    ix = np.floor((raster_points[:, 0] - level['bounding_box']['min_x']) / level['cell_size']).astype(np.int64)
+    iy = np.floor((raster_points[:, 1] - level['bounding_box']['min_y']) / level['cell_size']).astype(np.int64)
+    return triangle_ids[np.clip(iy, 0, ny - 1), np.clip(ix, 0, nx - 1)]
+def build_spatial_indices(triangles_set, epsilon=1e-6):
+    """
+    Baut für jeden Dreieckssatz einen Dreiecksindex (einmal pro Netz, wiederverwendbar für beliebige Raster).
+
+    :param triangles_set: Liste von Dreieckssätzen (z. B. aus load_stl_files)
+    :param epsilon: Toleranzwert für numerische Stabilität (wie bei der Interpolation)
+    :return: Liste von Indizes aus build_triangle_grid_index
+    """
+    return [build_triangle_grid_index(triangles, epsilon=epsilon) for triangles in triangles_set]
+def interpolate_point_grid(raster_points, triangles_set, epsilon=1e-6, spatial_indices=None, dtype=np.float64):
+    """
+    Interpoliert die Höhen (z0, z1, ...) aller Dreieckssätze direkt in die vorbelegten Spalten eines
+    Punktrasters (create_point_grid), ohne Zwischenlisten oder DataFrame.
+
+    :param raster_points: NumPy-Array der Form (N, 2) mit den Punkten (x, y)
+    :param triangles_set: Liste von Dreieckssätzen (jeder Dreieckssatz ist ein Array von Dreiecken)
+    :param epsilon: Toleranzwert für numerische Stabilität
+    :param spatial_indices: Optionale Liste von Dreiecksindizes (build_spatial_indices), eine je Dreieckssatz
+    :param dtype: Datentyp der Höhen- und Volumenspalten (np.float64 oder np.float32)
+    :return: Punktraster (Dictionary mit x, y, z0, z1, ..., volumen_diff, status)
+    """
+    raster_points = np.asarray(raster_points)
+    point_grid = create_point_grid(raster_points, len(triangles_set), dtype)
+    for idx, triangles in enumerate(triangles_set):
+        spatial_index = spatial_indices[idx] if spatial_indices is not None else None
+        if np.dtype(dtype) == np.float64:
+            interpolate_heights(raster_points, triangles, epsilon, spatial_index=spatial_index, out=point_grid[f'z{idx}'])
+        else:
+            point_grid[f'z{idx}'][:] = interpolate_heights(raster_points, triangles, epsilon, spatial_index=spatial_index)
+        if spatial_index is not None:
+            stats = spatial_index['stats']
+            print(f"Zustand {idx}: {stats['query_throughput']:.0f} Punkte/s bei der Indexabfrage, "
+                  f"{stats['query_candidates'] / max(stats['query_points'], 1):.1f} Kandidaten je Punkt")
+    return point_grid
+def interpolate_height_for_points(raster_points, triangles_set, epsilon=1e-6, spatial_indices=None):
+    """
+    Prüft für eine Liste von Punkten (x, y), ob diese in einem der Dreiecke eines jeden Dreieckssatzes liegt,
+    und berechnet dann die Höhen (z0, z1, ...) mittels baryzentrischer Interpolation (vektorisiert, siehe
+    interpolate_point_grid).
+
+    :param raster_points: NumPy-Array der Form (N, 2) mit den Punkten (x, y)
+    :param triangles_set: Liste von Dreieckssätzen (jeder Dreieckssatz ist ein Array von Dreiecken)
+    :param epsilon: Toleranzwert für numerische Stabilität
+    :param spatial_indices: Optionale Liste von Dreiecksindizes (build_spatial_indices), eine je Dreieckssatz
+    :return: Pandas-DataFrame mit x, y und z-Werten für jeden Dreieckssatz (NaN, wenn kein Dreieck gefunden)
+    """
+    point_grid = interpolate_point_grid(raster_points, triangles_set, epsilon, spatial_indices)
+    return point_grid_to_df(point_grid, columns=['x', 'y'] + [f'z{idx}' for idx in range(len(triangles_set))])
+def rasterize_triangles(x_coords, y_coords, triangles, epsilon=1e-6, max_candidates=2 ** 22):
+    """
+    Füllt ein Höhenraster dreiecksgetrieben: Jedes Dreieck wird genau einmal besucht und schreibt die
+    baryzentrisch interpolierte Höhe in alle Zellmittelpunkte, die es überdeckt. Aufwand O(T + N) statt O(N x T).
+    Liegt ein Zellmittelpunkt in mehreren Dreiecken (gemeinsame Kanten), gewinnt wie bei der punktweisen
+    Interpolation das erste Dreieck.
+
+    :param x_coords: x-Koordinaten der Zellmittelpunkte (aufsteigend, äquidistant)
+    :param y_coords: y-Koordinaten der Zellmittelpunkte (aufsteigend, äquidistant)
+    :param triangles: Array der Form (T, 3, 3) mit den Dreiecken
+    :param epsilon: Toleranzwert für numerische Stabilität
+    :param max_candidates: Obergrenze für die Anzahl der (Dreieck, Zelle)-Paare je Block
+    :return: Höhenraster der Form (ny, nx) (NaN ohne Abdeckung) und Abdeckungsmaske gleicher Form
+    """
+    nx, ny = len(x_coords), len(y_coords)
+    z_grid = np.full((ny, nx), np.nan)
+    coverage = np.zeros((ny, nx), dtype=bool)
+    tri = prepare_triangles(triangles)
+    if nx == 0 or ny == 0 or len(tri['area2']) == 0:
+        return z_grid, coverage
+
+    x0 = float(x_coords[0])
+    y0 = float(y_coords[0])
+    dx = float(x_coords[1] - x_coords[0]) if nx > 1 else 1.0
+    dy = float(y_coords[1] - y_coords[0]) if ny > 1 else 1.0
+
+    # Bereich der Zellmittelpunkte innerhalb der (um epsilon erweiterten) Bounding-Box jedes Dreiecks
+    tri_min_x = np.minimum(np.minimum(tri['ax'], tri['bx']), tri['cx'])
+    tri_max_x = np.maximum(np.maximum(tri['ax'], tri['bx']), tri['cx'])
+    tri_min_y = np.minimum(np.minimum(tri['ay'], tri['by']), tri['cy'])
+    tri_max_y = np.maximum(np.maximum(tri['ay'], tri['by']), tri['cy'])
+    pad = epsilon * np.maximum(tri_max_x - tri_min_x, tri_max_y - tri_min_y)
+    ix0 = np.clip(np.ceil((tri_min_x - pad - x0) / dx), 0, nx).astype(np.int64)
+    ix1 = np.clip(np.floor((tri_max_x + pad - x0) / dx), -1, nx - 1).astype(np.int64)
+    iy0 = np.clip(np.ceil((tri_min_y - pad - y0) / dy), 0, ny).astype(np.int64)
+    iy1 = np.clip(np.floor((tri_max_y + pad - y0) / dy), -1, ny - 1).astype(np.int64)
+    width = np.maximum(ix1 - ix0 + 1, 0)
+    counts = width * np.maximum(iy1 - iy0 + 1, 0)
+
+    # Dreiecke so in Blöcke aufteilen, dass die Anzahl der Kandidatenpaare begrenzt bleibt
+    cumulative = np.cumsum(counts)
+    block_ends = np.searchsorted(cumulative, np.arange(max_candidates, cumulative[-1], max_candidates), side='right')
+    block_bounds = np.unique(np.concatenate([[0], np.maximum(block_ends, 1), [len(counts)]]))
+
+    x_coords = np.asarray(x_coords, dtype=np.float64)
+    y_coords = np.asarray(y_coords, dtype=np.float64)
+    z_flat = z_grid.ravel()
+    coverage_flat = coverage.ravel()
+    for t_start, t_end in zip(block_bounds[:-1], block_bounds[1:]):
+        block_counts = counts[t_start:t_end]
+        tri_ids = np.repeat(np.arange(t_start, t_end), block_counts)
+        local = np.arange(block_counts.sum()) - np.repeat(np.cumsum(block_counts) - block_counts, block_counts)
+        block_width = width[tri_ids]
+        ix = ix0[tri_ids] + local % block_width
+        iy = iy0[tri_ids] + local // block_width
+
+        candidates = {key: value[tri_ids] for key, value in tri.items()}
+        w1, w2, w3, inside = calculate_barycentric_weights(x_coords[ix], y_coords[iy], candidates, epsilon)
+
+        # Paare liegen in Dreiecksreihenfolge vor: erster Treffer je Zelle = erstes passendes Dreieck
+        hits = np.flatnonzero(inside)
+        cells, first = np.unique(iy[hits] * nx + ix[hits], return_index=True)
+        sel = hits[first]
+        new = ~coverage_flat[cells]
+        cells, sel = cells[new], sel[new]
+
+        z_flat[cells] = (
+            candidates['az'][sel]
+            + w2[sel] * (candidates['bz'][sel] - candidates['az'][sel])
+            + w3[sel] * (candidates['cz'][sel] - candidates['az'][sel])
+        )
+        coverage_flat[cells] = True
+    return z_grid, coverage
+def rasterize_height_grids(bounding_box, cell_size, triangles_set, epsilon=1e-6):
+    """
+    Alternative zu interpolate_height_for_points: Rastert jeden Dreieckssatz dreiecksgetrieben auf das
+    Raster von create_raster (gleiche Zellmittelpunkte, gleiche Reihenfolge nach ravel()).
+
+    :param bounding_box: Dictionary mit min_x, max_x, min_y, max_y
+    :param cell_size: Größe der Zelle
+    :param triangles_set: Liste von Dreieckssätzen
+    :param epsilon: Toleranzwert für numerische Stabilität
+    :return: Dictionary mit 'x_coords', 'y_coords', 'z_grids' (Liste von (ny, nx)-Arrays) und 'coverage'
+             (Liste von Abdeckungsmasken, eine je Dreieckssatz)
+    """
+    x_coords, y_coords = create_raster_axes(bounding_box, cell_size)
+    z_grids = []
+    coverage = []
+    for triangles in triangles_set:
+        z_grid, mask = rasterize_triangles(x_coords, y_coords, triangles, epsilon)
+        z_grids.append(z_grid)
+        coverage.append(mask)
+    return {'x_coords': x_coords, 'y_coords': y_coords, 'z_grids': z_grids, 'coverage': coverage}
+def height_grids_to_point_df(height_grids):
+    """
+    Wandelt das Ergebnis von rasterize_height_grids in das DataFrame-Format von interpolate_height_for_points um.
+
+    :param height_grids: Dictionary aus rasterize_height_grids
+    :return: Pandas-DataFrame mit x, y und z-Werten für jeden Dreieckssatz
+    """
+    xv, yv = np.meshgrid(height_grids['x_coords'], height_grids['y_coords'])
+    point_data = {'x': xv.ravel(), 'y': yv.ravel()}
+    for idx, z_grid in enumerate(height_grids['z_grids']):
+        point_data[f'z{idx}'] = z_grid.ravel()
+    return pd.DataFrame(point_data)
+# --- Exakte Volumenintegration je Zelle (Verschneidung TIN x Raster) --- #
+def clip_polygons_half_plane(polygons, counts, axis, bound, keep_above):
+    """
+    Beschneidet viele konvexe Polygone gleichzeitig an einer achsparallelen Halbebene (ein Schritt des
+    Sutherland-Hodgman-Verfahrens, vektorisiert). Die z-Koordinate wird entlang der Kanten linear mitgeführt.
+
+    :param polygons: Array der Form (P, M, 3) mit den Eckpunkten (x, y, z), gültig sind die ersten counts Einträge
+    :param counts: Anzahl der Eckpunkte je Polygon (P,)
+    :param axis: 0 für x, 1 für y
+    :param bound: Lage der Grenze je Polygon (P,)
+    :param keep_above: True behält coord >= bound, False behält coord <= bound
+    :return: Beschnittene Polygone (P, M, 3) und neue Eckpunktanzahl (P,)
+    """
+    num_polygons, max_vertices = polygons.shape[:2]
+    slots = np.arange(max_vertices)
+    valid = slots[None, :] < counts[:, None]
+
+    # Nur Polygone mit Eckpunkten außerhalb der Halbebene müssen beschnitten werden
+    signed = polygons[:, :, axis] - bound[:, None]
+    outside = valid & ((signed < 0) if keep_above else (signed > 0))
+    cut = np.flatnonzero(outside.any(axis=1))
+    if len(cut) < num_polygons:
+        clipped = polygons.copy()
+        new_counts = counts.copy()
+        if len(cut):
+            clipped[cut], new_counts[cut] = clip_polygons_half_plane(
+                polygons[cut], counts[cut], axis, bound[cut], keep_above
+            )
+        return clipped, new_counts
+
+    next_slots = (slots[None, :] + 1) % np.maximum(counts, 1)[:, None]
+    current = polygons
+    following = np.take_along_axis(polygons, next_slots[:, :, None], axis=1)
+
+    distance_current = current[:, :, axis] - bound[:, None]
+    distance_following = following[:, :, axis] - bound[:, None]
+    if not keep_above:
+        distance_current, distance_following = -distance_current, -distance_following
+    inside_current = distance_current >= 0
+    inside_following = distance_following >= 0
+
+    # Schnittpunkt der Kante mit der Grenze (nur verwendet, wenn die Kante die Grenze kreuzt)
+    crossing = valid & (inside_current != inside_following)
+    t = np.divide(distance_current, distance_current - distance_following,
+                  out=np.zeros_like(distance_current), where=crossing)
+    intersection = current + t[:, :, None] * (following - current)
+
+    # Je Eingabeeckpunkt: erst der Eckpunkt selbst (falls innen), dann ggf. der Schnittpunkt
+    candidates = np.stack([current, intersection], axis=2).reshape(num_polygons, 2 * max_vertices, 3)
+    emit = np.stack([valid & inside_current, crossing], axis=2).reshape(num_polygons, 2 * max_vertices)
+    positions = np.cumsum(emit, axis=1) - 1
+    new_counts = emit.sum(axis=1)
+
+    clipped = np.zeros_like(polygons)
+    rows, cols = np.nonzero(emit)
+    clipped[rows, positions[rows, cols]] = candidates[rows, cols]
+    return clipped, new_counts
+def polygon_height_integrals(polygons, counts):
+    """
+    Berechnet Fläche und Höhenintegral (Volumen über z = 0) konvexer Polygone mit linear verlaufender Höhe
+    exakt über eine Fächertriangulierung: Integral = Summe der Teilflächen x mittlere Eckhöhe.
+
+    :param polygons: Array der Form (P, M, 3)
+    :param counts: Anzahl der Eckpunkte je Polygon (P,)
+    :return: Projizierte Fläche (P,) und Höhenintegral (P,)
+    """
+    area = np.zeros(len(polygons))
+    integral = np.zeros(len(polygons))
+    first = polygons[:, 0]
+    for k in range(1, polygons.shape[1] - 1):
+        valid = k + 1 < counts
+        b = polygons[:, k]
+        c = polygons[:, k + 1]
+        fan_area = 0.5 * ((b[:, 0] - first[:, 0]) * (c[:, 1] - first[:, 1])
+                          - (c[:, 0] - first[:, 0]) * (b[:, 1] - first[:, 1]))
+        fan_area = np.where(valid, fan_area, 0.0)
+        area += fan_area
+        integral += fan_area * (first[:, 2] + b[:, 2] + c[:, 2]) / 3
+    # Konvexe Polygone haben einen einheitlichen Umlaufsinn, das Vorzeichen folgt dem Dreieck
+    orientation = np.sign(area)
+    return area * orientation, integral * orientation
+def integrate_cell_heights(x_coords, y_coords, cell_size, triangles, max_candidates=2 ** 20):
+    """
+    Integriert die Geländehöhe eines TIN exakt über jede Rasterzelle: Jedes Dreieck wird an allen Zellen
+    seiner Bounding-Box beschnitten (clip_polygons_half_plane) und das Prisma unter dem Teilpolygon analytisch
+    integriert. Die mittlere Zellhöhe (Integral / überdeckte Fläche) liefert mit cell_size² multipliziert das
+    exakte Volumen einer vollständig überdeckten Zelle, unabhängig von der Zellgröße.
+    Überlappende Dreiecke (kein gültiges TIN) würden doppelt gezählt.
+
+    :param x_coords: x-Koordinaten der Zellmittelpunkte (aufsteigend, äquidistant)
+    :param y_coords: y-Koordinaten der Zellmittelpunkte (aufsteigend, äquidistant)
+    :param cell_size: Größe der Zelle
+    :param triangles: Dreiecksarray (T, 3, 3) oder indiziertes Netz
+    :param max_candidates: Obergrenze für die Anzahl der (Dreieck, Zelle)-Paare je Block
+    :return: Höhenintegral je Zelle (ny, nx) und überdeckte Fläche je Zelle (ny, nx)
+    """
+    nx, ny = len(x_coords), len(y_coords)
+    volume_flat = np.zeros(nx * ny)
+    area_flat = np.zeros(nx * ny)
+    corners = np.stack([triangle_corners(triangles, corner) for corner in range(3)], axis=1).astype(np.float64)
+    if nx == 0 or ny == 0 or len(corners) == 0:
+        return volume_flat.reshape(ny, nx), area_flat.reshape(ny, nx)
+
+    # Zellgrenzen: Zelle i reicht von left + i * cell_size bis left + (i + 1) * cell_size
+    left = float(x_coords[0]) - cell_size / 2
+    bottom = float(y_coords[0]) - cell_size / 2
+    ix0 = np.clip(np.floor((corners[:, :, 0].min(axis=1) - left) / cell_size), 0, nx - 1).astype(np.int64)
+    ix1 = np.clip(np.floor((corners[:, :, 0].max(axis=1) - left) / cell_size), 0, nx - 1).astype(np.int64)
+    iy0 = np.clip(np.floor((corners[:, :, 1].min(axis=1) - bottom) / cell_size), 0, ny - 1).astype(np.int64)
+    iy1 = np.clip(np.floor((corners[:, :, 1].max(axis=1) - bottom) / cell_size), 0, ny - 1).astype(np.int64)
+    width = ix1 - ix0 + 1
+    counts = width * (iy1 - iy0 + 1)
+
+    # Dreiecke innerhalb einer einzigen Zelle müssen nicht beschnitten werden (bei groben Zellen die meisten)
+    single = np.flatnonzero(counts == 1)
+    polygons = np.zeros((len(single), 3, 3))
+    polygons[:] = corners[single]
+    area, integral = polygon_height_integrals(polygons, np.full(len(single), 3))
+    cells = iy0[single] * nx + ix0[single]
+    area_flat += np.bincount(cells, weights=area, minlength=nx * ny)
+    volume_flat += np.bincount(cells, weights=integral, minlength=nx * ny)
+
+    # Übrige Dreiecke so in Blöcke aufteilen, dass die Anzahl der Paare begrenzt bleibt
+    multi = np.flatnonzero(counts > 1)
+    if len(multi) == 0:
+        return volume_flat.reshape(ny, nx), area_flat.reshape(ny, nx)
+    cumulative = np.cumsum(counts[multi])
+    block_ends = np.searchsorted(cumulative, np.arange(max_candidates, cumulative[-1], max_candidates), side='right')
+    block_bounds = np.unique(np.concatenate([[0], np.maximum(block_ends, 1), [len(multi)]]))
+
+    for b_start, b_end in zip(block_bounds[:-1], block_bounds[1:]):
+        block_counts = counts[multi[b_start:b_end]]
+        tri_ids = np.repeat(multi[b_start:b_end], block_counts)
+        local = np.arange(block_counts.sum()) - np.repeat(np.cumsum(block_counts) - block_counts, block_counts)
+        ix = ix0[tri_ids] + local % width[tri_ids]
+        iy = iy0[tri_ids] + local // width[tri_ids]
+
+        # Ein Dreieck hat nach dem Beschneiden an vier Halbebenen höchstens sieben Eckpunkte
+        polygons = np.zeros((len(tri_ids), 8, 3))
+        polygons[:, :3] = corners[tri_ids]
+        vertex_counts = np.full(len(tri_ids), 3)
+        cell_left = left + ix * cell_size
+        cell_bottom = bottom + iy * cell_size
+        polygons, vertex_counts = clip_polygons_half_plane(polygons, vertex_counts, 0, cell_left, True)
+        polygons, vertex_counts = clip_polygons_half_plane(polygons, vertex_counts, 0, cell_left + cell_size, False)
+        polygons, vertex_counts = clip_polygons_half_plane(polygons, vertex_counts, 1, cell_bottom, True)
+        polygons, vertex_counts = clip_polygons_half_plane(polygons, vertex_counts, 1, cell_bottom + cell_size, False)
+
+        area, integral = polygon_height_integrals(polygons, vertex_counts)
+        cells = iy * nx + ix
+        area_flat += np.bincount(cells, weights=area, minlength=nx * ny)
+        volume_flat += np.bincount(cells, weights=integral, minlength=nx * ny)
+    return volume_flat.reshape(ny, nx), area_flat.reshape(ny, nx)
+def integrate_mean_heights(x_coords, y_coords, cell_size, triangles, min_coverage=1e-9):
+    """
+    Mittlere Geländehöhe je Zelle aus der exakten Integration (integrate_cell_heights). Sie ersetzt die Höhe
+    im Zellmittelpunkt, sodass (z1 - z0) * cell_size² das exakte Volumen einer vollständig überdeckten Zelle
+    ergibt. Teilweise überdeckte Zellen erhalten die mittlere Höhe des überdeckten Teils.
+
+    :param x_coords: x-Koordinaten der Zellmittelpunkte
+    :param y_coords: y-Koordinaten der Zellmittelpunkte
+    :param cell_size: Größe der Zelle
+    :param triangles: Dreiecksarray oder indiziertes Netz
+    :param min_coverage: Mindestanteil überdeckter Zellfläche, darunter bleibt die Zelle ohne Höhe (NaN)
+    :return: Mittlere Höhen der Form (ny, nx) und überdeckter Flächenanteil je Zelle
+    """
+    volume, area = integrate_cell_heights(x_coords, y_coords, cell_size, triangles)
+    coverage = area / cell_size ** 2
+    mean_heights = np.full(volume.shape, np.nan)
+    covered = coverage > min_coverage
+    mean_heights[covered] = volume[covered] / area[covered]
+    return mean_heights, coverage
+
+
+# --- Adaptives Quadtree-Raster --- #
+# Lage der neun Stützstellen einer Zelle (Ecken, Kantenmitten, Mittelpunkt) relativ zur Zellgröße
+QUADTREE_SAMPLE_U = np.array([-0.5, 0.0, 0.5, -0.5, 0.0, 0.5, -0.5, 0.0, 0.5])
+QUADTREE_SAMPLE_V = np.array([-0.5, -0.5, -0.5, 0.0, 0.0, 0.0, 0.5, 0.5, 0.5])
+QUADTREE_CENTER = 4
+
+
+def classify_quadtree_cells(z_samples, tolerance):
+    """
+    Entscheidet je Zelle anhand der Höhen an den neun Stützstellen, ob sie unterteilt werden muss. Eine Zelle
+    bleibt Blatt, wenn sich das Gelände in jeder Phase überall um höchstens tolerance ändert (unverändert) oder
+    sich überall mit gleichem Vorzeichen und bis auf tolerance eben ändert (die Mittelpunkthöhe liefert dann das
+    exakte Volumen und Auf- und Abtrag werden nicht vermischt).
+
+    :param z_samples: Höhen der Form (S, M, 9) für S Zustände und M Zellen
+    :param tolerance: Toleranz für Höhenänderung und Abweichung von der Ebene [m]
+    :return: Boolesches Array (M,), True = unterteilen (auch bei fehlenden Höhen an einzelnen Stützstellen)
+    """
+    subdivide = np.any(np.isnan(z_samples), axis=(0, 2))
+    for state in range(len(z_samples) - 1):
+        d = z_samples[state + 1] - z_samples[state]
+        unchanged = np.all(np.abs(d) <= tolerance, axis=1)
+        same_sign = np.all(d > tolerance, axis=1) | np.all(d < -tolerance, axis=1)
+
+        # Ausgleichsebene durch die neun Stützstellen (u, v in {-1, 0, 1}) und maximale Abweichung
+        mean = d.mean(axis=1, keepdims=True)
+        slope_u = (d * (2 * QUADTREE_SAMPLE_U)).sum(axis=1, keepdims=True) / 6
+        slope_v = (d * (2 * QUADTREE_SAMPLE_V)).sum(axis=1, keepdims=True) / 6
+        residual = np.abs(d - mean - slope_u * (2 * QUADTREE_SAMPLE_U) - slope_v * (2 * QUADTREE_SAMPLE_V)).max(axis=1)
+        planar = residual <= tolerance
+
+        subdivide |= ~(unchanged | (same_sign & planar))
+    return subdivide
+def build_adaptive_raster(bounding_box, cell_size, triangles_set, min_cell_size, tolerance=1e-3, spatial_indices=None):
+    """
+    Erstellt ein adaptives Quadtree-Raster: Ausgehend vom groben Raster mit cell_size wird jede Zelle geviertelt,
+    solange sich das Gelände in ihr nicht einheitlich ändert (classify_quadtree_cells) und min_cell_size noch nicht
+    erreicht ist. Jede Blattzelle trägt ihre eigene Fläche, die in die Volumendifferenz und das Transportproblem
+    eingeht. Unveränderte oder gleichmäßig veränderte Bereiche bleiben grob.
+
+    :param bounding_box: Dictionary mit min_x, max_x, min_y, max_y
+    :param cell_size: Größe der groben Startzellen [m]
+    :param triangles_set: Liste der Netze (Zustand 0, 1, ...)
+    :param min_cell_size: Kleinste Zellgröße [m]
+    :param tolerance: Toleranz für Höhenänderung und Abweichung von der Ebene [m]
+    :param spatial_indices: Optionale Dreiecksindizes je Netz (werden sonst erstellt)
+    :return: Dictionary mit 'points' (N, 2), 'size' (N,), 'z' (S, N) (Höhen im Zellmittelpunkt) und 'levels'
+             (Anzahl der Blattzellen je Ebene)
+    """
+    if spatial_indices is None or any(spatial_index is None for spatial_index in spatial_indices):
+        spatial_indices = build_spatial_indices(triangles_set)
+    x_coords, y_coords = create_raster_axes(bounding_box, cell_size)
+    xv, yv = np.meshgrid(x_coords, y_coords)
+    centers = np.column_stack([xv.ravel(), yv.ravel()])
+    size = float(cell_size)
+
+    leaf_points, leaf_sizes, leaf_heights, levels = [], [], [], []
+    while len(centers):
+        # Höhen aller Zustände an den neun Stützstellen jeder Zelle
+        samples = np.stack([
+            centers[:, 0][:, None] + QUADTREE_SAMPLE_U * size,
+            centers[:, 1][:, None] + QUADTREE_SAMPLE_V * size
+        ], axis=-1).reshape(-1, 2)
+        z_samples = np.stack([
+            interpolate_heights(samples, triangles, spatial_index=spatial_index).reshape(len(centers), 9)
+            for triangles, spatial_index in zip(triangles_set, spatial_indices)
+        ])
+
+        # Zellen ganz außerhalb eines Netzes entfallen, Zellen am Rand werden weiter unterteilt
+        outside = np.any(np.all(np.isnan(z_samples), axis=2), axis=0)
+        subdivide = classify_quadtree_cells(z_samples, tolerance) & (size / 2 >= min_cell_size) & ~outside
+        leaves = ~subdivide & ~outside
+        leaf_points.append(centers[leaves])
+        leaf_sizes.append(np.full(np.count_nonzero(leaves), size))
+        leaf_heights.append(z_samples[:, leaves, QUADTREE_CENTER])
+        levels.append(int(np.count_nonzero(leaves)))
+
+        # Zu unterteilende Zellen in vier Kinder zerlegen
+        parents = centers[subdivide]
+        offsets = np.array([[-0.25, -0.25], [0.25, -0.25], [-0.25, 0.25], [0.25, 0.25]]) * size
+        centers = (parents[:, None, :] + offsets[None, :, :]).reshape(-1, 2)
+        size /= 2
+
+    adaptive_raster = {
+        'points': np.concatenate(leaf_points),
+        'size': np.concatenate(leaf_sizes),
+        'z': np.concatenate(leaf_heights, axis=1),
+        'levels': levels
+    }
+    uniform_cells = len(x_coords) * len(y_coords) * 4 ** (len(levels) - 1)
+    print(f"Adaptives Raster: {len(adaptive_raster['size'])} Blattzellen auf {len(levels)} Ebenen "
+          f"(gleichmäßiges Raster mit {size * 2:g} m: {uniform_cells} Zellen), Blätter je Ebene: {levels}")
+    return adaptive_raster
+
+
+# --- Parallele, gekachelte Interpolation mit Shared Memory --- #
+# Zustand eines Worker-Prozesses (wird einmal pro Prozess im Initializer gesetzt)
+_worker_state = {}
+
+
+def create_shared_arrays(arrays):
+    """
+    Kopiert NumPy-Arrays einmalig in Shared-Memory-Blöcke, damit Worker-Prozesse ohne Pickling darauf zugreifen.
+
+    :param arrays: Dictionary Name -> NumPy-Array
+    :return: Liste der SharedMemory-Objekte (zum Freigeben) und Dictionary Name -> (Blockname, Form, dtype)
+    """
+    handles = []
+    descriptors = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        handles.append(shm)
+        descriptors[name] = (shm.name, array.shape, array.dtype.str)
+    return handles, descriptors
+def attach_shared_arrays(descriptors):
+    """
+    Verbindet sich mit den Shared-Memory-Blöcken aus create_shared_arrays (ohne Kopie).
+
+    :param descriptors: Dictionary Name -> (Blockname, Form, dtype)
+    :return: Liste der SharedMemory-Objekte und Dictionary Name -> NumPy-Array (Sicht auf den Block)
+    """
+    handles = []
+    arrays = {}
+    for name, (shm_name, shape, dtype) in descriptors.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        handles.append(shm)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return handles, arrays
+def release_shared_arrays(handles, unlink=False):
+    """Schließt die Shared-Memory-Blöcke und gibt sie optional frei (nur im erzeugenden Prozess)."""
+    for shm in handles:
+        shm.close()
+        if unlink:
+            shm.unlink()
+def split_raster_into_tiles(grid_shape, tile_size):
+    """
+    Teilt das Raster von create_raster in quadratische Kacheln auf.
+
+    :param grid_shape: Form des Rasters (ny, nx)
+    :param tile_size: Kantenlänge einer Kachel in Zellen
+    :return: Liste von Tupeln (Kachelnummer, iy0, iy1, ix0, ix1)
+    """
+    ny, nx = grid_shape
+    tiles = []
+    for iy0 in range(0, ny, tile_size):
+        for ix0 in range(0, nx, tile_size):
+            tiles.append((len(tiles), iy0, min(iy0 + tile_size, ny), ix0, min(ix0 + tile_size, nx)))
+    return tiles
+def init_interpolation_worker(descriptors, setup):
+    """Initializer der Worker-Prozesse: verbindet die Shared-Memory-Arrays einmal pro Prozess."""
+    handles, arrays = attach_shared_arrays(descriptors)
+    _worker_state['handles'] = handles
+    _worker_state['arrays'] = arrays
+    _worker_state['setup'] = setup
+def interpolate_tile(tile):
+    """
+    Interpoliert die Höhen aller Zustände für eine Kachel im Worker-Prozess und schreibt sie in das
+    gemeinsame Ergebnis-Array.
+
+    :param tile: Tupel (Kachelnummer, iy0, iy1, ix0, ix1) aus split_raster_into_tiles
+    :return: Dictionary mit Kachelnummer, Punktanzahl und Laufzeit
+    """
+    start_time = time.perf_counter()
+    tile_id, iy0, iy1, ix0, ix1 = tile
+    arrays = _worker_state['arrays']
+    setup = _worker_state['setup']
+
+    point_idx = (np.arange(iy0, iy1)[:, None] * setup['nx'] + np.arange(ix0, ix1)).ravel()
+    points = arrays['raster_points'][point_idx]
+
+    for idx, state in enumerate(setup['states']):
+        tri = {key: arrays[f'tri{idx}_{key}'] for key in state['tri_keys']}
+        spatial_index = dict(state['index_params'])
+        spatial_index['offsets'] = arrays[f'index{idx}_offsets']
+        spatial_index['triangle_ids'] = arrays[f'index{idx}_triangle_ids']
+        spatial_index['stats'] = {}
+        arrays['z'][idx, point_idx] = interpolate_heights_indexed(
+            points, tri, state['num_triangles'], spatial_index, setup['epsilon']
+        )
+
+    return {'tile': tile_id, 'num_points': len(point_idx), 'time': time.perf_counter() - start_time}
+def interpolate_height_for_points_parallel(raster_points, triangles_set, grid_shape, num_workers=None, tile_size=256,
+                                           epsilon=1e-6, spatial_indices=None):
+    """
+    Parallele Variante von interpolate_height_for_points: Das Raster wird in Kacheln geteilt, die von einem
+    ProcessPoolExecutor bearbeitet werden. Dreiecke, Dreiecksindizes, Rasterpunkte und Ergebnis liegen in
+    Shared Memory und werden nicht je Aufgabe gepickelt. Das Ergebnis ist identisch zum seriellen Lauf.
+
+    :param raster_points: NumPy-Array der Form (N, 2) aus create_raster
+    :param triangles_set: Liste von Dreieckssätzen
+    :param grid_shape: Form des Rasters (ny, nx), N = ny * nx
+    :param num_workers: Anzahl der Worker-Prozesse (None = Anzahl der CPU-Kerne)
+    :param tile_size: Kantenlänge einer Kachel in Zellen
+    :param epsilon: Toleranzwert für numerische Stabilität
+    :param spatial_indices: Optionale Dreiecksindizes (build_spatial_indices), sonst werden sie hier gebaut
+    :return: Pandas-DataFrame mit x, y und z-Werten für jeden Dreieckssatz
+    """
+    raster_points = np.asarray(raster_points)
+    if spatial_indices is None:
+        spatial_indices = build_spatial_indices(triangles_set, epsilon)
+    num_workers = num_workers or os.cpu_count() or 1
+
+    shared = {
+        'raster_points': raster_points.astype(np.float64),
+        'z': np.full((len(triangles_set), len(raster_points)), np.nan)
+    }
+    states = []
+    for idx, (triangles, spatial_index) in enumerate(zip(triangles_set, spatial_indices)):
+        tri = prepare_triangles(triangles)
+        for key, value in tri.items():
+            shared[f'tri{idx}_{key}'] = value
+        shared[f'index{idx}_offsets'] = spatial_index['offsets']
+        shared[f'index{idx}_triangle_ids'] = spatial_index['triangle_ids']
+        states.append({
+            'tri_keys': list(tri.keys()),
+            'num_triangles': mesh_num_triangles(triangles),
+            'index_params': {key: spatial_index[key] for key in ('origin_x', 'origin_y', 'bucket_size', 'nx', 'ny')}
+        })
+    setup = {'nx': grid_shape[1], 'epsilon': epsilon, 'states': states}
+    tiles = split_raster_into_tiles(grid_shape, tile_size)
+
+    handles, descriptors = create_shared_arrays(shared)
+    del shared
+    z_handles, z_view = attach_shared_arrays({'z': descriptors['z']})
+    try:
+        start_time = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=num_workers, initializer=init_interpolation_worker,
+                                 initargs=(descriptors, setup)) as executor:
+            futures = [executor.submit(interpolate_tile, tile) for tile in tiles]
+            for future in as_completed(futures):
+                result = future.result()
+                print(f"Kachel {result['tile'] + 1}/{len(tiles)}: {result['num_points']} Punkte in "
+                      f"{result['time']:.3f} s ({result['num_points'] / max(result['time'], 1e-12):.0f} Punkte/s)")
+        total_time = time.perf_counter() - start_time
+        print(f"Parallele Interpolation mit {num_workers} Prozessen: {len(raster_points)} Punkte in {total_time:.3f} s")
+
+        point_data = {'x': raster_points[:, 0], 'y': raster_points[:, 1]}
+        for idx in range(len(triangles_set)):
+            point_data[f'z{idx}'] = z_view['z'][idx].copy()
+    finally:
+        del z_view
+        release_shared_arrays(z_handles)
+        release_shared_arrays(handles, unlink=True)
+    return pd.DataFrame(point_data)
+def interpolate_height_for_points_loop(raster_points, triangles_set, epsilon=1e-6):
     """
     Prüft für eine Liste von Punkten (x, y), ob diese in einem der Dreiecke eines jeden Dreieckssatzes liegt,
     und berechnet dann die Höhen (z0, z1, ...) mittels baryzentrischer Interpolation.
+    Referenzimplementierung mit Python-Schleifen, wird nur noch für Vergleiche (bodenaushub_benchmark.py) genutzt.
 
     :param raster_points: Liste von Tupeln (x, y) für die Interpolation
     :param triangles_set: Liste von Dreieckssätzen (jeder Dreieckssatz ist eine Liste von Dreiecken)
@@ -95,7 +978,7 @@ def interpolate_height_for_points(raster_points, triangles_set, epsilon=1e-6):
         point_entry = {'x': p[0], 'y': p[1]}
         for idx, triangles in enumerate(triangles_set):
             z = None
-            for triangle in triangles:
+            for triangle in mesh_triangles(triangles):
                 a, b, c = triangle
                 ab = (b[0] - a[0], b[1] - a[1])
                 ac = (c[0] - a[0], c[1] - a[1])
@@ -120,18 +1003,94 @@ def interpolate_height_for_points(raster_points, triangles_set, epsilon=1e-6):
             point_entry[f'z{idx}'] = z
         point_data.append(point_entry)
     return pd.DataFrame(point_data)
-def calculate_discrete_volume_difference(point_df, cell_size):
+# --- Spaltenorientiertes Punktraster --- #
+# Kennzahlen der Spalte 'status' (int8) statt der Texte 'excess', 'deficit' und 'neutral'
+STATUS_DEFICIT = -1
+STATUS_NEUTRAL = 0
+STATUS_EXCESS = 1
+STATUS_LABELS = {STATUS_DEFICIT: 'deficit', STATUS_NEUTRAL: 'neutral', STATUS_EXCESS: 'excess'}
+
+
+def create_point_grid(raster_points, num_states, dtype=np.float64):
+    """
+    Legt das Punktraster als Dictionary zusammenhängender, vorbelegter NumPy-Spalten an: x, y, z0, z1, ...
+    und volumen_diff (NaN ohne Abdeckung) sowie status (int8, siehe STATUS_LABELS).
+    Die Spaltennamen entsprechen denen des DataFrames, der nur bei Bedarf erzeugt wird (point_grid_to_df).
+
+    :param raster_points: NumPy-Array der Form (N, 2) mit den Punkten (x, y)
+    :param num_states: Anzahl der Zustände
+    :param dtype: Datentyp der Höhen- und Volumenspalten (np.float64 oder np.float32)
+    :return: Punktraster
+    """
+    raster_points = np.asarray(raster_points)
+    num_points = len(raster_points)
+    point_grid = {
+        'x': np.ascontiguousarray(raster_points[:, 0], dtype=np.float64),
+        'y': np.ascontiguousarray(raster_points[:, 1], dtype=np.float64)
+    }
+    for idx in range(num_states):
+        point_grid[f'z{idx}'] = np.full(num_points, np.nan, dtype=dtype)
+    point_grid['volumen_diff'] = np.full(num_points, np.nan, dtype=dtype)
+    point_grid['status'] = np.zeros(num_points, dtype=np.int8)
+    return point_grid
+def point_grid_num_states(point_grid):
+    """Gibt die Anzahl der Höhenspalten z0, z1, ... eines Punktrasters (oder DataFrames) zurück."""
+    return sum(1 for column in point_grid.keys() if column[0] == 'z' and column[1:].isdigit())
+def point_grid_to_df(point_grid, columns=None, status_labels=True):
+    """
+    Erzeugt bei Bedarf (Export, Visualisierung) einen DataFrame aus dem Punktraster.
+
+    :param point_grid: Punktraster aus create_point_grid
+    :param columns: Auszugebende Spalten (Standard: alle)
+    :param status_labels: Status als Text ('excess', 'deficit', 'neutral') statt als int8-Kennzahl ausgeben
+    :return: Pandas-DataFrame
+    """
+    columns = list(point_grid.keys()) if columns is None else columns
+    point_data = {}
+    for column in columns:
+        if column == 'status' and status_labels:
+            labels = np.array([STATUS_LABELS[STATUS_DEFICIT], STATUS_LABELS[STATUS_NEUTRAL], STATUS_LABELS[STATUS_EXCESS]])
+            point_data[column] = labels[point_grid[column] + 1]
+        else:
+            point_data[column] = point_grid[column]
+    return pd.DataFrame(point_data)
+def calculate_volume_difference_grid(point_grid, cell_size, state_from=0, state_to=1):
+    """
+    Berechnet die Volumendifferenz je Zelle zwischen zwei Zuständen in die vorbelegten Spalten
+    'volumen_diff' und 'status' des Punktrasters (ohne temporäre Spalten). Enthält das Raster die Spalte
+    'cell_area', wird die Höhendifferenz mit dieser Fläche statt mit cell_size² multipliziert.
+
+    :param point_grid: Punktraster aus create_point_grid (wird verändert)
+    :param cell_size: Größe der Zelle
+    :param state_from: Nummer des Ausgangszustands
+    :param state_to: Nummer des Zielzustands
+    :return: Das gleiche Punktraster
+    """
+    volumen_diff = point_grid['volumen_diff']
+    status = point_grid['status']
+    np.subtract(point_grid[f'z{state_to}'], point_grid[f'z{state_from}'], out=volumen_diff, casting='unsafe')
+    volumen_diff *= point_grid['cell_area'] if 'cell_area' in point_grid else cell_size ** 2
+
+    # Klassifizierung: Überschuss, Defizit oder neutral (auch ohne Abdeckung, NaN)
+    status.fill(STATUS_NEUTRAL)
+    status[volumen_diff > 0] = STATUS_EXCESS
+    status[volumen_diff < 0] = STATUS_DEFICIT
+    return point_grid
+def calculate_discrete_volume_difference(point_df, cell_size, state_from=0, state_to=1):
     """
     Berechnet die Volumendifferenz zwischen zwei Höhenmodellen anhand der interpolierten Höhenwerte in point_df.
     Fügt eine Spalte hinzu, die angibt, ob der Punkt ein Überschuss oder ein Defizit ist.
 
-    :param point_df: Pandas DataFrame mit x, y, z0, z1 (interpolierte Höhen)
+    :param point_df: Pandas DataFrame mit x, y, z0, z1, ... (interpolierte Höhen)
     :param cell_size: Größe der Zelle (Standard: 1.0)
+    :param state_from: Nummer des Ausgangszustands
+    :param state_to: Nummer des Zielzustands
     :return: Das gleiche DataFrame mit zusätzlichen Spalten 'volumen_diff' und 'status'
     """
-    if 'z0' in point_df.columns and 'z1' in point_df.columns:
+    z_from, z_to = f'z{state_from}', f'z{state_to}'
+    if z_from in point_df.columns and z_to in point_df.columns:
         # Berechnung der Volumendifferenz
-        point_df['volumen_diff'] = (point_df['z1'] - point_df['z0']) * (cell_size ** 2)
+        point_df['volumen_diff'] = (point_df[z_to] - point_df[z_from]) * (cell_size ** 2)
 
         # Klassifizierung des Punkts als Überschuss, Defizit oder neutral
         point_df['status'] = np.where(
@@ -139,21 +1098,190 @@ def calculate_discrete_volume_difference(point_df, cell_size):
             np.where(point_df['volumen_diff'] < 0, 'deficit', 'neutral')
         )
     else:
-        print("Fehlende z0 oder z1 Spalte in DataFrame")
+        print(f"Fehlende {z_from} oder {z_to} Spalte in DataFrame")
     return point_df
+def calculate_phase_volume_differences(point_df, cell_size):
+    """
+    Berechnet für jede Bauphase (Zustand k -> k + 1) die Volumendifferenz je Zelle als Spalte
+    'volumen_diff_k_k+1' sowie die Summen der Überschüsse und Defizite der Phase.
+
+    :param point_df: Punktraster (create_point_grid) oder Pandas DataFrame mit x, y, z0, z1, ...
+    :param cell_size: Größe der Zelle
+    :return: Das gleiche Punktraster bzw. DataFrame mit den zusätzlichen Spalten und Liste der Phasensummen
+             (Dictionary mit 'state_from', 'state_to', 'excess', 'deficit', 'difference')
+    """
+    num_states = point_grid_num_states(point_df)
+    phase_volumes = []
+    for state in range(num_states - 1):
+        column = f'volumen_diff_{state}_{state + 1}'
+        cell_area = point_df['cell_area'] if 'cell_area' in point_df.keys() else cell_size ** 2
+        point_df[column] = (point_df[f'z{state + 1}'] - point_df[f'z{state}']) * cell_area
+        excess = float(point_df[column][point_df[column] > 0].sum())
+        deficit = -float(point_df[column][point_df[column] < 0].sum())
+        phase_volumes.append({
+            'state_from': state,
+            'state_to': state + 1,
+            'excess': excess,
+            'deficit': deficit,
+            'difference': excess - deficit
+        })
+        print(f"Phase {state} -> {state + 1}: Überschuss {excess:.2f} m³, Defizit {deficit:.2f} m³, "
+              f"Differenz {excess - deficit:.2f} m³")
+    return point_df, phase_volumes
+
+# --- Auflösungspyramide (grob nach fein) --- #
+def compute_volume_pyramid(triangles_set, bounding_box, cell_sizes, spatial_indices=None, on_level=None, epsilon=1e-6):
+    """
+    Berechnet die Volumensummen (Überschüsse/Defizite zwischen erstem und letztem Zustand) auf einer Folge von
+    Rastern abnehmender Zellgröße (z. B. 8, 4, 2, 1 m). Jede Stufe übernimmt die gefundenen Dreiecke der
+    vorherigen Stufe als Vermutung (interpolate_heights_hinted), sodass nur Punkte, die nicht mehr im Dreieck
+    ihrer übergeordneten Zelle liegen, über den Dreiecksindex gesucht werden. Die Summen jeder Stufe werden
+    sofort über on_level veröffentlicht; gibt on_level True zurück, endet die Berechnung nach dieser Stufe.
+
+    :param triangles_set: Liste von Dreieckssätzen (Zustand 0, 1, ...)
+    :param bounding_box: Dictionary mit min_x, max_x, min_y, max_y
+    :param cell_sizes: Zellgrößen der Stufen [m], von grob nach fein
+    :param spatial_indices: Optionale Liste von Dreiecksindizes (build_spatial_indices)
+    :param on_level: Optionale Funktion on_level(level), die nach jeder Stufe aufgerufen wird
+    :param epsilon: Toleranzwert für numerische Stabilität
+    :return: Liste der Stufen (Dictionary mit 'cell_size', 'num_cells', 'total_excess', 'total_deficit',
+             'total_difference', 'relative_change', 'hint_rate', 'time', 'elapsed', 'stopped' und den
+             Dreiecksnummern je Zustand unter 'triangle_ids')
+    """
+    if spatial_indices is None:
+        spatial_indices = build_spatial_indices(triangles_set, epsilon)
+    num_states = len(triangles_set)
+    levels = []
+    start_time = time.perf_counter()
+    for cell_size in cell_sizes:
+        level_start = time.perf_counter()
+        x_coords, y_coords = create_raster_axes(bounding_box, cell_size)
+        raster_points = create_raster(bounding_box, cell_size)
+        point_grid = create_point_grid(raster_points, num_states)
+
+        triangle_ids = []
+        hint_rates = []
+        for idx, triangles in enumerate(triangles_set):
+            if levels:
+                hint_ids = triangle_hints_for_points(levels[-1], idx, raster_points)
+            else:
+                hint_ids = np.full(len(raster_points), -1, dtype=np.int64)
+            point_grid[f'z{idx}'][:], found, hint_rate = interpolate_heights_hinted(
+                raster_points, triangles, hint_ids, spatial_indices[idx], epsilon
+            )
+            triangle_ids.append(found.reshape(len(y_coords), len(x_coords)))
+            hint_rates.append(hint_rate)
+
+        calculate_volume_difference_grid(point_grid, cell_size, state_from=0, state_to=num_states - 1)
+        volumen_diff = point_grid['volumen_diff']
+        total_excess = float(volumen_diff[volumen_diff > 0].sum())
+        total_deficit = float(-volumen_diff[volumen_diff < 0].sum())
+        if levels:
+            # Größere der relativen Änderungen von Überschüssen und Defiziten gegenüber der vorherigen Stufe
+            relative_change = max(
+                abs(total - levels[-1][key]) / max(total, levels[-1][key], 1e-12)
+                for key, total in (('total_excess', total_excess), ('total_deficit', total_deficit))
+            )
+        else:
+            relative_change = None
+
+        level = {
+            'cell_size': cell_size,
+            'bounding_box': bounding_box,
+            'num_cells': len(raster_points),
+            'total_excess': total_excess,
+            'total_deficit': total_deficit,
+            'total_difference': total_excess - total_deficit,
+            'relative_change': relative_change,
+            'hint_rate': float(np.mean(hint_rates)) if levels else 0.0,
+            'time': time.perf_counter() - level_start,
+            'elapsed': time.perf_counter() - start_time,
+            'stopped': False,
+            'triangle_ids': triangle_ids
+        }
+        levels.append(level)
+        change_text = f", Änderung {relative_change:.2%}" if relative_change is not None else ""
+        print(f"Stufe {cell_size:g} m: {level['num_cells']} Zellen, Überschüsse {total_excess:.2f} m³, "
+              f"Defizite {total_deficit:.2f} m³{change_text}, {level['hint_rate']:.0%} Dreiecke aus der "
+              f"Vorstufe übernommen, {level['time']:.3f} s")
+        if on_level is not None and on_level(level):
+            level['stopped'] = True
+            print(f"Pyramide nach Stufe {cell_size:g} m beendet")
+            break
+    return levels
+def run_convergence_study(triangles_set, bounding_box, start_cell_size, tolerance=0.01, min_cell_size=None,
+                          spatial_indices=None, on_level=None, epsilon=1e-6):
+    """
+    Bestimmt die Zellgröße über eine Konvergenzstudie: Ausgehend von start_cell_size wird die Zellgröße so lange
+    halbiert (compute_volume_pyramid, jede Stufe übernimmt die Dreiecke der vorherigen), bis sich Überschüsse und
+    Defizite relativ um weniger als tolerance ändern. Gewählt wird die gröbere Zellgröße des konvergierten Paares,
+    d. h. das günstigste Raster, dessen Summen sich bei weiterer Verfeinerung nicht mehr wesentlich ändern.
+    Wird min_cell_size ohne Konvergenz erreicht, wird die feinste Stufe gewählt.
+
+    :param triangles_set: Liste von Dreieckssätzen (Zustand 0, 1, ...)
+    :param bounding_box: Dictionary mit min_x, max_x, min_y, max_y
+    :param start_cell_size: Gröbste Zellgröße [m]
+    :param tolerance: Relative Änderung der Volumensummen, unterhalb derer die Studie endet
+    :param min_cell_size: Kleinste zu prüfende Zellgröße [m] (None = start_cell_size / 64)
+    :param spatial_indices: Optionale Liste von Dreiecksindizes (build_spatial_indices)
+    :param on_level: Optionale Funktion on_level(level), die nach jeder Stufe aufgerufen wird (True = abbrechen)
+    :param epsilon: Toleranzwert für numerische Stabilität
+    :return: Dictionary mit 'cell_size' (gewählt), 'converged', 'level' (gewählte Stufe), 'levels' und
+             'timing' (Zellgröße, Zellanzahl, Rechenzeit und kumulierte Zeit je Stufe)
+    """
+    if min_cell_size is None:
+        min_cell_size = start_cell_size / 64
+    cell_sizes = [start_cell_size]
+    while cell_sizes[-1] / 2 >= min_cell_size * (1 - 1e-9):
+        cell_sizes.append(cell_sizes[-1] / 2)
+
+    def check_level(level):
+        stop = on_level is not None and on_level(level)
+        return stop or (level['relative_change'] is not None and level['relative_change'] < tolerance)
+
+    levels = compute_volume_pyramid(triangles_set, bounding_box, cell_sizes, spatial_indices, check_level, epsilon)
+    converged = len(levels) > 1 and levels[-1]['relative_change'] < tolerance
+    chosen = levels[-2] if converged else levels[-1]
+    timing = [
+        {key: level[key] for key in ('cell_size', 'num_cells', 'time', 'elapsed', 'relative_change')}
+        for level in levels
+    ]
+
+    print("Konvergenzstudie (Zellgröße, Zellen, Rechenzeit, kumuliert, Änderung):")
+    for entry in timing:
+        change_text = f"{entry['relative_change']:.2%}" if entry['relative_change'] is not None else "-"
+        print(f"  {entry['cell_size']:8.4g} m {entry['num_cells']:10d} {entry['time']:8.3f} s "
+              f"{entry['elapsed']:8.3f} s {change_text:>8}")
+    if converged:
+        print(f"Gewählte Zellgröße: {chosen['cell_size']:g} m (Änderung zur nächsten Stufe "
+              f"{levels[-1]['relative_change']:.2%} < {tolerance:.2%})")
+    else:
+        print(f"Keine Konvergenz bis {chosen['cell_size']:g} m, die feinste Stufe wird verwendet")
+    return {'cell_size': chosen['cell_size'], 'converged': converged, 'level': chosen, 'levels': levels,
+            'timing': timing}
 
 # --- Funktionen zum Lösen des Transportproblems --- #
-def calculate_distance_matrix(point_df):
+# Lösungsverfahren, die statt der Distanzmatrix nur die Koordinaten der Punkte benötigen
+COORDINATE_TRANSPORT_SOLVERS = ('column_generation', 'multiscale', 'sinkhorn')
+def calculate_distance_matrix(point_df, dense=True):
     """
     Berechnet die Distanzmatrix zwischen Punkten mit Überschuss und Punkten mit Defizit.
 
-    :param point_df: Pandas DataFrame mit Spalten 'x', 'y', 'volumen_diff', 'status'
+    :param point_df: Punktraster (create_point_grid) oder Pandas DataFrame mit Spalten 'x', 'y', 'volumen_diff', 'status'
+    :param dense: Vollständige Distanzmatrix berechnen (False = nur Punkte trennen, Matrix None)
     :return: Distanzmatrix als 2D-NumPy-Array, Überschusspunkte, Defizitpunkte
     """
     # Extrahieren der Überschuss- und Defizitpunkte
-    excess_df = point_df[point_df['status'] == 'excess'][['x', 'y', 'volumen_diff']]
-    deficit_df = point_df[point_df['status'] == 'deficit'][['x', 'y', 'volumen_diff']]
+    if isinstance(point_df, dict):
+        columns = ['x', 'y', 'volumen_diff']
+        excess_df = point_grid_to_df({key: point_df[key][point_df['status'] == STATUS_EXCESS] for key in columns})
+        deficit_df = point_grid_to_df({key: point_df[key][point_df['status'] == STATUS_DEFICIT] for key in columns})
+    else:
+        excess_df = point_df[point_df['status'] == 'excess'][['x', 'y', 'volumen_diff']]
+        deficit_df = point_df[point_df['status'] == 'deficit'][['x', 'y', 'volumen_diff']]
 
+    if not dense:
+        return None, excess_df, deficit_df
     excess_points = excess_df[['x', 'y']].values
     deficit_points = deficit_df[['x', 'y']].values
 
@@ -163,9 +1291,31 @@ def calculate_distance_matrix(point_df):
     return distance_matrix, excess_df, deficit_df
 
 
-def solve_unbalanced_transport_problem(excess_points_df, deficit_points_df, distance_matrix, depot_distance):
-    import pulp
-    import numpy as np
+def solve_unbalanced_transport_problem(excess_points_df, deficit_points_df, distance_matrix, depot_distance,
+                                       solver='pulp'):
+    """
+    Löst das Transportproblem zwischen Überschuss- und Defizitpunkten; die Differenz zwischen Angebot und
+    Nachfrage wird zur bzw. von der Deponie transportiert.
+
+    :param excess_points_df: Überschusspunkte (x, y, volumen_diff)
+    :param deficit_points_df: Defizitpunkte (x, y, volumen_diff, negativ)
+    :param distance_matrix: Distanzmatrix Überschuss x Defizit [m] (bei COORDINATE_TRANSPORT_SOLVERS nicht benötigt)
+    :param depot_distance: Distanz zur Deponie [m]
+    :param solver: 'pulp' (LP-Modell mit CBC), 'network_simplex' (solve_transport_network_simplex), 'highs'
+                   (LP in Matrixform mit HiGHS im selben Prozess, solve_transport_highs) oder
+                   'column_generation' (nächste Nachbarn und Spaltengenerierung ohne Distanzmatrix,
+                   solve_transport_column_generation), 'multiscale' (vergröbern, lösen, verfeinern,
+                   solve_transport_multiscale) oder 'sinkhorn' (schnelle Näherung mit Schranken für das
+                   Optimum, solve_transport_sinkhorn); bei den drei letzten ist der Transportplan eine dünne Matrix
+    :return: Transportplan, Depot-Transport, Angebot, Nachfrage, Differenz, Depotkosten, interne Kosten,
+             Gesamtkosten und das PuLP-Problem bzw. das Ergebnis-Dictionary des Lösers (mit Dualen)
+    """
+    if solver in ('network_simplex', 'highs') + COORDINATE_TRANSPORT_SOLVERS:
+        return solve_unbalanced_transport_arrays(
+            excess_points_df, deficit_points_df, distance_matrix, depot_distance, solver
+        )
+    if solver != 'pulp':
+        raise ValueError(f"Unbekanntes Lösungsverfahren für das Transportproblem: {solver}")
 
     # Berechnung der Summen für Angebot und Nachfrage
     total_supply = excess_points_df['volumen_diff'].sum()
@@ -199,21 +1349,17 @@ def solve_unbalanced_transport_problem(excess_points_df, deficit_points_df, dist
     prob += depot_transport_abs >= depot_transport, "Depot_Transport_Abs_Pos"
     prob += depot_transport_abs >= -depot_transport, "Depot_Transport_Abs_Neg"
 
-    # Angebotsbeschränkungen (Gleichungen)
+    # Angebots- und Nachfragebeschränkungen; die größere Seite als Ungleichung, ihr Rest geht zur bzw. kommt
+    # von der Deponie (mit zwei Gleichungsseiten wäre das Problem bei Differenz ungleich 0 unlösbar)
     for i in range(num_excess):
-        prob += (
-            pulp.lpSum([transport_vars[i, j] for j in range(num_deficit)])
-            == excess_points_df.iloc[i]['volumen_diff'],
-            f"Supply_Constraint_{i}"
-        )
+        outflow = pulp.lpSum([transport_vars[i, j] for j in range(num_deficit)])
+        supply = excess_points_df.iloc[i]['volumen_diff']
+        prob += (outflow <= supply if total_difference > 0 else outflow == supply), f"Supply_Constraint_{i}"
 
-    # Nachfragebeschränkungen (Gleichungen)
     for j in range(num_deficit):
-        prob += (
-            pulp.lpSum([transport_vars[i, j] for i in range(num_excess)])
-            == -deficit_points_df.iloc[j]['volumen_diff'],
-            f"Demand_Constraint_{j}"
-        )
+        inflow = pulp.lpSum([transport_vars[i, j] for i in range(num_excess)])
+        demand = -deficit_points_df.iloc[j]['volumen_diff']
+        prob += (inflow <= demand if total_difference < 0 else inflow == demand), f"Demand_Constraint_{j}"
 
     # Gesamtbilanzbedingung
     prob += (
@@ -243,6 +1389,58 @@ def solve_unbalanced_transport_problem(excess_points_df, deficit_points_df, dist
     print(f"Berechnete interne Transportkosten: {internal_costs:.2f}")
 
     return transport_plan, depot_transport_value, total_supply, total_demand, total_difference, depot_costs, internal_costs, total_costs, prob
+def solve_unbalanced_transport_arrays(excess_points_df, deficit_points_df, distance_matrix, depot_distance,
+                                      solver='network_simplex'):
+    """
+    Löst das Transportproblem mit einem Löser aus modules/transport_solvers.py, der direkt auf den Arrays arbeitet
+    (Netzwerk-Simplex, HiGHS, Spaltengenerierung, Mehrskalenverfahren oder Sinkhorn-Näherung). Rückgabe wie
+    solve_unbalanced_transport_problem, an Stelle des PuLP-Problems steht das Ergebnis-Dictionary des Lösers
+    (u. a. Schattenpreise 'supply_duals'/'demand_duals', Laufzeit).
+    """
+    supply = excess_points_df['volumen_diff'].to_numpy(dtype=np.float64)
+    demand = -deficit_points_df['volumen_diff'].to_numpy(dtype=np.float64)
+    total_supply = supply.sum()
+    total_demand = demand.sum()
+    total_difference = total_supply - total_demand
+
+    if solver == 'highs':
+        result = solve_transport_highs(supply, demand, distance_matrix, depot_distance)
+    elif solver in COORDINATE_TRANSPORT_SOLVERS:
+        excess_xy = excess_points_df[['x', 'y']].to_numpy(dtype=np.float64)
+        deficit_xy = deficit_points_df[['x', 'y']].to_numpy(dtype=np.float64)
+        if solver == 'sinkhorn':
+            result = solve_transport_sinkhorn(supply, demand, excess_xy, deficit_xy)
+            print(f"Sinkhorn-Näherung (ε = {result['epsilon']:.3g} m): interne Kosten zwischen "
+                  f"{result['lower_bound']:.2f} und {result['upper_bound']:.2f} (Lücke {result['gap']:.2%})")
+        else:
+            if solver == 'multiscale':
+                result = solve_transport_multiscale(supply, demand, excess_xy, deficit_xy)
+                print("Mehrskalenverfahren:")
+                print(f"{'Ebene':>5} {'Block [m]':>9} {'Überschuss':>10} {'Defizit':>8} {'Kanten':>9} {'LPs':>4} "
+                      f"{'Kosten':>14} {'Lücke':>9} {'Zeit':>9}")
+                for level in result['levels']:
+                    print(f"{level['level']:5d} {level['block_size']:9.2f} {level['num_excess']:10d} "
+                          f"{level['num_deficit']:8d} {level['num_arcs']:9d} {level['rounds']:4d} "
+                          f"{level['objective']:14.2f} {level['gap']:9.2e} {level['time']:8.3f} s")
+            else:
+                result = solve_transport_column_generation(supply, demand, excess_xy, deficit_xy)
+            print(f"Spaltengenerierung: {result['num_arcs']} von {len(supply) * len(demand)} Kanten, "
+                  f"{result['rounds']} LPs, Optimalitätslücke {result['gap']:.2e}")
+    else:
+        result = solve_transport_network_simplex(supply, demand, distance_matrix)
+    transport_plan = result['flows']
+    depot_transport_value = result['depot_transport']
+    depot_costs = depot_distance * abs(depot_transport_value)
+    internal_costs = result['objective']
+    total_costs = internal_costs + depot_costs
+
+    print(f"Transportproblem ({solver}): {result['iterations']} Iterationen, {result['time']:.3f} s")
+    print(f"Gesamtkosten der Zielfunktion: {total_costs:.2f}")
+    print(f"Depot-Transport (positiv zur Deponie, negativ von der Deponie): {depot_transport_value:.2f}")
+    print(f"Kosten für Transport zur/von der Deponie: {depot_costs:.2f}")
+    print(f"Berechnete interne Transportkosten: {internal_costs:.2f}")
+
+    return transport_plan, depot_transport_value, total_supply, total_demand, total_difference, depot_costs, internal_costs, total_costs, result
 
 
 
@@ -281,22 +1479,26 @@ def visualize_interpolated_points(point_df):
     return fig
 def visualize_meshes_and_raster_points(triangles_set, raster_points):
     """
-    Visualisiert zwei Meshes nebeneinander, jedes mit denselben Rasterpunkten.
+    Visualisiert alle Meshes nebeneinander, jedes mit denselben Rasterpunkten.
 
-    :param triangles_set: Liste von zwei Meshes, wobei jedes Mesh eine Liste von Dreiecken ist.
+    :param triangles_set: Liste von Meshes (Dreiecksarrays oder indizierte Netze).
     :param raster_points: NumPy-Array von Rasterpunkten (x, y).
     """
 
-    fig, axes = plt.subplots(1, 2, figsize=(12, 6))
+    fig, axes = plt.subplots(1, len(triangles_set), figsize=(6 * len(triangles_set), 6), squeeze=False)
 
     for idx, triangles in enumerate(triangles_set):
-        ax = axes[idx]
+        ax = axes[0, idx]
 
         # Zeichne die Dreiecke des aktuellen Meshes
-        for triangle in triangles:
-            a, b, c = triangle
-            polygon = Polygon([a[:2], b[:2], c[:2]], closed=True, fill=None, edgecolor='r', linewidth=1)
-            ax.add_patch(polygon)
+        if is_indexed_mesh(triangles):
+            vertices = triangles['vertices']
+            ax.triplot(vertices[:, 0], vertices[:, 1], triangles['faces'], color='r', linewidth=1)
+        else:
+            for triangle in triangles:
+                a, b, c = triangle
+                polygon = Polygon([a[:2], b[:2], c[:2]], closed=True, fill=None, edgecolor='r', linewidth=1)
+                ax.add_patch(polygon)
 
         # Zeichne die Rasterpunkte
         ax.scatter(raster_points[:, 0], raster_points[:, 1], color='green', s=5)
@@ -490,7 +1692,7 @@ def export_transport_plan_to_csv(transport_plan, excess_points_df, deficit_point
     """
     Exportiert den Transportplan als CSV-Datei, inklusive Transport zur/von der Deponie.
 
-    :param transport_plan: NumPy-Array mit den Transportmengen von Überschusspunkten zu Defizitpunkten.
+    :param transport_plan: NumPy-Array (oder dünne Matrix) mit den Transportmengen von Überschusspunkten zu Defizitpunkten.
     :param excess_points_df: DataFrame mit den Überschusspunkten (x, y, volumen_diff).
     :param deficit_points_df: DataFrame mit den Defizitpunkten (x, y, volumen_diff).
     :param depot_transport_value: Gesamtmenge, die zur/von der Deponie transportiert wird.
@@ -499,24 +1701,22 @@ def export_transport_plan_to_csv(transport_plan, excess_points_df, deficit_point
     :param filename: Name der Ausgabedatei.
     """
     data = []
-    num_excess, num_deficit = transport_plan.shape
-    for i in range(num_excess):
-        for j in range(num_deficit):
-            amount = transport_plan[i, j]
-            if amount > 0:
-                source = excess_points_df.iloc[i]
-                destination = deficit_points_df.iloc[j]
-                data.append({
-                    'source_x': source['x'],
-                    'source_y': source['y'],
-                    'source_volumen_diff': source['volumen_diff'],
-                    'destination_x': destination['x'],
-                    'destination_y': destination['y'],
-                    'destination_volumen_diff': destination['volumen_diff'],
-                    'amount': amount,
-                    'to_depot': 0,
-                    'from_depot': 0
-                })
+    for i, j in zip(*transport_plan.nonzero()):
+        amount = transport_plan[i, j]
+        if amount > 0:
+            source = excess_points_df.iloc[i]
+            destination = deficit_points_df.iloc[j]
+            data.append({
+                'source_x': source['x'],
+                'source_y': source['y'],
+                'source_volumen_diff': source['volumen_diff'],
+                'destination_x': destination['x'],
+                'destination_y': destination['y'],
+                'destination_volumen_diff': destination['volumen_diff'],
+                'amount': amount,
+                'to_depot': 0,
+                'from_depot': 0
+            })
     # Hinzufügen des Transports zur/von der Deponie
     if total_difference > 0 and depot_transport_value > 0:
         # Transport zur Deponie
@@ -551,28 +1751,205 @@ def export_transport_plan_to_csv(transport_plan, excess_points_df, deficit_point
     transport_df = pd.DataFrame(data)
     transport_df.to_csv(filename, index=False)
     print(f"Transportplan wurde als '{filename}' gespeichert.")
-def perform_bodenaushub(zustand0_file, zustand1_file, depot_distance, cell_size):
-    # 1. Lade Netze
-    triangles_set = load_stl_files(zustand0_file, zustand1_file)
-
-    # 2. Berechne Bounding Box
-    bounding_box = calculate_bounding_box(triangles_set)
-
-    # 3. Erstelle das Raster
-    raster_points = create_raster(bounding_box, cell_size)
-
-    # 4. Interpoliere die Höhe der Rasterpunkte für Zustand 0 und Zustand 1
-    point_df = interpolate_height_for_points(raster_points, triangles_set)
-
-    # 5. Berechne die diskreten Volumendifferenzen und klassifiziere Überschuss- und Defizitpunkte
-    point_df = calculate_discrete_volume_difference(point_df, cell_size)
-
-    # 6. Berechne die Distanzmatrix
-    distance_matrix, excess_points, deficit_points = calculate_distance_matrix(point_df)
+# --- Stufen der Bodenaushub-Berechnung (memoisiert über modules/pipeline.py) --- #
+def make_stage_load_state(idx):
+    """Erzeugt die Stufe, die das Netz von Zustand idx lädt (und Dreiecksindex und Cache-Schlüssel aus dem Netz-Cache)."""
+    def stage_load_state(params, data, options):
+        file_path = params[f'zustand{idx}_file']
+        mesh_key = None
+        spatial_index = None
+        if params['use_cache'] and cache_enabled():
+            terrain_mesh, mesh_key = load_mesh_cached(file_path, params['indexed_mesh'])
+            spatial_index = load_spatial_index_cached(terrain_mesh, mesh_key)
+        else:
+            terrain_mesh = read_terrain_file(file_path)
+            if params['indexed_mesh'] and not is_indexed_mesh(terrain_mesh):
+                terrain_mesh = weld_vertices(terrain_mesh)
+        print(f"Zustand {idx}: {file_path}, Anzahl Dreiecke: {mesh_num_triangles(terrain_mesh)}")
+        decimation_report = None
+        if params['decimation_error']:
+            terrain_mesh, decimation_report = decimate_terrain(terrain_mesh, params['decimation_error'])
+            if decimation_report['num_triangles_after'] < decimation_report['num_triangles_before']:
+                # Eigener Cache-Schlüssel, damit zwischengespeicherte Höhenraster des Originals nicht greifen
+                spatial_index = build_triangle_grid_index(terrain_mesh)
+                if mesh_key is not None:
+                    mesh_key = f"{mesh_key}_decimated_{params['decimation_error']!r}"
+        return {f'mesh_{idx}': terrain_mesh, f'mesh_key_{idx}': mesh_key, f'spatial_index_{idx}': spatial_index,
+                f'decimation_report_{idx}': decimation_report}
+    return stage_load_state
+def stage_bounding_box(params, data, options):
+    """Stufe 2: Berechnet die überlappende Bounding Box."""
+    triangles_set = [data[f'mesh_{idx}'] for idx in range(params['num_states'])]
+    return {'triangles_set': triangles_set, 'bounding_box': calculate_bounding_box(triangles_set)}
+def stage_raster(params, data, options):
+    """Stufe 3: Erstellt das Raster und eine hashbare Rasterdefinition für die Höhenstufen."""
+    bounding_box = data['bounding_box']
+    raster_definition = tuple(float(bounding_box[key]) for key in ('min_x', 'max_x', 'min_y', 'max_y')) + (
+        float(params['cell_size']),
+    )
+    return {'raster_points': create_raster(bounding_box, params['cell_size']), 'raster_definition': raster_definition}
+def make_stage_heights(idx):
+    """
+    Erzeugt die Stufe, die die Höhen von Zustand idx auf dem Raster interpoliert. Ihr Schlüssel hängt nur vom
+    eigenen Netz und der Rasterdefinition ab: Wird nur das andere Netz ausgetauscht und bleibt das Raster
+    gleich, wird das Höhenraster wiederverwendet (im Prozess und über den Netz-Cache auch zwischen Läufen).
+    """
+    def stage_heights(params, data, options):
+        terrain_mesh = data[f'mesh_{idx}']
+        spatial_index = data[f'spatial_index_{idx}']
+        bounding_box = data['bounding_box']
+        mode = params['interpolation_mode']
+
+        def compute_heights():
+            x_coords, y_coords = create_raster_axes(bounding_box, params['cell_size'])
+            if mode == 'scanline':
+                # Dreiecksgetrieben: Zellen außerhalb des Netzes werden ohnehin nicht besucht
+                return {'z': rasterize_triangles(x_coords, y_coords, terrain_mesh)[0].ravel()}
+            if mode == 'exact':
+                # Mittlere Zellhöhe und überdeckter Flächenanteil aus der exakten Verschneidung von TIN und Raster
+                mean_heights, coverage = integrate_mean_heights(x_coords, y_coords, params['cell_size'], terrain_mesh)
+                return {'z': mean_heights.ravel(), 'coverage': coverage.ravel()}
+            if mode != 'points':
+                raise ValueError(f"Unbekannter Interpolationsmodus: {mode}")
+            if options.get('num_workers', 1) == 1:
+                raster_points = data['raster_points']
+                hint_level = options.get('triangle_hints')
+
+                def interpolate(points):
+                    if hint_level is None:
+                        return interpolate_heights(points, terrain_mesh, spatial_index=spatial_index)
+                    # Dreiecke einer gröberen Rasterstufe (Auflösungspyramide) als Vermutung verwenden
+                    hint_ids = triangle_hints_for_points(hint_level, idx, points)
+                    return interpolate_heights_hinted(points, terrain_mesh, hint_ids, spatial_index)[0]
+
+                if not params['use_footprint']:
+                    return {'z': interpolate(raster_points)}
+                # Nur Punkte innerhalb der Grundfläche des Netzes interpolieren, die übrigen bleiben NaN
+                mask = calculate_footprint_mask(terrain_mesh, x_coords, y_coords).ravel()
+                z = np.full(len(raster_points), np.nan)
+                z[mask] = interpolate(raster_points[mask])
+                print(f"Zustand {idx}: {1 - mask.mean():.1%} der Rasterpunkte außerhalb der Grundfläche übersprungen")
+                return {'z': z}
+            height_df = interpolate_height_for_points_parallel(
+                data['raster_points'], [terrain_mesh], (len(y_coords), len(x_coords)), options['num_workers'],
+                options.get('tile_size', 256), spatial_indices=[spatial_index]
+            )
+            return {'z': height_df['z0'].to_numpy()}
+
+        if mode == 'points' and spatial_index is None:
+            spatial_index = build_triangle_grid_index(terrain_mesh)
+        mesh_key = data[f'mesh_key_{idx}']
+        if mesh_key is not None:
+            heights = load_heights_cached(mesh_key, data['raster_definition'] + (mode,), compute_heights)
+        else:
+            heights = compute_heights()
+        return {f'z_{idx}': heights['z'], f'coverage_{idx}': heights.get('coverage'), f'spatial_index_{idx}': spatial_index}
+    return stage_heights
+def stage_adaptive_raster(params, data, options):
+    """
+    Stufe 3/4 im Modus 'adaptive': Erstellt das Quadtree-Raster (build_adaptive_raster) und liefert die Höhen
+    aller Zustände sowie die Fläche je Blattzelle.
+    """
+    spatial_indices = [data[f'spatial_index_{idx}'] for idx in range(params['num_states'])]
+    min_cell_size = params['min_cell_size'] or params['cell_size'] / 8
+    adaptive_raster = build_adaptive_raster(
+        data['bounding_box'], params['cell_size'], data['triangles_set'], min_cell_size,
+        params['adaptive_tolerance'], spatial_indices
+    )
+    result = {
+        'raster_points': adaptive_raster['points'],
+        'cell_area': adaptive_raster['size'] ** 2,
+        'cell_sizes': adaptive_raster['size']
+    }
+    for idx in range(params['num_states']):
+        result[f'z_{idx}'] = adaptive_raster['z'][idx]
+        result[f'coverage_{idx}'] = None
+    return result
+def stage_interpolation(params, data, options):
+    """
+    Stufe 4: Fasst die Höhen aller Zustände im spaltenorientierten Punktraster zusammen. Liegen überdeckte
+    Flächenanteile vor (interpolation_mode 'exact'), erhält das Raster die Spalte 'cell_area' mit der von
+    allen Zuständen überdeckten Fläche je Zelle.
+    """
+    point_grid = create_point_grid(data['raster_points'], params['num_states'])
+    for idx in range(params['num_states']):
+        point_grid[f'z{idx}'][:] = data[f'z_{idx}']
+    coverages = [data[f'coverage_{idx}'] for idx in range(params['num_states'])]
+    if data.get('cell_area') is not None:
+        # Adaptives Raster: Fläche je Blattzelle
+        point_grid['cell_area'] = data['cell_area']
+    elif all(coverage is not None for coverage in coverages):
+        point_grid['cell_area'] = np.minimum(np.minimum.reduce(coverages), 1.0) * params['cell_size'] ** 2
+    spatial_indices = [data[f'spatial_index_{idx}'] for idx in range(params['num_states'])]
+    return {'point_grid': point_grid, 'spatial_indices': spatial_indices}
+def stage_volume(params, data, options):
+    """
+    Stufe 5: Berechnet die diskreten Volumendifferenzen (in neue Spalten, das Interpolationsergebnis bleibt
+    unverändert). Überschuss und Defizit für den Transport beziehen sich auf den ersten und letzten Zustand,
+    zusätzlich werden die Differenzen jeder Bauphase ausgewiesen.
+    """
+    point_grid = dict(data['point_grid'])
+    point_grid['volumen_diff'] = np.empty_like(point_grid['volumen_diff'])
+    point_grid['status'] = np.empty_like(point_grid['status'])
+    calculate_volume_difference_grid(point_grid, params['cell_size'], state_from=0, state_to=params['num_states'] - 1)
+    if params['num_states'] > 2:
+        point_grid, phase_volumes = calculate_phase_volume_differences(point_grid, params['cell_size'])
+    else:
+        phase_volumes = []
+    return {'point_grid': point_grid, 'phase_volumes': phase_volumes}
+def coarse_level_spatial_indices(params, data):
+    """Dreiecksindizes der geladenen Netze für die groben Stufen (aus dem Netz-Cache oder neu aufgebaut)."""
+    return [
+        data[f'spatial_index_{idx}'] if data[f'spatial_index_{idx}'] is not None
+        else build_triangle_grid_index(data[f'mesh_{idx}'])
+        for idx in range(params['num_states'])
+    ]
+def stage_volume_pyramid(params, data, options):
+    """
+    Vorstufe mit pyramid_cell_sizes: Berechnet die Volumensummen der Auflösungspyramide (compute_volume_pyramid).
+    Der Schlüssel hängt nur von den Ladestufen und den Zellgrößen ab, on_level ist eine Ausführungsoption.
+    """
+    return {'pyramid_levels': compute_volume_pyramid(
+        data['triangles_set'], data['bounding_box'], params['pyramid_cell_sizes'],
+        coarse_level_spatial_indices(params, data), on_level=options.get('on_level')
+    )}
+def stage_convergence_study(params, data, options):
+    """
+    Vorstufe mit convergence_tolerance: Bestimmt die Zellgröße über die Konvergenzstudie (run_convergence_study)
+    ab cell_size. Der Schlüssel hängt von den Ladestufen, der Startgröße, der Toleranz und min_cell_size ab.
+    """
+    return {'convergence_study': run_convergence_study(
+        data['triangles_set'], data['bounding_box'], params['cell_size'], params['convergence_tolerance'],
+        params['min_cell_size'], coarse_level_spatial_indices(params, data), options.get('on_level')
+    )}
+def replay_levels(levels, on_level):
+    """
+    Veröffentlicht die Stufen eines memoisierten Ergebnisses erneut über on_level. Die Stufen werden kopiert,
+    damit der Stufenspeicher unverändert bleibt; gibt on_level True zurück, endet die Folge nach dieser Stufe.
 
-    # 7. Löse das Transportproblem
+    :param levels: Liste der Stufen (compute_volume_pyramid)
+    :param on_level: Funktion on_level(level) oder None
+    :return: Liste der veröffentlichten Stufen
+    """
+    replayed = []
+    for level in levels:
+        level = dict(level, stopped=False)
+        replayed.append(level)
+        if on_level is not None and on_level(level):
+            level['stopped'] = True
+            break
+    return replayed
+def stage_distance_matrix(params, data, options):
+    """Stufe 6: Berechnet die Distanzmatrix zwischen Überschuss- und Defizitpunkten (nicht für COORDINATE_TRANSPORT_SOLVERS)."""
+    distance_matrix, excess_points, deficit_points = calculate_distance_matrix(
+        data['point_grid'], dense=params['transport_solver'] not in COORDINATE_TRANSPORT_SOLVERS
+    )
+    return {'distance_matrix': distance_matrix, 'excess_points': excess_points, 'deficit_points': deficit_points}
+def stage_transport(params, data, options):
+    """Stufe 7: Löst das Transportproblem."""
     transport_plan, depot_transport_value, total_excess, total_deficit, total_difference, depot_costs, internal_costs, total_costs, prob = solve_unbalanced_transport_problem(
-        excess_points, deficit_points, distance_matrix, depot_distance
+        data['excess_points'], data['deficit_points'], data['distance_matrix'], params['depot_distance'],
+        params['transport_solver']
     )
 
     # Bestimmen von to_depot_value und from_depot_value
@@ -587,13 +1964,7 @@ def perform_bodenaushub(zustand0_file, zustand1_file, depot_distance, cell_size)
         from_depot_value = 0
 
     return {
-        'bounding_box': bounding_box,
-        'raster_points': raster_points,
-        'triangles_set': triangles_set,
-        'point_df': point_df,
         'transport_plan': transport_plan,
-        'excess_points': excess_points,
-        'deficit_points': deficit_points,
         'depot_transport_value': depot_transport_value,
         'to_depot_value': to_depot_value,
         'from_depot_value': from_depot_value,
@@ -607,3 +1978,300 @@ def perform_bodenaushub(zustand0_file, zustand1_file, depot_distance, cell_size)
     }
 
 
+def build_bodenaushub_stages(num_states=2, adaptive=False):
+    """
+    Stellt die Stufen der Bodenaushub-Berechnung mit den Parametern, die ihr Ergebnis beeinflussen, und ihren
+    vorgelagerten Stufen zusammen. Laden und Interpolieren erfolgen je Zustand in eigenen Stufen, bei adaptive
+    ersetzt das Quadtree-Raster Raster- und Höhenstufen.
+
+    :param num_states: Anzahl der Geländezustände
+    :param adaptive: Adaptives Quadtree-Raster statt gleichmäßigem Raster (stage_adaptive_raster)
+    :return: Liste der Stufendefinitionen für run_stages
+    """
+    stages = []
+    for idx in range(num_states):
+        stages.append({'name': f'load_{idx}', 'params': (f'zustand{idx}_file', 'use_cache', 'indexed_mesh',
+                                                           'decimation_error'),
+                       'file_params': (f'zustand{idx}_file',), 'inputs': (), 'function': make_stage_load_state(idx)})
+    stages.append({'name': 'bounding_box', 'params': ('num_states',),
+                   'inputs': tuple(f'load_{idx}' for idx in range(num_states)), 'function': stage_bounding_box})
+    if adaptive:
+        stages.append({'name': 'adaptive_raster', 'params': ('cell_size', 'min_cell_size', 'adaptive_tolerance'),
+                       'inputs': ('bounding_box',), 'function': stage_adaptive_raster})
+        height_stages = ('adaptive_raster',)
+    else:
+        stages.append({'name': 'raster', 'params': ('cell_size',), 'inputs': ('bounding_box',), 'function': stage_raster})
+        for idx in range(num_states):
+            stages.append({'name': f'heights_{idx}', 'params': ('interpolation_mode', 'use_footprint'),
+                           'data_params': ('raster_definition',), 'inputs': (f'load_{idx}',),
+                           'function': make_stage_heights(idx)})
+        height_stages = ('raster',) + tuple(f'heights_{idx}' for idx in range(num_states))
+    stages += [
+        {'name': 'interpolation', 'params': ('num_states', 'cell_size'), 'inputs': height_stages,
+         'function': stage_interpolation},
+        {'name': 'volume', 'params': ('cell_size', 'num_states'), 'inputs': ('interpolation',), 'function': stage_volume},
+        {'name': 'distance_matrix', 'params': ('transport_solver',), 'inputs': ('volume',), 'function': stage_distance_matrix},
+        {'name': 'transport', 'params': ('depot_distance', 'transport_solver'), 'inputs': ('distance_matrix',), 'function': stage_transport},
+    ]
+    return stages
+def build_pyramid_stage():
+    """Stufe der Auflösungspyramide (stage_volume_pyramid), auszuführen nach den Lade- und der Bounding-Box-Stufe."""
+    return {'name': 'pyramid', 'params': ('pyramid_cell_sizes',), 'inputs': ('bounding_box',),
+            'function': stage_volume_pyramid}
+def build_convergence_stage():
+    """Stufe der Konvergenzstudie (stage_convergence_study), auszuführen nach den Lade- und der Bounding-Box-Stufe."""
+    return {'name': 'convergence_study', 'params': ('cell_size', 'convergence_tolerance', 'min_cell_size'),
+            'inputs': ('bounding_box',), 'function': stage_convergence_study}
+
+
+# Prozessweiter Speicher der Stufenergebnisse (z. B. über mehrere Klicks in der GUI hinweg)
+_stage_memo = {}
+
+
+def clear_stage_memo():
+    """Leert den prozessweiten Speicher der Stufenergebnisse."""
+    _stage_memo.clear()
+def release_source_files(file_paths):
+    """
+    Entfernt alle Stufenergebnisse aus dem prozessweiten Speicher, die Memory-Maps der Quelldateien halten
+    (binäre STL-Dateien, read_binary_stl). Unter Windows ließe sich eine abgebildete Datei sonst nicht
+    überschreiben, solange die GUI geöffnet ist. Die Ladestufen bilden die Dateien beim nächsten Lauf ohne
+    Kopie erneut ab; ihre Schlüssel hängen nur von der Dateikennung ab, sodass die nachgelagerten Stufen
+    weiterhin aus dem Speicher kommen.
+
+    :param file_paths: Pfade der Quelldateien
+    :return: Anzahl der entfernten Stufenergebnisse
+    """
+    source_files = {os.path.abspath(file_path) for file_path in file_paths}
+
+    def maps_source(value):
+        if isinstance(value, dict):
+            return any(maps_source(item) for item in value.values())
+        if isinstance(value, (list, tuple)):
+            return any(maps_source(item) for item in value)
+        return isinstance(value, np.ndarray) and mapped_file(value) in source_files
+
+    num_released = 0
+    for stage_memo in _stage_memo.values():
+        for key in [key for key, result in stage_memo.items() if maps_source(result)]:
+            del stage_memo[key]
+            num_released += 1
+    return num_released
+def perform_bodenaushub(zustand0_file, zustand1_file, depot_distance, cell_size, interpolation_mode='points',
+                        num_workers=1, tile_size=256, use_cache=True, indexed_mesh=False, use_footprint=True,
+                        min_cell_size=None, adaptive_tolerance=1e-3, pyramid_cell_sizes=None, on_level=None,
+                        convergence_tolerance=None, decimation_error=None, transport_solver='pulp'):
+    """
+    Führt die komplette Bodenaushub-Berechnung für zwei Zustände durch (siehe perform_bodenaushub_phases).
+
+    :param zustand0_file: Pfad zur STL-Datei von Zustand 0
+    :param zustand1_file: Pfad zur STL-Datei von Zustand 1
+    :param depot_distance: Distanz zur Deponie [m]
+    :param cell_size: Größe der Rasterzelle [m]
+    :param interpolation_mode: 'points', 'scanline', 'exact' oder 'adaptive' (siehe perform_bodenaushub_phases)
+    :param num_workers: Anzahl der Prozesse für die Punktabfrage (1 = seriell, None = alle CPU-Kerne)
+    :param tile_size: Kantenlänge der Kacheln in Zellen bei paralleler Interpolation
+    :param use_cache: Netze und Dreiecksindizes über den persistenten Netz-Cache laden
+    :param indexed_mesh: Netze als indizierte Netze (verschweißte Eckpunkte) laden
+    :param use_footprint: Nur Rasterpunkte innerhalb der Grundfläche der Netze interpolieren
+    :param min_cell_size: Kleinste Zellgröße im Modus 'adaptive' bzw. der Konvergenzstudie [m]
+    :param adaptive_tolerance: Höhentoleranz für die Unterteilung im Modus 'adaptive' [m]
+    :param pyramid_cell_sizes: Gröbere Zellgrößen, deren Volumensummen vorab berechnet werden (z. B. [8, 4, 2])
+    :param on_level: Funktion on_level(level), die die Summen jeder Pyramidenstufe erhält (True = abbrechen)
+    :param convergence_tolerance: Zellgröße per Konvergenzstudie ab cell_size bestimmen (relative Toleranz)
+    :param decimation_error: Netze vorab mit dieser garantierten Höhenabweichung vereinfachen [m] (None = nicht)
+    :param transport_solver: Lösungsverfahren für das Transportproblem ('pulp', 'network_simplex', 'highs',
+                             'column_generation', 'multiscale' oder 'sinkhorn')
+    :return: Dictionary mit allen Zwischen- und Endergebnissen
+    """
+    return perform_bodenaushub_phases(
+        [zustand0_file, zustand1_file], depot_distance, cell_size, interpolation_mode, num_workers, tile_size,
+        use_cache, indexed_mesh, use_footprint, min_cell_size, adaptive_tolerance, pyramid_cell_sizes, on_level,
+        convergence_tolerance, decimation_error, transport_solver
+    )
+def perform_bodenaushub_phases(zustand_files, depot_distance, cell_size, interpolation_mode='points', num_workers=1,
+                               tile_size=256, use_cache=True, indexed_mesh=False, use_footprint=True,
+                               min_cell_size=None, adaptive_tolerance=1e-3, pyramid_cell_sizes=None, on_level=None,
+                               convergence_tolerance=None, decimation_error=None, transport_solver='pulp'):
+    """
+    Führt die komplette Bodenaushub-Berechnung für beliebig viele Zustände (Bauphasen) als Folge memoisierter
+    Stufen durch (build_bodenaushub_stages). Alle Zustände werden auf ein gemeinsames Raster über der
+    überlappenden Bounding Box interpoliert; das Transportproblem wird zwischen dem ersten und dem letzten
+    Zustand gelöst, die Volumendifferenzen jeder Phase stehen unter 'phase_volumes'.
+    Bei wiederholten Aufrufen im selben Prozess werden nur die Stufen neu berechnet, deren Parameter oder
+    vorgelagerte Stufen sich geändert haben (z. B. nur der Transport bei geänderter Deponie-Distanz).
+    Mit pyramid_cell_sizes werden zuerst die Volumensummen auf gröberen Rastern berechnet und über on_level
+    veröffentlicht (compute_volume_pyramid), die letzte Stufe liefert die Dreiecksvermutungen für das Raster
+    mit cell_size. Bricht on_level die Pyramide ab, wird die Berechnung mit der Zellgröße dieser Stufe beendet.
+    Pyramide und Konvergenzstudie sind selbst memoisierte Stufen; bei einem Treffer werden ihre Stufen nur
+    erneut über on_level veröffentlicht (replay_levels).
+    Mit convergence_tolerance ist cell_size die gröbste Zellgröße einer Konvergenzstudie (run_convergence_study),
+    die Berechnung erfolgt anschließend mit der gewählten Zellgröße.
+    Mit decimation_error werden die Netze direkt nach dem Laden vereinfacht (decimate_terrain); die Berichte mit
+    Dreiecksanzahlen und erreichter Höhenabweichung stehen unter 'decimation_reports'.
+    Binäre STL-Dateien bleiben während des Laufs ohne Kopie abgebildet; am Ende werden die Stufenergebnisse mit
+    Memory-Maps der Quelldateien verworfen (release_source_files). Die Ergebnisse selbst halten die Abbildung,
+    bis der Aufrufer sie verwirft.
+
+    :param zustand_files: Liste der Pfade zu den STL-Dateien (Zustand 0, 1, ...; mindestens zwei)
+    :param depot_distance: Distanz zur Deponie [m]
+    :param cell_size: Größe der Rasterzelle [m] (im Modus 'adaptive' die der groben Startzellen)
+    :param interpolation_mode: 'points' (Punktabfrage über den Dreiecksindex je Zustand), 'scanline'
+                               (dreiecksgetriebene Rasterung), 'exact' (mittlere Zellhöhe aus der exakten
+                               Verschneidung TIN x Raster, exakte Volumen auch bei groben Zellen) oder
+                               'adaptive' (Quadtree-Raster, das nur dort verfeinert wird, wo sich das
+                               Gelände uneinheitlich ändert; Zellen mit eigener Fläche)
+    :param num_workers: Anzahl der Prozesse für die Punktabfrage (1 = seriell, None = alle CPU-Kerne)
+    :param tile_size: Kantenlänge der Kacheln in Zellen bei paralleler Interpolation
+    :param use_cache: Netze und Dreiecksindizes über den persistenten Netz-Cache laden
+                      (zusätzlich über BODENAUSHUB_CACHE=0 abschaltbar)
+    :param indexed_mesh: Netze als indizierte Netze (verschweißte Eckpunkte) laden
+    :param use_footprint: Nur Rasterpunkte innerhalb der Grundfläche der Netze interpolieren (Maske aus den
+                          Randkanten, modules/footprint.py); Punkte außerhalb bleiben ohne Höhe
+    :param min_cell_size: Kleinste Zellgröße im Modus 'adaptive' [m] (None = cell_size / 8) bzw. der
+                          Konvergenzstudie (None = cell_size / 64)
+    :param adaptive_tolerance: Höhentoleranz für die Unterteilung im Modus 'adaptive' [m]
+    :param pyramid_cell_sizes: Gröbere Zellgrößen [m] der Auflösungspyramide von grob nach fein (None = keine)
+    :param on_level: Funktion on_level(level), die nach jeder Pyramidenstufe und nach dem Raster mit cell_size
+                     aufgerufen wird; gibt sie True zurück, wird die Pyramide abgebrochen
+    :param convergence_tolerance: Relative Toleranz der Konvergenzstudie (None = cell_size unverändert verwenden)
+    :param decimation_error: Zulässige Höhenabweichung der vereinfachten Netze [m] (None = Netze unverändert)
+    :param transport_solver: 'pulp' (LP-Modell mit CBC), 'network_simplex' (Netzwerk-Simplex auf NumPy-Arrays,
+                             für große Raster), 'highs' (LP in CSR-Form, HiGHS im selben Prozess) oder
+                             'column_generation' (nur Kanten zu nahen Punkten, ohne Distanzmatrix) bzw.
+                             'multiscale' (grob lösen und verfeinern, für sehr große Raster) bzw.
+                             'sinkhorn' (Näherung für Kostenschätzungen mit Schranken für das Optimum);
+                             nur die Distanz- und Transportstufe hängen davon ab
+    :return: Dictionary mit allen Zwischen- und Endergebnissen; 'stage_report' enthält je Stufe, ob sie
+             aus dem Speicher kam, 'pyramid_levels' die Stufen der Auflösungspyramide bzw. der
+             Konvergenzstudie, 'convergence_study' das Ergebnis der Konvergenzstudie
+    """
+    if len(zustand_files) < 2:
+        raise ValueError("Es werden mindestens zwei Geländezustände benötigt.")
+    if pyramid_cell_sizes and convergence_tolerance is not None:
+        raise ValueError("Auflösungspyramide und Konvergenzstudie können nicht kombiniert werden.")
+    params = {
+        'num_states': len(zustand_files),
+        'depot_distance': depot_distance,
+        'cell_size': cell_size,
+        'interpolation_mode': interpolation_mode,
+        'use_cache': use_cache,
+        'indexed_mesh': indexed_mesh,
+        'use_footprint': use_footprint,
+        'min_cell_size': min_cell_size,
+        'adaptive_tolerance': adaptive_tolerance,
+        'decimation_error': decimation_error,
+        'transport_solver': transport_solver,
+        'pyramid_cell_sizes': pyramid_cell_sizes,
+        'convergence_tolerance': convergence_tolerance
+    }
+    for idx, file_path in enumerate(zustand_files):
+        params[f'zustand{idx}_file'] = file_path
+    options = {'num_workers': num_workers, 'tile_size': tile_size}
+    stages = build_bodenaushub_stages(
+        len(zustand_files), adaptive=(interpolation_mode == 'adaptive')
+    )
+
+    pyramid_levels = []
+    convergence_study = None
+    stopped = False
+    try:
+        if pyramid_cell_sizes or convergence_tolerance is not None:
+            # Netze und Bounding Box über die memoisierten Stufen laden, danach die groben Stufen berechnen
+            if convergence_tolerance is not None:
+                study_data, study_report = run_stages(
+                    stages[:len(zustand_files) + 1] + [build_convergence_stage()], params, _stage_memo,
+                    dict(options, on_level=on_level)
+                )
+                convergence_study = study_data['convergence_study']
+                if study_report['convergence_study']['cache_hit']:
+                    replay_levels(convergence_study['levels'], on_level)
+                pyramid_levels = convergence_study['levels']
+                params['cell_size'] = convergence_study['cell_size']
+                # Das Raster der gewählten Stufe wurde bereits interpoliert: ihre Dreiecke treffen fast alle Punkte
+                options['triangle_hints'] = convergence_study['level']
+                stopped = True
+            else:
+                pyramid_data, pyramid_report = run_stages(
+                    stages[:len(zustand_files) + 1] + [build_pyramid_stage()], params, _stage_memo,
+                    dict(options, on_level=on_level)
+                )
+                pyramid_levels = pyramid_data['pyramid_levels']
+                if pyramid_report['pyramid']['cache_hit']:
+                    pyramid_levels = replay_levels(pyramid_levels, on_level)
+                stopped = pyramid_levels[-1]['stopped']
+                if stopped:
+                    params['cell_size'] = pyramid_levels[-1]['cell_size']
+                options['triangle_hints'] = pyramid_levels[-1]
+        data, report = run_stages(stages, params, _stage_memo, options)
+    finally:
+        # Keine Memory-Map der Quelldateien im Stufenspeicher über den Lauf hinaus halten
+        release_source_files(zustand_files)
+
+    cache_hits = [name for name, entry in report.items() if entry['cache_hit']]
+    print(f"Wiederverwendete Stufen: {', '.join(cache_hits) if cache_hits else 'keine'}")
+
+    results = dict(data)
+    results['stage_report'] = report
+    results['pyramid_levels'] = pyramid_levels
+    results['convergence_study'] = convergence_study
+    results['decimation_reports'] = [data[f'decimation_report_{idx}'] for idx in range(len(zustand_files))]
+    if on_level is not None and not stopped:
+        # Endergebnis als letzte Stufe veröffentlichen
+        on_level({
+            'cell_size': params['cell_size'],
+            'num_cells': len(data['raster_points']),
+            'total_excess': data['total_excess'],
+            'total_deficit': data['total_deficit'],
+            'total_difference': data['total_difference'],
+            'time': sum(entry['time'] for entry in report.values()),
+            'stopped': False
+        })
+    return results
+def perform_bodenaushub_streaming(zustand0_file, zustand1_file, cell_size, output_file, tile_size=512):
+    """
+    Speicherbegrenzte Variante für sehr große Gebiete: Das Raster wird kachelweise erzeugt, interpoliert,
+    in Volumendifferenzen umgerechnet und direkt an die CSV-Datei angehängt. Es werden nur die Summen
+    behalten, der Speicherbedarf hängt damit von der Kachelgröße und nicht von der Gebietsgröße ab.
+    Das Transportproblem wird hier nicht gelöst, da es alle Zellen gleichzeitig benötigt.
+
+    :param zustand0_file: Pfad zur STL-Datei von Zustand 0
+    :param zustand1_file: Pfad zur STL-Datei von Zustand 1
+    :param cell_size: Größe der Rasterzelle [m]
+    :param output_file: Pfad der CSV-Datei für die Rasterpunkte (x, y, z0, z1, volumen_diff, status)
+    :param tile_size: Kantenlänge einer Kachel in Zellen
+    :return: Dictionary mit den aufsummierten Volumen und Zellanzahlen
+    """
+    triangles_set = load_stl_files(zustand0_file, zustand1_file)
+    bounding_box = calculate_bounding_box(triangles_set)
+    spatial_indices = build_spatial_indices(triangles_set)
+
+    totals = {
+        'bounding_box': bounding_box,
+        'num_cells': 0,
+        'num_excess': 0,
+        'num_deficit': 0,
+        'total_excess': 0.0,
+        'total_deficit': 0.0
+    }
+    start_time = time.perf_counter()
+    for tile_id, tile_points in iter_raster_tiles(bounding_box, cell_size, tile_size):
+        tile_grid = interpolate_point_grid(tile_points, triangles_set, spatial_indices=spatial_indices)
+        tile_grid = calculate_volume_difference_grid(tile_grid, cell_size)
+
+        volumen_diff = tile_grid['volumen_diff']
+        totals['num_cells'] += len(volumen_diff)
+        totals['num_excess'] += int(np.count_nonzero(volumen_diff > 0))
+        totals['num_deficit'] += int(np.count_nonzero(volumen_diff < 0))
+        totals['total_excess'] += float(volumen_diff[volumen_diff > 0].sum())
+        totals['total_deficit'] -= float(volumen_diff[volumen_diff < 0].sum())
+
+        # Kachel sofort schreiben und verwerfen (DataFrame nur für den Export)
+        point_grid_to_df(tile_grid).to_csv(output_file, mode='w' if tile_id == 0 else 'a', header=(tile_id == 0), index=False)
+        print(f"Kachel {tile_id + 1}: {len(volumen_diff)} Zellen geschrieben, "
+              f"Überschüsse bisher {totals['total_excess']:.2f} m³, Defizite bisher {totals['total_deficit']:.2f} m³")
+
+    totals['total_difference'] = totals['total_excess'] - totals['total_deficit']
+    print(f"Streaming abgeschlossen: {totals['num_cells']} Zellen in {time.perf_counter() - start_time:.2f} s, "
+          f"Differenz gesamt: {totals['total_difference']:.2f} m³ (Ergebnis in '{output_file}')")
+    return totals
@@ -0,0 +1,277 @@
+# decimation.py
+import time
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import Delaunay
+
+from modules.footprint import footprint_is_consistent, mesh_boundary_edge_ids
+from modules.spatial_index import build_triangle_grid_index, locate_buckets, query_triangle_grid_index
+from modules.terrain_io import is_indexed_mesh, mesh_num_triangles, weld_vertices
+
+
+# --- Hilfsfunktionen auf der Delaunay-Triangulierung --- #
+def delaunay_barycentric(delaunay, simplices, points):
+    """
+    Berechnet die baryzentrischen Koordinaten von Punkten bezüglich der angegebenen Dreiecke einer
+    scipy-Delaunay-Triangulierung.
+
+    :param delaunay: scipy.spatial.Delaunay
+    :param simplices: Dreiecksnummer je Punkt (Form (N,))
+    :param points: Punkte (x, y), Form (N, 2)
+    :return: Baryzentrische Koordinaten der Form (N, 3)
+    """
+    transform = delaunay.transform[simplices]
+    b01 = np.einsum('nij,nj->ni', transform[:, :2], points - transform[:, 2])
+    return np.column_stack([b01, 1.0 - b01.sum(axis=1)])
+def undirected_edge_keys(edges, num_points):
+    """Bildet einen eindeutigen int64-Schlüssel je ungerichteter Kante (Paare von Punktnummern)."""
+    edges = np.asarray(edges, dtype=np.int64)
+    return np.minimum(edges[:, 0], edges[:, 1]) * num_points + np.maximum(edges[:, 0], edges[:, 1])
+def simplex_edge_keys(delaunay, num_points):
+    """Schlüssel der Kante gegenüber Ecke k jedes Dreiecks (Form (F, 3)), passend zu delaunay.neighbors."""
+    simplices = delaunay.simplices.astype(np.int64)
+    keys = [
+        undirected_edge_keys(simplices[:, [(k + 1) % 3, (k + 2) % 3]], num_points) for k in range(3)
+    ]
+    return np.column_stack(keys)
+def edge_crossing_errors(points, simplified_edges, start, end, point_block=65536):
+    """
+    Bestimmt die Schnittpunkte der Kanten des Originalnetzes mit den Kanten des vereinfachten Netzes und die
+    Höhenabweichung an jedem Schnittpunkt. Entlang ihrer Kanten sind beide Netze linear, die Höhen folgen daher
+    direkt aus den Streckenparametern. Kandidatenpaare liefert ein Dreiecksindex über die vereinfachten Kanten
+    (als entartete Dreiecke), abgefragt an den Ecken der Bounding-Box jeder Originalkante.
+
+    :param points: Punkte (x, y, z) des vereinfachten Netzes, Form (M, 3)
+    :param simplified_edges: Kanten des vereinfachten Netzes als Punktnummern, Form (S, 2)
+    :param start: Startpunkte (x, y, z) der Originalkanten, Form (E, 3)
+    :param end: Endpunkte (x, y, z) der Originalkanten, Form (E, 3)
+    :param point_block: Anzahl der Originalkanten pro Abfrageblock
+    :return: Schnittpunkte (K, 3) auf dem Originalnetz, deren Abweichung (K,) und die geschnittene Kante (K,)
+    """
+    segment_a = points[simplified_edges[:, 0]]
+    segment_b = points[simplified_edges[:, 1]]
+    # Buckets mindestens so groß wie die längste Originalkante: deren Bounding-Box überdeckt höchstens 2 x 2 Buckets
+    original_length = np.hypot(*(end[:, :2] - start[:, :2]).T)
+    simplified_length = np.hypot(*(segment_b[:, :2] - segment_a[:, :2]).T)
+    bucket_size = max(float(original_length.max(initial=0.0)), float(np.median(simplified_length)), 1e-9)
+    index = build_triangle_grid_index(np.stack([segment_a, segment_b, segment_b], axis=1), bucket_size=bucket_size)
+
+    crossing_points, crossing_errors, crossing_edges = [], [], []
+    for e_start in range(0, len(start), point_block):
+        p, q = start[e_start:e_start + point_block], end[e_start:e_start + point_block]
+        lo, hi = np.minimum(p[:, :2], q[:, :2]), np.maximum(p[:, :2], q[:, :2])
+        corners = np.concatenate([lo, hi, np.column_stack([lo[:, 0], hi[:, 1]]), np.column_stack([hi[:, 0], lo[:, 1]])])
+        # Je Kante jeden Bucket nur einmal abfragen (meist liegen alle vier Ecken im selben Bucket)
+        buckets = locate_buckets(index, corners).reshape(4, -1)
+        distinct = np.ones(buckets.shape, dtype=bool)
+        for corner in range(1, 4):
+            distinct[corner] = np.all(buckets[corner] != buckets[:corner], axis=0)
+        distinct = distinct.ravel()
+        corner_ids, edge_ids = query_triangle_grid_index(index, corners[distinct])
+        pair_keys = np.sort(
+            (np.flatnonzero(distinct)[corner_ids] % len(p)).astype(np.int64) * len(simplified_edges) + edge_ids
+        )
+        pair_keys = pair_keys[np.concatenate([[True], pair_keys[1:] != pair_keys[:-1]])]
+        original, simplified = pair_keys // len(simplified_edges), pair_keys % len(simplified_edges)
+
+        # Schnitt der Strecken p + t * r und a + u * d
+        r = q[original] - p[original]
+        d = segment_b[simplified] - segment_a[simplified]
+        w = segment_a[simplified, :2] - p[original, :2]
+        denom = r[:, 0] * d[:, 1] - r[:, 1] * d[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (w[:, 0] * d[:, 1] - w[:, 1] * d[:, 0]) / denom
+            u = (w[:, 0] * r[:, 1] - w[:, 1] * r[:, 0]) / denom
+        # Parallele Kanten und Berührungen in Endpunkten entfallen (dort liegen Eckpunkte beider Netze)
+        hit = (denom != 0) & (t > 0) & (t < 1) & (u > 0) & (u < 1)
+
+        xyz = p[original[hit]] + t[hit, None] * r[hit]
+        z_simplified = segment_a[simplified[hit], 2] + u[hit] * d[hit, 2]
+        crossing_points.append(xyz)
+        crossing_errors.append(np.abs(xyz[:, 2] - z_simplified))
+        crossing_edges.append(simplified[hit])
+
+    if not crossing_points:
+        return np.empty((0, 3)), np.empty(0), np.empty(0, dtype=np.int64)
+    return np.concatenate(crossing_points), np.concatenate(crossing_errors), np.concatenate(crossing_edges)
+def worst_per_group(errors, groups, max_error):
+    """Wählt je Gruppe (z. B. Dreieck) den Kandidaten mit der größten Abweichung oberhalb von max_error (Indizes)."""
+    candidates = np.flatnonzero(errors > max_error)
+    order = candidates[np.argsort(-errors[candidates], kind='stable')]
+    _, first = np.unique(groups[order], return_index=True)
+    return order[first]
+def domain_simplices(delaunay, segment_keys, num_points):
+    """
+    Bestimmt die Dreiecke der Triangulierung innerhalb der Grundfläche. Die Triangulierung enthält alle Randkanten
+    (segment_keys); Bereiche zwischen Randkanten sind zusammenhängend und liegen entweder ganz innen oder außen.
+    Bereiche an der konvexen Hülle ohne Randkante liegen außen, jede Randkante wechselt zwischen innen und außen.
+
+    :param delaunay: scipy.spatial.Delaunay
+    :param segment_keys: Schlüssel der Randkanten (undirected_edge_keys)
+    :param num_points: Anzahl der Punkte der Triangulierung
+    :return: Boolesche Maske der Dreiecke innerhalb der Grundfläche
+    """
+    num_simplices = len(delaunay.simplices)
+    is_segment = np.isin(simplex_edge_keys(delaunay, num_points), segment_keys)
+    neighbors = delaunay.neighbors
+    own = np.repeat(np.arange(num_simplices), 3).reshape(num_simplices, 3)
+
+    # Bereiche: über Kanten verbunden, die keine Randkanten sind
+    connected = (neighbors >= 0) & ~is_segment
+    graph = coo_matrix(
+        (np.ones(connected.sum()), (own[connected], neighbors[connected])), shape=(num_simplices, num_simplices)
+    )
+    num_regions, region = connected_components(graph, directed=False)
+
+    inside = np.full(num_regions, -1, dtype=np.int8)
+    hull = neighbors < 0
+    inside[region[own[hull & ~is_segment]]] = 0
+    inside[region[own[hull & is_segment]]] = 1
+
+    # Über Randkanten benachbarte Bereiche haben den entgegengesetzten Zustand
+    across = (neighbors >= 0) & is_segment
+    pairs = np.unique(np.column_stack([region[own[across]], region[neighbors[across]]]), axis=0)
+    while np.any(inside < 0):
+        known = inside[pairs[:, 0]] >= 0
+        update = known & (inside[pairs[:, 1]] < 0)
+        if not update.any():
+            break
+        inside[pairs[update, 1]] = 1 - inside[pairs[update, 0]]
+    return inside[region] == 1
+
+
+# --- Vereinfachung mit beschränkter Höhenabweichung --- #
+def decimate_terrain(terrain_mesh, max_error, max_rounds=64, tolerance=1e-6):
+    """
+    Vereinfacht ein Geländenetz durch gierige Einfügung (greedy insertion): Ausgehend von den Randpunkten wird
+    eine Delaunay-Triangulierung aufgebaut und je Runde in jedes Dreieck der Eckpunkt des Originalnetzes mit der
+    größten Höhenabweichung eingefügt, bis keine Abweichung max_error übersteigt. Randkanten, die nicht in der
+    Triangulierung enthalten sind, werden mittig geteilt, damit die Grundfläche (inkl. Löcher) erhalten bleibt.
+
+    Die Abweichung wird garantiert: Beide Netze sind stückweise linear, die größte Abweichung liegt daher an den
+    Eckpunkten des Originalnetzes, den Punkten des vereinfachten Netzes (liegen auf dem Originalnetz) oder an den
+    Schnittpunkten der Kanten beider Netze. Die Schnittpunkte werden zum Schluss geprüft und bei Überschreitung
+    eingefügt. Kann die Abweichung nicht innerhalb von max_rounds nachgewiesen werden oder ist das Netz kein
+    Höhenfeld (Überhänge, senkrechte Flächen), wird das Originalnetz zurückgegeben.
+
+    :param terrain_mesh: Dreiecksarray (N, 3, 3) oder indiziertes Netz
+    :param max_error: Größte zulässige Höhenabweichung [m]
+    :param max_rounds: Höchstzahl der Einfügerunden
+    :param tolerance: Schweißtoleranz für Dreiecksarrays [m]
+    :return: Vereinfachtes Netz (gleiche Darstellung wie die Eingabe) und Bericht (Dictionary mit
+             'num_triangles_before', 'num_triangles_after', 'max_error', 'certified', 'rounds', 'time')
+    """
+    start_time = time.perf_counter()
+    indexed_mesh = terrain_mesh if is_indexed_mesh(terrain_mesh) else weld_vertices(terrain_mesh, tolerance)
+    vertices = np.asarray(indexed_mesh['vertices'], dtype=np.float64)
+    faces = np.asarray(indexed_mesh['faces'], dtype=np.int64)
+    faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 2] != faces[:, 0])]
+    report = {
+        'num_triangles_before': mesh_num_triangles(terrain_mesh),
+        'num_triangles_after': mesh_num_triangles(terrain_mesh),
+        'max_error': 0.0,
+        'certified': False,
+        'rounds': 0,
+        'time': 0.0
+    }
+
+    boundary = mesh_boundary_edge_ids(indexed_mesh)
+    xy_keys = np.round(vertices[:, :2] / tolerance).astype(np.int64)
+    if (len(faces) < 2 or not footprint_is_consistent(indexed_mesh, vertices[boundary][:, :, :2])
+            or len(np.unique(xy_keys, axis=0)) < len(vertices)):
+        print("Netz ist kein eindeutiges Höhenfeld, es wird nicht vereinfacht")
+        report['time'] = time.perf_counter() - start_time
+        return terrain_mesh, report
+
+    # Ungerichtete Kanten des Originalnetzes für die Prüfung der Schnittpunkte
+    all_edges = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+    _, first = np.unique(undirected_edge_keys(all_edges, len(vertices)), return_index=True)
+    edges = all_edges[first]
+
+    # Startpunkte: alle Randpunkte; Randkanten als Segmente über Punktnummern der Triangulierung
+    boundary_vertices, segments = np.unique(boundary, return_inverse=True)
+    segments = segments.reshape(-1, 2)
+    points = vertices[boundary_vertices]
+    selected = np.zeros(len(vertices), dtype=bool)
+    selected[boundary_vertices] = True
+
+    for round_idx in range(1, max_rounds + 1):
+        report['rounds'] = round_idx
+        if len(points) >= len(vertices):
+            # Mehr Punkte als das Original: Eine Vereinfachung ist nicht mehr möglich
+            break
+        delaunay = Delaunay(points[:, :2])
+        segment_keys = undirected_edge_keys(segments, len(points))
+
+        # Randkanten, die nicht Kante der Triangulierung sind, mittig teilen (Höhe liegt auf der Originalkante)
+        missing = ~np.isin(segment_keys, simplex_edge_keys(delaunay, len(points)))
+        if missing.any():
+            midpoints = 0.5 * (points[segments[missing, 0]] + points[segments[missing, 1]])
+            new_ids = len(points) + np.arange(len(midpoints))
+            points = np.concatenate([points, midpoints])
+            segments = np.concatenate([
+                segments[~missing],
+                np.column_stack([segments[missing, 0], new_ids]),
+                np.column_stack([new_ids, segments[missing, 1]])
+            ])
+            continue
+
+        # Abweichung an den Eckpunkten des Originalnetzes
+        vertex_simplex = delaunay.find_simplex(vertices[:, :2])
+        inside = vertex_simplex >= 0
+        vertex_error = np.full(len(vertices), np.inf)
+        bary = delaunay_barycentric(delaunay, vertex_simplex[inside], vertices[inside, :2])
+        vertex_error[inside] = np.abs(
+            vertices[inside, 2] - np.sum(bary * points[delaunay.simplices[vertex_simplex[inside]], 2], axis=1)
+        )
+        vertex_error[selected] = 0.0
+        if vertex_error.max() > max_error:
+            insert = worst_per_group(vertex_error, np.where(inside, vertex_simplex, -1), max_error)
+            selected[insert] = True
+            points = np.concatenate([points, vertices[insert]])
+            continue
+
+        # Abweichung an den Schnittpunkten der Kanten beider Netze
+        simplified_edges = np.concatenate([delaunay.simplices[:, [k, (k + 1) % 3]] for k in range(3)])
+        _, first = np.unique(undirected_edge_keys(simplified_edges, len(points)), return_index=True)
+        crossing_points, crossing_errors, crossing_edges = edge_crossing_errors(
+            points, simplified_edges[first], vertices[edges[:, 0]], vertices[edges[:, 1]]
+        )
+        report['max_error'] = float(max(vertex_error.max(), crossing_errors.max() if len(crossing_errors) else 0.0))
+        if report['max_error'] <= max_error:
+            report['certified'] = True
+            break
+        insert = worst_per_group(crossing_errors, crossing_edges, max_error)
+        points = np.concatenate([points, crossing_points[insert]])
+
+    report['time'] = time.perf_counter() - start_time
+    simplices = delaunay.simplices[domain_simplices(delaunay, segment_keys, len(points))] if report['certified'] else None
+    if simplices is None or len(simplices) >= report['num_triangles_before']:
+        print(f"Keine Vereinfachung mit höchstens {max_error * 1000:.1f} mm Höhenabweichung möglich "
+              f"({report['rounds']} Runden), das Netz bleibt unverändert")
+        report['max_error'] = 0.0
+        report['certified'] = False
+        return terrain_mesh, report
+    # Umlaufsinn des Originalnetzes übernehmen (für Grundfläche und Randkanten)
+    corners = vertices[faces][:, :, :2]
+    original_sign = np.sign(np.sum(
+        (corners[:, 1, 0] - corners[:, 0, 0]) * (corners[:, 2, 1] - corners[:, 0, 1])
+        - (corners[:, 2, 0] - corners[:, 0, 0]) * (corners[:, 1, 1] - corners[:, 0, 1])
+    ))
+    a, b, c = (points[simplices[:, k], :2] for k in range(3))
+    signed = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1])
+    flip = np.sign(signed) != original_sign
+    simplices[flip] = simplices[flip][:, ::-1]
+
+    report['num_triangles_after'] = len(simplices)
+    if is_indexed_mesh(terrain_mesh):
+        simplified = {'vertices': points.astype(np.asarray(terrain_mesh['vertices']).dtype),
+                      'faces': simplices.astype(np.int32)}
+    else:
+        simplified = points[simplices].astype(np.asarray(terrain_mesh).dtype)
+    print(f"Netz vereinfacht: {report['num_triangles_before']} -> {report['num_triangles_after']} Dreiecke, "
+          f"größte Höhenabweichung {report['max_error'] * 1000:.1f} mm (zulässig {max_error * 1000:.1f} mm), "
+          f"{report['rounds']} Runden, {report['time']:.2f} s")
+    return simplified, report
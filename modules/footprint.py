@@ -0,0 +1,147 @@
+# footprint.py
+import numpy as np
+
+from modules.terrain_io import is_indexed_mesh, weld_vertices
+
+
+# --- Grundfläche eines Netzes aus seinen Randkanten --- #
+def mesh_boundary_edge_ids(indexed_mesh):
+    """
+    Bestimmt die Randkanten eines indizierten Netzes als Paare von Eckpunktnummern, d. h. die Kanten, die nur zu
+    einem Dreieck gehören. Die Richtung der Kanten entspricht dem Umlaufsinn ihres Dreiecks. Beim Verschweißen
+    zusammengefallene Dreiecke (doppelte Eckpunkte) werden übergangen.
+
+    :param indexed_mesh: Indiziertes Netz (Dictionary mit 'vertices' und 'faces')
+    :return: Array der Form (E, 2) mit Start- und Endpunkt (Eckpunktnummern) jeder Randkante
+    """
+    faces = np.asarray(indexed_mesh['faces'], dtype=np.int64)
+    faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 2] != faces[:, 0])]
+    if len(faces) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    edges = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+    # Ungerichteter Schlüssel je Kante; Randkanten kommen genau einmal vor
+    num_vertices = len(indexed_mesh['vertices'])
+    edge_keys = np.minimum(edges[:, 0], edges[:, 1]) * num_vertices + np.maximum(edges[:, 0], edges[:, 1])
+    _, first, counts = np.unique(edge_keys, return_index=True, return_counts=True)
+    return edges[first[counts == 1]]
+def upward_faces(vertices, faces, tolerance=1e-6):
+    """
+    Beschränkt ein geschlossenes Netz (Geländekörper mit Seiten- und Unterfläche) auf seine nach oben
+    zeigenden Dreiecke. Offene Flächen (Geländeoberflächen) bleiben unverändert. Für die Prüfung auf
+    Randkanten werden die Eckpunkte zuvor verschweißt, da tessellierte Körper (z. B. aus IfcOpenShell)
+    Eckpunkte je Fläche oder Teilkörper getrennt führen und sonst offen erscheinen.
+
+    :param vertices: Eckpunkte der Form (V, 3)
+    :param faces: Dreiecke der Form (N, 3)
+    :param tolerance: Schweißtoleranz [m]
+    :return: Dreiecke der Oberseite
+    """
+    corners = np.asarray(vertices)[faces]
+    if len(mesh_boundary_edge_ids(weld_vertices(corners, tolerance))) > 0:
+        return faces
+    edge_1 = corners[:, 1] - corners[:, 0]
+    edge_2 = corners[:, 2] - corners[:, 0]
+    normal_z = edge_1[:, 0] * edge_2[:, 1] - edge_1[:, 1] * edge_2[:, 0]
+    return faces[normal_z > 0]
+def mesh_boundary_edges(terrain_mesh, tolerance=1e-6):
+    """
+    Bestimmt die Randkanten eines Netzes (mesh_boundary_edge_ids) als Koordinaten. Dreiecksarrays werden dafür
+    zuvor verschweißt.
+
+    :param terrain_mesh: Dreiecksarray (N, 3, 3) oder indiziertes Netz
+    :param tolerance: Schweißtoleranz für Dreiecksarrays [m]
+    :return: Array der Form (E, 2, 2) mit Start- und Endpunkt (x, y) jeder Randkante
+    """
+    indexed_mesh = terrain_mesh if is_indexed_mesh(terrain_mesh) else weld_vertices(terrain_mesh, tolerance)
+    boundary = mesh_boundary_edge_ids(indexed_mesh)
+    if len(boundary) == 0:
+        return np.empty((0, 2, 2))
+    return np.asarray(indexed_mesh['vertices'])[boundary][:, :, :2].astype(np.float64)
+def footprint_is_consistent(terrain_mesh, boundary_edges, rel_tolerance=1e-6):
+    """
+    Prüft, ob die Randkanten die Grundfläche des Netzes eindeutig beschreiben: Die vom Rand umschlossene
+    (vorzeichenbehaftete) Fläche muss der Summe der projizierten Dreiecksflächen entsprechen. Das ist bei
+    Überhängen, geschlossenen Körpern oder uneinheitlichem Umlaufsinn nicht der Fall.
+
+    :param terrain_mesh: Dreiecksarray oder indiziertes Netz
+    :param boundary_edges: Randkanten aus mesh_boundary_edges
+    :param rel_tolerance: Relative Toleranz für den Flächenvergleich
+    :return: True, wenn die Grundfläche als Maske verwendet werden kann
+    """
+    if is_indexed_mesh(terrain_mesh):
+        corners = np.asarray(terrain_mesh['vertices'])[np.asarray(terrain_mesh['faces'])][:, :, :2]
+    else:
+        corners = np.asarray(terrain_mesh)[:, :, :2]
+    corners = corners.astype(np.float64)
+    triangle_areas = 0.5 * (
+        (corners[:, 1, 0] - corners[:, 0, 0]) * (corners[:, 2, 1] - corners[:, 0, 1])
+        - (corners[:, 2, 0] - corners[:, 0, 0]) * (corners[:, 1, 1] - corners[:, 0, 1])
+    )
+    mesh_area = np.abs(triangle_areas).sum()
+    # Shoelace-Formel über die gerichteten Randkanten
+    boundary_area = 0.5 * np.sum(
+        boundary_edges[:, 0, 0] * boundary_edges[:, 1, 1] - boundary_edges[:, 1, 0] * boundary_edges[:, 0, 1]
+    )
+    return mesh_area > 0 and abs(abs(boundary_area) - mesh_area) <= rel_tolerance * mesh_area
+def rasterize_footprint(x_coords, y_coords, boundary_edges, dilate=1):
+    """
+    Rastert die von den Randkanten umschlossene Fläche nach der Gerade-Ungerade-Regel zeilenweise: Je Rasterzeile
+    werden die Schnittpunkte der Randkanten bestimmt, ab jedem Schnittpunkt wechselt der Zustand innen/außen.
+    Löcher im Netz bleiben damit außen. Die Maske wird anschließend um dilate Zellen erweitert, damit Punkte auf
+    oder knapp neben dem Rand (Interpolationstoleranz) nicht verloren gehen.
+
+    :param x_coords: x-Koordinaten der Zellmittelpunkte (aufsteigend)
+    :param y_coords: y-Koordinaten der Zellmittelpunkte (aufsteigend)
+    :param boundary_edges: Randkanten aus mesh_boundary_edges
+    :param dilate: Anzahl der Zellen, um die die Maske erweitert wird
+    :return: Boolesche Maske der Form (ny, nx)
+    """
+    nx, ny = len(x_coords), len(y_coords)
+    y_start = boundary_edges[:, 0, 1]
+    y_end = boundary_edges[:, 1, 1]
+    y_low = np.minimum(y_start, y_end)
+    y_high = np.maximum(y_start, y_end)
+
+    # Rasterzeilen je Kante im halboffenen Intervall [y_low, y_high), waagerechte Kanten entfallen
+    row_start = np.searchsorted(y_coords, y_low, side='left')
+    row_end = np.searchsorted(y_coords, y_high, side='left')
+    counts = np.maximum(row_end - row_start, 0)
+    edge_ids = np.repeat(np.arange(len(boundary_edges)), counts)
+    rows = np.repeat(row_start, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    # x-Koordinate des Schnittpunkts und erste Zelle rechts davon
+    edges = boundary_edges[edge_ids]
+    t = (y_coords[rows] - edges[:, 0, 1]) / (edges[:, 1, 1] - edges[:, 0, 1])
+    x_cross = edges[:, 0, 0] + t * (edges[:, 1, 0] - edges[:, 0, 0])
+    first_col = np.searchsorted(x_coords, x_cross, side='right')
+
+    # Anzahl der Schnittpunkte links jeder Zelle, ungerade = innen
+    crossings = np.bincount(rows * (nx + 1) + first_col, minlength=ny * (nx + 1)).reshape(ny, nx + 1)
+    mask = (np.cumsum(crossings, axis=1)[:, :nx] % 2) == 1
+
+    for _ in range(dilate):
+        grown = mask.copy()
+        grown[1:, :] |= mask[:-1, :]
+        grown[:-1, :] |= mask[1:, :]
+        grown[:, 1:] |= grown[:, :-1].copy()
+        grown[:, :-1] |= grown[:, 1:].copy()
+        mask = grown
+    return mask
+def calculate_footprint_mask(terrain_mesh, x_coords, y_coords, dilate=1, tolerance=1e-6):
+    """
+    Bestimmt für ein Raster, welche Zellmittelpunkte in der Grundfläche eines Netzes liegen. Ist die Grundfläche
+    nicht eindeutig (footprint_is_consistent), werden alle Zellen als innen betrachtet.
+
+    :param terrain_mesh: Dreiecksarray oder indiziertes Netz
+    :param x_coords: x-Koordinaten der Zellmittelpunkte (aufsteigend)
+    :param y_coords: y-Koordinaten der Zellmittelpunkte (aufsteigend)
+    :param dilate: Anzahl der Zellen, um die die Maske erweitert wird
+    :param tolerance: Schweißtoleranz zur Bestimmung der Randkanten [m]
+    :return: Boolesche Maske der Form (ny, nx)
+    """
+    boundary_edges = mesh_boundary_edges(terrain_mesh, tolerance)
+    if not footprint_is_consistent(terrain_mesh, boundary_edges):
+        print("Grundfläche nicht eindeutig (Überhänge oder uneinheitlicher Umlaufsinn), keine Maskierung")
+        return np.ones((len(y_coords), len(x_coords)), dtype=bool)
+    return rasterize_footprint(x_coords, y_coords, boundary_edges, dilate)
@@ -0,0 +1,80 @@
+# ifc_terrain.py
+import multiprocessing
+import time
+
+import ifcopenshell
+import ifcopenshell.geom
+import numpy as np
+
+from modules.footprint import upward_faces
+
+
+# --- Geländeelemente aus IFC-Dateien --- #
+def select_terrain_elements(model, global_ids=None):
+    """
+    Wählt die Elemente eines IFC-Modells aus, die das Gelände beschreiben: IfcGeographicElement mit
+    PredefinedType TERRAIN (IFC4), sonst alle IfcGeographicElement (IFC2X3 kennt keinen PredefinedType) und
+    nur wenn keine vorhanden sind die Geometrie von IfcSite. Elemente ohne Geometrie entfallen.
+
+    :param model: Geöffnetes IFC-Modell
+    :param global_ids: Optionale Liste von GlobalIds, auf die die Auswahl beschränkt wird
+    :return: Liste der Geländeelemente
+    """
+    if global_ids is not None:
+        return [model.by_guid(global_id) for global_id in global_ids]
+
+    geographic_elements = [element for element in model.by_type('IfcGeographicElement') if element.Representation]
+    terrain_elements = [
+        element for element in geographic_elements if getattr(element, 'PredefinedType', None) == 'TERRAIN'
+    ]
+    if terrain_elements:
+        return terrain_elements
+    if geographic_elements:
+        return geographic_elements
+    return [element for element in model.by_type('IfcSite') if element.Representation]
+def read_ifc_terrain(file_path, global_ids=None, num_threads=None):
+    """
+    Tesselliert die Geländeelemente einer IFC-Datei (select_terrain_elements) mit dem Geometrie-Iterator von
+    IfcOpenShell (mehrere Threads, Weltkoordinaten) direkt zu einem indizierten Netz, ohne Umweg über eine
+    STL-Datei. Die Netze aller Elemente werden zusammengefasst.
+
+    :param file_path: Pfad zur IFC-Datei
+    :param global_ids: Optionale Liste von GlobalIds der zu verwendenden Elemente (z. B. ein Zustand je Element)
+    :param num_threads: Anzahl der Threads des Iterators (None = alle CPU-Kerne)
+    :return: Indiziertes Netz als Dictionary mit 'vertices' (V, 3) und 'faces' (N, 3, int32)
+    """
+    start_time = time.perf_counter()
+    model = ifcopenshell.open(file_path)
+    elements = select_terrain_elements(model, global_ids)
+    if not elements:
+        raise ValueError(f"Die IFC-Datei enthält keine Geländeelemente (IfcGeographicElement, IfcSite): {file_path}")
+
+    settings = ifcopenshell.geom.settings()
+    settings.set(settings.USE_WORLD_COORDS, True)  # Koordinaten wie in den übrigen Zuständen
+    iterator = ifcopenshell.geom.iterator(
+        settings, model, num_threads or multiprocessing.cpu_count(), include=elements
+    )
+
+    vertex_blocks = []
+    face_blocks = []
+    num_vertices = 0
+    if iterator.initialize():
+        while True:
+            shape = iterator.get()
+            vertices = np.asarray(shape.geometry.verts, dtype=np.float64).reshape(-1, 3)
+            faces = upward_faces(vertices, np.asarray(shape.geometry.faces, dtype=np.int64).reshape(-1, 3))
+            vertex_blocks.append(vertices)
+            face_blocks.append(faces + num_vertices)
+            num_vertices += len(vertices)
+            if not iterator.next():
+                break
+    if not face_blocks:
+        raise ValueError(f"Die Geländeelemente der IFC-Datei haben keine tessellierbare Geometrie: {file_path}")
+
+    terrain_mesh = {
+        'vertices': np.concatenate(vertex_blocks),
+        'faces': np.concatenate(face_blocks).astype(np.int32)
+    }
+    print(f"IFC-Gelände tesselliert: {file_path}, {len(face_blocks)} Elemente, {len(terrain_mesh['faces'])} Dreiecke, "
+          f"{time.perf_counter() - start_time:.2f} s")
+    return terrain_mesh
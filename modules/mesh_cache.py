@@ -0,0 +1,274 @@
+# mesh_cache.py
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from modules.spatial_index import build_triangle_grid_index
+from modules.terrain_io import is_binary_stl, is_indexed_mesh, is_stl_file, read_terrain_file, weld_vertices
+
+# Cache-Verzeichnis und Größenbegrenzung (über Umgebungsvariablen anpassbar, BODENAUSHUB_CACHE=0 deaktiviert den Cache)
+DEFAULT_CACHE_DIR = Path(os.environ.get('BODENAUSHUB_CACHE_DIR', Path.home() / '.bodenaushub_cache'))
+DEFAULT_MAX_CACHE_BYTES = int(os.environ.get('BODENAUSHUB_CACHE_MAX_BYTES', 4 * 1024 ** 3))
+INDEX_SCALAR_KEYS = ('origin_x', 'origin_y', 'bucket_size', 'nx', 'ny')
+
+
+def cache_enabled():
+    """Prüft, ob der Netz-Cache über die Umgebungsvariable BODENAUSHUB_CACHE abgeschaltet wurde."""
+    return os.environ.get('BODENAUSHUB_CACHE', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+# --- Schlüssel --- #
+def file_content_hash(file_path, chunk_size=8 * 1024 * 1024):
+    """Berechnet einen Inhalts-Hash (BLAKE2b, 128 Bit) einer Datei in Blöcken."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+def file_cache_key(file_path, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Bestimmt den Cache-Schlüssel einer Datei aus Inhalts-Hash und Änderungszeit. Der Hash wird pro
+    (Pfad, Größe, mtime) gemerkt, sodass unveränderte Dateien nicht erneut gelesen werden.
+
+    :param file_path: Pfad zur Datei
+    :param cache_dir: Cache-Verzeichnis
+    :return: Schlüssel als String
+    """
+    stat = os.stat(file_path)
+    memo = read_file_hashes(cache_dir)
+    abs_path = os.path.abspath(file_path)
+    entry = memo.get(abs_path)
+    if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+        content_hash = entry[2]
+    else:
+        content_hash = file_content_hash(file_path)
+        memo[abs_path] = [stat.st_size, stat.st_mtime_ns, content_hash]
+        write_file_hashes(cache_dir, memo)
+    return f"{content_hash}_{stat.st_mtime_ns}"
+def read_file_hashes(cache_dir):
+    """Liest die gemerkten Datei-Hashes (Pfad -> [Größe, mtime, Hash]); fehlt die Datei, ist das Ergebnis leer."""
+    try:
+        return json.loads((Path(cache_dir) / 'file_hashes.json').read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+def write_file_hashes(cache_dir, memo):
+    """Schreibt die gemerkten Datei-Hashes atomar (temporäre Datei und os.replace)."""
+    memo_file = Path(cache_dir) / 'file_hashes.json'
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    tmp_file = memo_file.with_suffix(f'.{uuid.uuid4().hex}.tmp')
+    tmp_file.write_text(json.dumps(memo), encoding='utf-8')
+    os.replace(tmp_file, memo_file)
+def prune_file_hashes(cache_dir):
+    """
+    Entfernt gemerkte Hashes von Dateien, die es nicht mehr gibt, damit file_hashes.json nicht mit jedem jemals
+    geladenen Pfad wächst.
+
+    :param cache_dir: Cache-Verzeichnis
+    :return: Anzahl der entfernten Einträge
+    """
+    memo = read_file_hashes(cache_dir)
+    existing = {path: entry for path, entry in memo.items() if os.path.isfile(path)}
+    if len(existing) < len(memo):
+        write_file_hashes(cache_dir, existing)
+    return len(memo) - len(existing)
+
+
+# --- Einträge lesen und schreiben --- #
+def read_cache_entry(cache_dir, key):
+    """
+    Liest einen Cache-Eintrag als Memory-Maps ein und markiert ihn als zuletzt verwendet.
+
+    :param cache_dir: Cache-Verzeichnis
+    :param key: Schlüssel des Eintrags
+    :return: Dictionary Name -> Array (bzw. Metadaten unter 'meta') oder None, wenn nicht vorhanden
+    """
+    entry_dir = Path(cache_dir) / key
+    meta_file = entry_dir / 'meta.json'
+    if not meta_file.is_file():
+        return None
+    entry = {'meta': json.loads(meta_file.read_text(encoding='utf-8'))}
+    for name in entry['meta']['arrays']:
+        entry[name] = np.load(entry_dir / f'{name}.npy', mmap_mode='r')
+    os.utime(meta_file)  # LRU-Zeitstempel
+    return entry
+def write_cache_entry(cache_dir, key, arrays, meta=None, max_cache_bytes=DEFAULT_MAX_CACHE_BYTES):
+    """
+    Schreibt Arrays als .npy-Dateien in einen neuen Cache-Eintrag (atomar über ein temporäres Verzeichnis)
+    und verdrängt danach die am längsten nicht verwendeten Einträge, bis die Größengrenze eingehalten ist.
+
+    :param cache_dir: Cache-Verzeichnis
+    :param key: Schlüssel des Eintrags
+    :param arrays: Dictionary Name -> NumPy-Array
+    :param meta: Zusätzliche JSON-serialisierbare Metadaten
+    :param max_cache_bytes: Maximale Gesamtgröße des Caches in Byte
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_dir = cache_dir / f'.tmp_{uuid.uuid4().hex}'
+    tmp_dir.mkdir()
+    try:
+        for name, array in arrays.items():
+            np.save(tmp_dir / f'{name}.npy', np.ascontiguousarray(array))
+        meta = dict(meta or {})
+        meta['arrays'] = list(arrays.keys())
+        (tmp_dir / 'meta.json').write_text(json.dumps(meta), encoding='utf-8')
+        os.replace(tmp_dir, cache_dir / key)
+    except OSError:
+        # Eintrag existiert bereits (paralleler Lauf) oder Schreibfehler: Cache ist nur eine Optimierung
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    evict_cache_entries(cache_dir, max_cache_bytes, keep=key)
+def directory_size(directory):
+    """Summe der Dateigrößen eines Verzeichnisses (ohne Unterverzeichnisse) in Byte."""
+    return sum(f.stat().st_size for f in Path(directory).iterdir() if f.is_file())
+def evict_cache_entries(cache_dir, max_cache_bytes=DEFAULT_MAX_CACHE_BYTES, keep=None):
+    """
+    Entfernt die am längsten nicht verwendeten Einträge (LRU), bis der Cache höchstens max_cache_bytes groß ist.
+    Reste früher nicht vollständig gelöschter Einträge (ohne meta.json) werden zuerst entfernt. Einträge, die
+    sich nicht löschen lassen (unter Windows z. B. noch als Memory-Map geöffnet), werden übersprungen und
+    nicht als entfernt gezählt. Zusätzlich werden gemerkte Hashes nicht mehr vorhandener Dateien entfernt.
+
+    :param cache_dir: Cache-Verzeichnis
+    :param max_cache_bytes: Maximale Gesamtgröße des Caches in Byte
+    :param keep: Schlüssel eines Eintrags, der nicht entfernt werden darf
+    :return: Liste der entfernten Schlüssel
+    """
+    prune_file_hashes(cache_dir)
+    entries = []
+    for entry_dir in Path(cache_dir).iterdir():
+        if not entry_dir.is_dir() or entry_dir.name.startswith('.tmp_'):
+            continue
+        meta_file = entry_dir / 'meta.json'
+        # Reste ohne meta.json sind keine gültigen Einträge mehr und werden zuerst entfernt
+        last_used = meta_file.stat().st_mtime if meta_file.is_file() else float('-inf')
+        entries.append((last_used, entry_dir, directory_size(entry_dir)))
+
+    total = sum(size for _, _, size in entries)
+    removed = []
+    failed = []
+    for last_used, entry_dir, size in sorted(entries, key=lambda entry: entry[0]):
+        if total <= max_cache_bytes and last_used != float('-inf'):
+            break
+        if entry_dir.name == keep:
+            continue
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        if entry_dir.exists():
+            # Teilweise gelöscht: nur den tatsächlich freigegebenen Platz abziehen
+            total -= size - directory_size(entry_dir)
+            failed.append(entry_dir.name)
+            continue
+        total -= size
+        removed.append(entry_dir.name)
+    if removed:
+        print(f"Netz-Cache: {len(removed)} Einträge verdrängt, Größe jetzt {total / 1e6:.1f} MB")
+    if failed:
+        print(f"Netz-Cache: {len(failed)} Einträge noch in Verwendung und nicht gelöscht, "
+              f"Größe jetzt {total / 1e6:.1f} MB")
+    return removed
+
+
+# --- Netze und Dreiecksindizes mit Cache --- #
+def load_mesh_cached(file_path, indexed=False, weld_tolerance=1e-6, cache_dir=DEFAULT_CACHE_DIR,
+                     max_cache_bytes=DEFAULT_MAX_CACHE_BYTES):
+    """
+    Lädt ein STL-Netz über den Cache. Binäre STL-Dateien werden ohnehin ohne Kopie abgebildet und daher nur
+    in verschweißter (indizierter) Form gecacht; ASCII-Dateien werden nach dem ersten Parsen als .npy abgelegt.
+    IFC-, XYZ-Dateien und ASCII-Raster (read_terrain_file) werden immer als indizierte Netze gecacht, damit sie
+    nur einmal tesselliert bzw. geparst werden.
+
+    :param file_path: Pfad zur STL-, IFC-, XYZ- oder ASCII-Rasterdatei
+    :param indexed: Indiziertes Netz (weld_vertices) statt Dreiecksarray laden
+    :param weld_tolerance: Schweißtoleranz für indizierte Netze [m]
+    :param cache_dir: Cache-Verzeichnis
+    :param max_cache_bytes: Maximale Gesamtgröße des Caches in Byte
+    :return: Netz (Dreiecksarray oder indiziertes Netz, als Memory-Map) und Cache-Schlüssel des Netzes
+    """
+    file_key = file_cache_key(file_path, cache_dir)
+    stl_file = is_stl_file(file_path)
+    if stl_file and not indexed and is_binary_stl(file_path):
+        return read_terrain_file(file_path), f"{file_key}_triangles"
+
+    if not stl_file:
+        key = f"{file_key}_terrain"
+    else:
+        key = f"{file_key}_indexed_{weld_tolerance:g}" if indexed else f"{file_key}_triangles"
+    entry = read_cache_entry(cache_dir, key)
+    if entry is not None:
+        print(f"Netz-Cache-Treffer: {file_path}")
+        if 'faces' in entry:
+            return {'vertices': entry['vertices'], 'faces': entry['faces']}, key
+        return entry['triangles'], key
+
+    start_time = time.perf_counter()
+    triangles = read_terrain_file(file_path)
+    if is_indexed_mesh(triangles):
+        terrain_mesh = triangles
+        arrays = dict(terrain_mesh)
+    elif indexed:
+        terrain_mesh = weld_vertices(triangles, weld_tolerance)
+        arrays = dict(terrain_mesh)
+    else:
+        terrain_mesh = triangles
+        arrays = {'triangles': triangles}
+    write_cache_entry(cache_dir, key, arrays, {'source': os.path.abspath(file_path)}, max_cache_bytes)
+    print(f"Netz-Cache aktualisiert: {file_path} ({time.perf_counter() - start_time:.2f} s)")
+    return terrain_mesh, key
+def load_spatial_index_cached(terrain_mesh, mesh_key, epsilon=1e-6, cache_dir=DEFAULT_CACHE_DIR,
+                              max_cache_bytes=DEFAULT_MAX_CACHE_BYTES):
+    """
+    Lädt den Dreiecksindex eines Netzes aus dem Cache oder baut und speichert ihn.
+
+    :param terrain_mesh: Netz aus load_mesh_cached
+    :param mesh_key: Cache-Schlüssel des Netzes aus load_mesh_cached
+    :param epsilon: Toleranzwert (wie bei build_triangle_grid_index)
+    :param cache_dir: Cache-Verzeichnis
+    :param max_cache_bytes: Maximale Gesamtgröße des Caches in Byte
+    :return: Index wie aus build_triangle_grid_index
+    """
+    key = f"{mesh_key}_gridindex_{epsilon:g}"
+    entry = read_cache_entry(cache_dir, key)
+    if entry is not None:
+        spatial_index = {name: entry['meta'][name] for name in INDEX_SCALAR_KEYS}
+        spatial_index['offsets'] = entry['offsets']
+        spatial_index['triangle_ids'] = entry['triangle_ids']
+        spatial_index['stats'] = dict(entry['meta']['stats'], cache_hit=True)
+        print(f"Dreiecksindex aus dem Cache geladen: {spatial_index['nx']} x {spatial_index['ny']} Buckets")
+        return spatial_index
+
+    spatial_index = build_triangle_grid_index(terrain_mesh, epsilon=epsilon)
+    meta = {name: spatial_index[name] for name in INDEX_SCALAR_KEYS}
+    meta['stats'] = spatial_index['stats']
+    write_cache_entry(cache_dir, key, {'offsets': spatial_index['offsets'],
+                                       'triangle_ids': spatial_index['triangle_ids']}, meta, max_cache_bytes)
+    spatial_index['stats']['cache_hit'] = False
+    return spatial_index
+def load_heights_cached(mesh_key, raster_definition, compute_heights, cache_dir=DEFAULT_CACHE_DIR,
+                        max_cache_bytes=DEFAULT_MAX_CACHE_BYTES):
+    """
+    Lädt das Höhenraster eines Zustands aus dem Cache oder berechnet und speichert es. Der Schlüssel besteht
+    aus dem Netz-Schlüssel und der Rasterdefinition, sodass ein unverändertes Netz auf demselben Raster
+    nicht erneut interpoliert wird, auch wenn sich das andere Netz geändert hat.
+
+    :param mesh_key: Cache-Schlüssel des Netzes aus load_mesh_cached
+    :param raster_definition: Hashbares Tupel, das das Raster und das Interpolationsverfahren beschreibt
+    :param compute_heights: Funktion ohne Argumente, die die Höhen als Dictionary von (N,)-Arrays berechnet
+                            ('z' und optional weitere Spalten wie 'coverage')
+    :param cache_dir: Cache-Verzeichnis
+    :param max_cache_bytes: Maximale Gesamtgröße des Caches in Byte
+    :return: Dictionary der (N,)-Arrays, z. B. Höhen unter 'z' (NaN ohne Abdeckung)
+    """
+    raster_hash = hashlib.blake2b(repr(raster_definition).encode('utf-8'), digest_size=8).hexdigest()
+    key = f"{mesh_key}_heights_{raster_hash}"
+    entry = read_cache_entry(cache_dir, key)
+    if entry is not None:
+        print(f"Höhenraster aus dem Cache geladen ({len(entry['z'])} Punkte)")
+        return {name: entry[name] for name in entry['meta']['arrays']}
+
+    arrays = compute_heights()
+    write_cache_entry(cache_dir, key, arrays, {'raster_definition': repr(raster_definition)}, max_cache_bytes)
+    return arrays
@@ -0,0 +1,90 @@
+# pipeline.py
+import os
+import time
+from collections import OrderedDict
+
+
+# --- Memoisierte Berechnungsstufen --- #
+def file_signature(file_path):
+    """
+    Kennung einer Eingabedatei für Stufenschlüssel: Pfad, Größe und Änderungszeit.
+    Wird die Datei überschrieben, ändert sich der Schlüssel und die Stufe wird neu berechnet.
+    """
+    stat = os.stat(file_path)
+    return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+def make_stage_key(stage, params, input_keys, data=None):
+    """
+    Bildet den Schlüssel einer Stufe aus ihrem Namen, den deklarierten Parametern, den Schlüsseln
+    der vorgelagerten Stufen (Kettenschlüssel) und optional den Werten einzelner Zwischenergebnisse.
+
+    :param stage: Stufendefinition (Dictionary mit 'name', 'params', 'inputs', optional 'file_params'
+                  und 'data_params')
+    :param params: Dictionary aller Parameter des Laufs
+    :param input_keys: Dictionary Stufenname -> Schlüssel der bereits ausgewerteten Stufen
+    :param data: Bisherige Zwischenergebnisse (für 'data_params')
+    :return: Hashbarer Schlüssel
+    """
+    values = []
+    for name in stage['params']:
+        value = params[name]
+        if name in stage.get('file_params', ()):
+            if isinstance(value, (list, tuple)):
+                value = tuple(file_signature(file_path) for file_path in value)
+            else:
+                value = file_signature(value)
+        elif isinstance(value, list):
+            value = tuple(value)
+        values.append((name, value))
+    # Zwischenergebnisse, die mit ihrem Wert statt mit dem Schlüssel ihrer Stufe eingehen
+    for name in stage.get('data_params', ()):
+        values.append((name, data[name]))
+    return stage['name'], tuple(values), tuple(input_keys[name] for name in stage['inputs'])
+def run_stages(stages, params, memo, options=None, max_entries_per_stage=3):
+    """
+    Führt Stufen in der angegebenen (topologischen) Reihenfolge aus. Eine Stufe wird nur berechnet, wenn sich
+    einer ihrer Parameter oder eine vorgelagerte Stufe geändert hat, sonst wird das Ergebnis aus memo übernommen.
+
+    Jede Stufe ist ein Dictionary mit
+        'name': Name der Stufe,
+        'params': Namen der Parameter, die das Ergebnis beeinflussen,
+        'inputs': Namen der vorgelagerten Stufen,
+        'function': function(params, data, options) -> Dictionary mit den Ergebnissen der Stufe,
+        optional 'data_params': Namen hashbarer Zwischenergebnisse, die mit ihrem Wert in den Schlüssel
+        eingehen. Damit hängt eine Stufe nur vom Ergebnis einer vorgelagerten Stufe ab und nicht davon,
+        wie es zustande kam (z. B. gleiche Rasterdefinition trotz geänderter Netze).
+    data enthält die Ergebnisse aller bisher ausgewerteten Stufen; options sind Ausführungsoptionen,
+    die das Ergebnis nicht verändern (z. B. Anzahl der Prozesse) und daher nicht in den Schlüssel eingehen.
+
+    :param stages: Liste der Stufendefinitionen
+    :param params: Dictionary aller Parameter des Laufs
+    :param memo: Dictionary Stufenname -> OrderedDict (Schlüssel -> Ergebnis), wird fortgeschrieben
+    :param options: Ausführungsoptionen
+    :param max_entries_per_stage: Anzahl der je Stufe behaltenen Ergebnisse (LRU)
+    :return: Zusammengeführte Ergebnisse aller Stufen und Bericht Stufenname -> {'cache_hit', 'time'}
+    """
+    options = options or {}
+    data = {}
+    keys = {}
+    report = {}
+    for stage in stages:
+        key = make_stage_key(stage, params, keys, data)
+        stage_memo = memo.setdefault(stage['name'], OrderedDict())
+
+        start_time = time.perf_counter()
+        if key in stage_memo:
+            stage_memo.move_to_end(key)
+            result = stage_memo[key]
+            cache_hit = True
+        else:
+            result = stage['function'](params, data, options)
+            stage_memo[key] = result
+            while len(stage_memo) > max_entries_per_stage:
+                stage_memo.popitem(last=False)
+            cache_hit = False
+
+        keys[stage['name']] = key
+        data.update(result)
+        report[stage['name']] = {'cache_hit': cache_hit, 'time': time.perf_counter() - start_time}
+        print(f"Stufe '{stage['name']}': {'Cache-Treffer' if cache_hit else 'berechnet'} "
+              f"({report[stage['name']]['time']:.3f} s)")
+    return data, report
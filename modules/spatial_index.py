@@ -0,0 +1,135 @@
+# spatial_index.py
+import time
+
+import numpy as np
+
+from modules.terrain_io import triangle_corners
+
+
+# --- Uniformes Bucket-Raster über die xy-Bounding-Boxen der Dreiecke --- #
+def build_triangle_grid_index(triangles, bucket_size=None, epsilon=1e-6, max_buckets_per_triangle=4):
+    """
+    Baut einen 2D-Index (uniformes Bucket-Raster) über die Dreiecke eines Netzes. Jedes Dreieck wird in alle
+    Buckets eingetragen, die seine xy-Bounding-Box überlappt. Die Einträge werden im CSR-Format gespeichert
+    (offsets + triangle_ids), innerhalb eines Buckets in aufsteigender Dreiecksreihenfolge.
+
+    :param triangles: Array der Form (T, 3, 3) mit den Dreiecken oder indiziertes Netz (z. B. aus load_stl_files)
+    :param bucket_size: Kantenlänge eines Buckets [m]; None wählt den Median der Dreiecksausdehnung
+    :param epsilon: Relative Toleranz, um die Bounding-Boxen wie bei der Interpolation zu erweitern
+    :param max_buckets_per_triangle: Obergrenze für das Verhältnis Buckets / Dreiecke (Speicherbegrenzung)
+    :return: Dictionary mit den Index-Arrays und Kennzahlen unter 'stats'
+    """
+    start_time = time.perf_counter()
+
+    corners = [triangle_corners(triangles, corner)[:, :2].astype(np.float64) for corner in range(3)]
+    tri_min = np.minimum(np.minimum(corners[0], corners[1]), corners[2])
+    tri_max = np.maximum(np.maximum(corners[0], corners[1]), corners[2])
+    num_triangles = len(tri_min)
+
+    # Bounding-Boxen um die Interpolationstoleranz erweitern, damit Randpunkte nicht verloren gehen
+    pad = epsilon * (tri_max - tri_min).max(axis=1, keepdims=True)
+    tri_min -= pad
+    tri_max += pad
+
+    origin = tri_min.min(axis=0) if num_triangles else np.zeros(2)
+    extent = (tri_max.max(axis=0) - origin) if num_triangles else np.ones(2)
+
+    if bucket_size is None:
+        bucket_size = float(np.median((tri_max - tri_min).max(axis=1))) if num_triangles else 1.0
+    if bucket_size <= 0:
+        bucket_size = float(max(extent.max(), 1.0) / max(np.sqrt(num_triangles), 1.0))
+
+    # Bucket-Anzahl begrenzen, damit das Raster nicht mehr Speicher als die Dreiecke belegt
+    max_buckets = max(max_buckets_per_triangle * num_triangles, 1)
+    while (np.floor(extent[0] / bucket_size) + 1) * (np.floor(extent[1] / bucket_size) + 1) > max_buckets:
+        bucket_size *= 2.0
+
+    nx = int(np.floor(extent[0] / bucket_size)) + 1
+    ny = int(np.floor(extent[1] / bucket_size)) + 1
+
+    ix0 = np.floor((tri_min[:, 0] - origin[0]) / bucket_size).astype(np.int64)
+    iy0 = np.floor((tri_min[:, 1] - origin[1]) / bucket_size).astype(np.int64)
+    ix1 = np.minimum(np.floor((tri_max[:, 0] - origin[0]) / bucket_size).astype(np.int64), nx - 1)
+    iy1 = np.minimum(np.floor((tri_max[:, 1] - origin[1]) / bucket_size).astype(np.int64), ny - 1)
+
+    # Jedes Dreieck auf alle überlappten Buckets aufspreizen
+    width = ix1 - ix0 + 1
+    counts = width * (iy1 - iy0 + 1)
+    entry_triangle = np.repeat(np.arange(num_triangles, dtype=np.int32), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    entry_width = np.repeat(width, counts)
+    entry_bucket = (np.repeat(iy0, counts) + local // entry_width) * nx + np.repeat(ix0, counts) + local % entry_width
+
+    # Nach (Bucket, Dreieck) sortieren: ein kombinierter int64-Schlüssel ist deutlich schneller als eine stabile
+    # argsort und erhält die Dreiecksreihenfolge innerhalb eines Buckets
+    entry_keys = np.sort(entry_bucket * max(num_triangles, 1) + entry_triangle)
+    triangle_ids = (entry_keys % max(num_triangles, 1)).astype(np.int32)
+    del entry_keys
+    offsets = np.zeros(nx * ny + 1, dtype=np.int64)
+    np.cumsum(np.bincount(entry_bucket, minlength=nx * ny), out=offsets[1:])
+
+    build_time = time.perf_counter() - start_time
+    bucket_counts = np.diff(offsets)
+    stats = {
+        'num_triangles': num_triangles,
+        'num_buckets': nx * ny,
+        'num_entries': len(triangle_ids),
+        'entries_per_triangle': len(triangle_ids) / max(num_triangles, 1),
+        'max_triangles_per_bucket': int(bucket_counts.max()) if len(bucket_counts) else 0,
+        'mean_triangles_per_occupied_bucket': float(bucket_counts[bucket_counts > 0].mean()) if np.any(bucket_counts) else 0.0,
+        'memory_bytes': offsets.nbytes + triangle_ids.nbytes,
+        'build_time': build_time
+    }
+    print(f"Dreiecksindex erstellt: {nx} x {ny} Buckets à {bucket_size:.3f} m, "
+          f"{stats['entries_per_triangle']:.2f} Einträge/Dreieck, "
+          f"{stats['memory_bytes'] / 1e6:.2f} MB, {build_time:.3f} s")
+
+    return {
+        'origin_x': float(origin[0]),
+        'origin_y': float(origin[1]),
+        'bucket_size': float(bucket_size),
+        'nx': nx,
+        'ny': ny,
+        'offsets': offsets,
+        'triangle_ids': triangle_ids,
+        'stats': stats
+    }
+def locate_buckets(index, points):
+    """
+    Bestimmt für jeden Punkt den Bucket des Index.
+
+    :param index: Index aus build_triangle_grid_index
+    :param points: NumPy-Array der Form (N, 2) mit den Punkten (x, y)
+    :return: Bucket-Nummer je Punkt, -1 für Punkte außerhalb des Rasters
+    """
+    points = np.asarray(points, dtype=np.float64)
+    ix = np.floor((points[:, 0] - index['origin_x']) / index['bucket_size']).astype(np.int64)
+    iy = np.floor((points[:, 1] - index['origin_y']) / index['bucket_size']).astype(np.int64)
+    inside = (ix >= 0) & (ix < index['nx']) & (iy >= 0) & (iy < index['ny'])
+    return np.where(inside, iy * index['nx'] + ix, -1)
+def query_triangle_grid_index(index, points):
+    """
+    Liefert für einen Block von Punkten alle Kandidaten-Dreiecke aus den jeweiligen Buckets als Paarliste.
+    Die Paare sind nach Punkt und innerhalb eines Punkts nach aufsteigender Dreiecksnummer sortiert.
+
+    :param index: Index aus build_triangle_grid_index
+    :param points: NumPy-Array der Form (N, 2) mit den Punkten (x, y)
+    :return: Punktindizes und Dreiecksindizes der Kandidatenpaare (je Form (K,))
+    """
+    start_time = time.perf_counter()
+    bucket = locate_buckets(index, points)
+    valid = bucket >= 0
+    starts = np.where(valid, index['offsets'][np.maximum(bucket, 0)], 0)
+    counts = np.where(valid, index['offsets'][np.maximum(bucket, 0) + 1], 0) - starts
+
+    point_ids = np.repeat(np.arange(len(bucket)), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    triangle_ids = index['triangle_ids'][np.repeat(starts, counts) + local]
+
+    # Abfragestatistik fortschreiben (Durchsatz in Punkten pro Sekunde)
+    stats = index['stats']
+    stats['query_points'] = stats.get('query_points', 0) + len(bucket)
+    stats['query_candidates'] = stats.get('query_candidates', 0) + len(triangle_ids)
+    stats['query_time'] = stats.get('query_time', 0.0) + time.perf_counter() - start_time
+    stats['query_throughput'] = stats['query_points'] / max(stats['query_time'], 1e-12)
+    return point_ids, triangle_ids
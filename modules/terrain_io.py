@@ -0,0 +1,429 @@
+# terrain_io.py
+import io
+import os
+import warnings
+
+import numpy as np
+from scipy.spatial import Delaunay
+
+# Aufbau eines Dreiecksdatensatzes in binären STL-Dateien (50 Byte)
+STL_RECORD_DTYPE = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vectors', '<f4', (3, 3)),
+    ('attribute', '<u2')
+])
+STL_HEADER_SIZE = 84
+
+
+# --- STL-Dateien lesen --- #
+def is_binary_stl(file_path):
+    """
+    Prüft, ob eine STL-Datei binär ist. Maßgeblich ist die Dateigröße (84 + 50 * Anzahl Dreiecke),
+    da auch binäre Dateien im Header mit "solid" beginnen können.
+
+    :param file_path: Pfad zur STL-Datei
+    :return: True für binäre, False für ASCII-STL-Dateien
+    """
+    file_size = os.path.getsize(file_path)
+    if file_size < STL_HEADER_SIZE:
+        return False
+    with open(file_path, 'rb') as f:
+        header = f.read(STL_HEADER_SIZE)
+    num_triangles = int(np.frombuffer(header, dtype='<u4', count=1, offset=80)[0])
+    return file_size == STL_HEADER_SIZE + num_triangles * STL_RECORD_DTYPE.itemsize
+def read_binary_stl(file_path):
+    """
+    Bildet eine binäre STL-Datei per np.memmap direkt als Dreiecksarray ab. Es wird nichts kopiert und
+    keine Normale berechnet; die Daten werden erst beim Zugriff vom Betriebssystem eingelesen.
+
+    :param file_path: Pfad zur binären STL-Datei
+    :return: Schreibgeschützte Sicht der Form (N, 3, 3) (float32) auf die Dreiecke der Datei
+    """
+    num_triangles = (os.path.getsize(file_path) - STL_HEADER_SIZE) // STL_RECORD_DTYPE.itemsize
+    if num_triangles == 0:
+        return np.empty((0, 3, 3), dtype=np.float32)
+    records = np.memmap(file_path, dtype=STL_RECORD_DTYPE, mode='r', offset=STL_HEADER_SIZE, shape=(num_triangles,))
+    return records['vectors']
+def mapped_file(array):
+    """Pfad der Datei, auf deren Memory-Map ein Array (auch über Sichten) liegt (read_binary_stl), sonst None."""
+    while array is not None:
+        if isinstance(array, np.memmap) and array.filename is not None:
+            return array.filename
+        array = getattr(array, 'base', None)
+    return None
+def read_ascii_stl(file_path, chunk_size=64 * 1024 * 1024):
+    """
+    Liest eine ASCII-STL-Datei blockweise ein. Jeder Block wird in Tokens zerlegt und die Koordinaten
+    hinter den "vertex"-Schlüsselwörtern werden vektorisiert extrahiert.
+
+    :param file_path: Pfad zur ASCII-STL-Datei
+    :param chunk_size: Blockgröße in Byte
+    :return: Dreiecksarray der Form (N, 3, 3) (float32)
+    """
+    vertex_blocks = []
+    remainder = b''
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            data = remainder + chunk
+            if not chunk:
+                remainder = b''
+            else:
+                # Nur bis zum letzten Zeilenende verarbeiten, der Rest gehört zum nächsten Block
+                cut = data.rfind(b'\n') + 1
+                data, remainder = data[:cut], data[cut:]
+
+            tokens = np.array(data.split())
+            if len(tokens):
+                vertex_pos = np.flatnonzero(tokens == b'vertex')
+                coords = tokens[vertex_pos[:, None] + np.arange(1, 4)]
+                vertex_blocks.append(coords.astype(np.float32))
+            if not chunk:
+                break
+
+    vertices = np.concatenate(vertex_blocks) if vertex_blocks else np.empty((0, 3), dtype=np.float32)
+    if len(vertices) % 3 != 0:
+        raise ValueError(f"Ungültige ASCII-STL-Datei (Anzahl der Eckpunkte nicht durch 3 teilbar): {file_path}")
+    return vertices.reshape(-1, 3, 3)
+def read_stl_triangles(file_path):
+    """
+    Lädt die Dreiecke einer STL-Datei. Binäre Dateien werden ohne Kopie per Memory-Mapping abgebildet,
+    ASCII-Dateien blockweise geparst.
+
+    :param file_path: Pfad zur STL-Datei
+    :return: Dreiecksarray der Form (N, 3, 3) (float32)
+    """
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"Die STL-Datei wurde nicht gefunden: {file_path}")
+    if is_binary_stl(file_path):
+        return read_binary_stl(file_path)
+    with open(file_path, 'rb') as f:
+        if not f.read(5).lower() == b'solid':
+            raise ValueError(f"Die Datei ist weder eine binäre noch eine ASCII-STL-Datei: {file_path}")
+    return read_ascii_stl(file_path)
+
+
+# --- Indiziertes Netz (gemeinsame Eckpunkte) --- #
+def weld_vertices(triangles, tolerance=1e-6):
+    """
+    Verschweißt die Eckpunkte eines STL-Dreiecksarrays zu einem indizierten Netz. Eckpunkte, die nach dem
+    Einrasten auf ein Gitter der Weite tolerance in dieselbe Zelle fallen, werden zu einem Eckpunkt
+    zusammengefasst (Koordinaten des ersten Vorkommens).
+
+    :param triangles: Dreiecksarray der Form (N, 3, 3)
+    :param tolerance: Schweißtoleranz [m]
+    :return: Indiziertes Netz als Dictionary mit 'vertices' (V, 3) und 'faces' (N, 3, int32)
+    """
+    corners = np.asarray(triangles).reshape(-1, 3)
+    keys = np.round(corners.astype(np.float64) / tolerance).astype(np.int64)
+
+    # Lexikographisch sortieren und Gruppen gleicher Schlüssel finden
+    order = np.lexsort((keys[:, 2], keys[:, 1], keys[:, 0]))
+    sorted_keys = keys[order]
+    group_start = np.ones(len(order), dtype=bool)
+    group_start[1:] = np.any(sorted_keys[1:] != sorted_keys[:-1], axis=1)
+    group_id = np.cumsum(group_start) - 1
+
+    inverse = np.empty(len(order), dtype=np.int32)
+    inverse[order] = group_id
+
+    # Je Gruppe das erste Vorkommen in Dateireihenfolge als Koordinate verwenden
+    first = np.full(int(group_id[-1]) + 1 if len(order) else 0, len(order), dtype=np.int64)
+    np.minimum.at(first, group_id, order)
+    vertices = np.ascontiguousarray(corners[first])
+
+    return {'vertices': vertices, 'faces': inverse.reshape(-1, 3)}
+def is_indexed_mesh(terrain_mesh):
+    """Prüft, ob ein Netz als indiziertes Netz (Dictionary mit 'vertices' und 'faces') vorliegt."""
+    return isinstance(terrain_mesh, dict) and 'vertices' in terrain_mesh and 'faces' in terrain_mesh
+def mesh_num_triangles(terrain_mesh):
+    """Gibt die Anzahl der Dreiecke eines Netzes zurück (Dreiecksarray oder indiziertes Netz)."""
+    return len(terrain_mesh['faces']) if is_indexed_mesh(terrain_mesh) else len(terrain_mesh)
+def mesh_vertices(terrain_mesh):
+    """Gibt alle Eckpunkte eines Netzes als (V, 3)-Array zurück (bei Dreiecksarrays mit Wiederholungen)."""
+    if is_indexed_mesh(terrain_mesh):
+        return terrain_mesh['vertices']
+    return np.asarray(terrain_mesh).reshape(-1, 3)
+def triangle_corners(terrain_mesh, corner):
+    """
+    Gibt die Koordinaten einer Ecke aller Dreiecke zurück, ohne das ganze Netz zu expandieren.
+
+    :param terrain_mesh: Dreiecksarray (N, 3, 3) oder indiziertes Netz
+    :param corner: Nummer der Ecke (0, 1 oder 2)
+    :return: Array der Form (N, 3)
+    """
+    if is_indexed_mesh(terrain_mesh):
+        return terrain_mesh['vertices'][terrain_mesh['faces'][:, corner]]
+    return np.asarray(terrain_mesh)[:, corner]
+def mesh_triangles(terrain_mesh):
+    """Gibt ein Netz als Dreiecksarray der Form (N, 3, 3) zurück (indizierte Netze werden expandiert)."""
+    if is_indexed_mesh(terrain_mesh):
+        return terrain_mesh['vertices'][terrain_mesh['faces']]
+    return np.asarray(terrain_mesh)
+def is_stl_file(file_path):
+    """Prüft anhand der Dateiendung, ob eine Datei eine STL-Datei ist."""
+    return os.path.splitext(file_path)[1].lower() == '.stl'
+def is_esri_ascii_grid(file_path):
+    """Prüft, ob eine Textdatei ein ESRI-ASCII-Raster ist (Kopfzeilen beginnen mit "ncols")."""
+    with open(file_path, 'rb') as f:
+        return f.read(5).lower() == b'ncols'
+def parse_float_line(line):
+    """Zerlegt eine Textzeile (Trennzeichen Leerraum, Komma oder Semikolon) in Zahlen, None bei Kopfzeilen."""
+    try:
+        return [float(token) for token in line.replace(b';', b' ').replace(b',', b' ').split()]
+    except ValueError:
+        return None
+def read_xyz_points(file_path, chunk_size=64 * 1024 * 1024):
+    """
+    Liest eine XYZ-Punktdatei (eine Zeile je Punkt: x y z [weitere Spalten]) blockweise ein. Jeder Block wird
+    bis zum letzten Zeilenende mit np.loadtxt geparst. Kopfzeilen am Dateianfang werden übersprungen; als
+    Trennzeichen sind Leerraum, Komma oder Semikolon möglich, bei Semikolon auch das Dezimalkomma.
+
+    :param file_path: Pfad zur XYZ-Datei
+    :param chunk_size: Blockgröße in Byte
+    :return: Punkte als Array der Form (N, 3) (float64, Landeskoordinaten brauchen die volle Genauigkeit)
+    """
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"Die XYZ-Datei wurde nicht gefunden: {file_path}")
+
+    point_blocks = []
+    with open(file_path, 'rb') as f:
+        # Kopfzeilen überspringen und das Format an der ersten Datenzeile erkennen
+        while True:
+            data_start = f.tell()
+            line = f.readline()
+            if not line:
+                return np.empty((0, 3))
+            if line.strip() and parse_float_line(line) is not None:
+                break
+        if len(parse_float_line(line)) < 3:
+            raise ValueError(f"Ungültige XYZ-Datei (weniger als drei Spalten): {file_path}")
+        delimiter = None
+        decimal_comma = b';' in line and b',' in line
+        if b';' in line:
+            delimiter = ';'
+        elif b',' in line:
+            delimiter = ','
+        f.seek(data_start)
+
+        remainder = b''
+        while True:
+            chunk = f.read(chunk_size)
+            data = remainder + chunk
+            if chunk:
+                # Nur bis zum letzten Zeilenende verarbeiten, der Rest gehört zum nächsten Block
+                cut = data.rfind(b'\n') + 1
+                data, remainder = data[:cut], data[cut:]
+            if decimal_comma:
+                data = data.replace(b',', b'.')
+            if data.strip():
+                point_blocks.append(np.loadtxt(io.BytesIO(data), delimiter=delimiter, usecols=(0, 1, 2), ndmin=2))
+            if not chunk:
+                break
+
+    return np.concatenate(point_blocks) if point_blocks else np.empty((0, 3))
+def read_esri_ascii_grid(file_path, chunk_size=64 * 1024 * 1024):
+    """
+    Liest ein ESRI-ASCII-Raster (.asc) ein. Die Kopfzeilen (ncols, nrows, xllcorner/xllcenter,
+    yllcorner/yllcenter, cellsize, NODATA_value) werden ausgewertet, die Höhenwerte blockweise in ein
+    vorab angelegtes Array geparst.
+
+    :param file_path: Pfad zur ASCII-Rasterdatei
+    :param chunk_size: Blockgröße in Byte
+    :return: x- und y-Koordinaten der Rasterpunkte (aufsteigend) und Höhen der Form (ny, nx), NaN = keine Daten
+    """
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"Die Rasterdatei wurde nicht gefunden: {file_path}")
+
+    header = {}
+    with open(file_path, 'rb') as f:
+        while True:
+            data_start = f.tell()
+            tokens = f.readline().split()
+            if len(tokens) != 2 or not tokens[0][:1].isalpha():
+                break
+            header[tokens[0].decode().lower()] = float(tokens[1])
+        f.seek(data_start)
+        # Zeilennummer (ab 1) der ersten Zeile des aktuellen Blocks für Fehlermeldungen
+        line_number = len(header) + 1
+
+        missing = {'ncols', 'nrows', 'cellsize'} - header.keys()
+        if missing or not {'xllcorner', 'xllcenter'} & header.keys():
+            raise ValueError(f"Ungültiges ESRI-ASCII-Raster (Kopfzeilen unvollständig): {file_path}")
+        num_cols, num_rows = int(header['ncols']), int(header['nrows'])
+
+        values = np.empty(num_rows * num_cols)
+        count = 0
+        remainder = b''
+        while True:
+            chunk = f.read(chunk_size)
+            data = remainder + chunk
+            if chunk:
+                # Nur ganze Zeilen verarbeiten (bei überlangen Zeilen bis zum letzten Leerzeichen),
+                # damit keine Zahl geteilt wird und Fehler einer Zeile zugeordnet werden können
+                cut = data.rfind(b'\n') + 1 or data.rfind(b' ') + 1
+                data, remainder = data[:cut], data[cut:]
+            try:
+                with warnings.catch_warnings():
+                    # Ältere NumPy-Versionen brechen bei ungültigen Werten nur mit einer Warnung ab
+                    warnings.simplefilter('error', DeprecationWarning)
+                    block = np.fromstring(data, sep=' ') if data.strip() else np.empty(0)
+            except (ValueError, DeprecationWarning):
+                row, token = find_invalid_grid_value(data, line_number)
+                raise ValueError(
+                    f"Ungültiges ESRI-ASCII-Raster (ungültiger Wert '{token}' in Zeile {row}): {file_path}"
+                ) from None
+            if count + len(block) > len(values):
+                row = line_number + count_lines_until_value(data, len(values) - count)
+                raise ValueError(
+                    f"Ungültiges ESRI-ASCII-Raster (mehr Werte als ncols x nrows ab Zeile {row}): {file_path}"
+                )
+            values[count:count + len(block)] = block
+            count += len(block)
+            line_number += data.count(b'\n')
+            if not chunk:
+                break
+    if count != len(values):
+        raise ValueError(f"Ungültiges ESRI-ASCII-Raster ({count} statt {len(values)} Werte): {file_path}")
+
+    if 'nodata_value' in header:
+        values[values == header['nodata_value']] = np.nan
+    cell_size = header['cellsize']
+    # Bei Eckkoordinaten liegen die Rasterpunkte in den Zellmitten
+    x_start = header['xllcenter'] if 'xllcenter' in header else header['xllcorner'] + 0.5 * cell_size
+    y_start = header['yllcenter'] if 'yllcenter' in header else header['yllcorner'] + 0.5 * cell_size
+    x_coords = x_start + cell_size * np.arange(num_cols)
+    y_coords = y_start + cell_size * np.arange(num_rows)
+    # Die erste Zeile der Datei ist die nördlichste
+    return x_coords, y_coords, values.reshape(num_rows, num_cols)[::-1]
+def find_invalid_grid_value(data, first_line):
+    """
+    Sucht den ersten Wert eines Datenblocks, der sich nicht als Zahl lesen lässt (nur im Fehlerfall).
+
+    :param data: Datenblock aus ganzen Zeilen (Bytes)
+    :param first_line: Zeilennummer der ersten Zeile des Blocks in der Datei
+    :return: Zeilennummer und ungültiger Wert (erste Zeile und leerer Wert, wenn keiner gefunden wird)
+    """
+    for offset, line in enumerate(data.split(b'\n')):
+        for token in line.split():
+            try:
+                float(token)
+            except ValueError:
+                return first_line + offset, token.decode(errors='replace')
+    return first_line, ''
+def count_lines_until_value(data, num_values):
+    """Anzahl der Zeilenumbrüche eines Datenblocks vor dem Wert mit dem Index num_values (nur im Fehlerfall)."""
+    for offset, line in enumerate(data.split(b'\n')):
+        num_values -= len(line.split())
+        if num_values < 0:
+            return offset
+    return data.count(b'\n')
+def points_to_grid(points, rel_tolerance=1e-3, min_fill=0.5):
+    """
+    Prüft, ob Punkte auf einem regelmäßigen Raster liegen (wie bei Rasterexporten als XYZ), und ordnet sie
+    in diesem Fall in ein Höhenraster ein. Lücken im Raster sind erlaubt, solange mindestens min_fill der
+    Rasterpunkte belegt sind.
+
+    :param points: Punkte der Form (N, 3)
+    :param rel_tolerance: Zulässige Abweichung vom Raster relativ zur Rasterweite
+    :param min_fill: Mindestanteil belegter Rasterpunkte
+    :return: x- und y-Koordinaten und Höhen der Form (ny, nx) wie read_esri_ascii_grid oder None
+    """
+    if len(points) < 4:
+        return None
+    grid_axes = []
+    for axis in range(2):
+        unique_coords = np.unique(points[:, axis])
+        if len(unique_coords) < 2:
+            return None
+        spacing = np.diff(unique_coords).min()
+        num_coords = int(round((unique_coords[-1] - unique_coords[0]) / spacing)) + 1
+        grid_axes.append((unique_coords[0], spacing, num_coords))
+    (x_start, dx, nx), (y_start, dy, ny) = grid_axes
+    if nx * ny * min_fill > len(points):
+        return None
+
+    ix = np.rint((points[:, 0] - x_start) / dx).astype(np.int64)
+    iy = np.rint((points[:, 1] - y_start) / dy).astype(np.int64)
+    on_grid = (np.abs(points[:, 0] - x_start - ix * dx) <= rel_tolerance * dx) & \
+              (np.abs(points[:, 1] - y_start - iy * dy) <= rel_tolerance * dy)
+    if not on_grid.all() or np.bincount(iy * nx + ix, minlength=nx * ny).max() > 1:
+        return None
+
+    z_grid = np.full((ny, nx), np.nan)
+    z_grid[iy, ix] = points[:, 2]
+    return x_start + dx * np.arange(nx), y_start + dy * np.arange(ny), z_grid
+def grid_to_mesh(x_coords, y_coords, z_grid):
+    """
+    Bildet ein Höhenraster ohne Triangulierung direkt als indiziertes Netz ab: Jede Rasterzelle ergibt zwei
+    Dreiecke (gegen den Uhrzeigersinn), Dreiecke mit fehlenden Höhen (NaN) entfallen.
+
+    :param x_coords: x-Koordinaten der Rasterpunkte (aufsteigend)
+    :param y_coords: y-Koordinaten der Rasterpunkte (aufsteigend)
+    :param z_grid: Höhen der Form (ny, nx)
+    :return: Indiziertes Netz als Dictionary mit 'vertices' (V, 3) und 'faces' (N, 3, int32)
+    """
+    valid = ~np.isnan(z_grid)
+    rows, cols = np.nonzero(valid)
+    vertices = np.column_stack([x_coords[cols], y_coords[rows], z_grid[rows, cols]])
+    vertex_ids = np.full(z_grid.shape, -1, dtype=np.int64)
+    vertex_ids[rows, cols] = np.arange(len(rows))
+
+    v00 = vertex_ids[:-1, :-1].ravel()
+    v10 = vertex_ids[:-1, 1:].ravel()
+    v01 = vertex_ids[1:, :-1].ravel()
+    v11 = vertex_ids[1:, 1:].ravel()
+    faces = np.concatenate([np.column_stack([v00, v10, v11]), np.column_stack([v00, v11, v01])])
+    faces = faces[(faces >= 0).all(axis=1)].astype(np.int32)
+    return {'vertices': vertices, 'faces': faces}
+def triangulate_points(points, max_edge_length=None):
+    """
+    Trianguliert unregelmäßig verteilte Punkte (Delaunay in der xy-Ebene, scipy.spatial.Delaunay). Da die
+    Delaunay-Triangulierung die konvexe Hülle füllt, können Dreiecke mit längeren Kanten als max_edge_length
+    (z. B. über Buchten des Aufnahmegebiets) verworfen werden.
+
+    :param points: Punkte der Form (N, 3)
+    :param max_edge_length: Größte zulässige Kantenlänge in der xy-Ebene [m] (None = alle Dreiecke behalten)
+    :return: Indiziertes Netz als Dictionary mit 'vertices' (V, 3) und 'faces' (N, 3, int32)
+    """
+    # Um den Schwerpunkt verschieben, damit Qhull nicht mit großen Landeskoordinaten rechnet
+    xy = points[:, :2] - points[:, :2].mean(axis=0)
+    faces = Delaunay(xy).simplices.astype(np.int32)
+
+    corners = xy[faces]
+    edges = corners[:, [1, 2, 0]] - corners
+    if max_edge_length is not None:
+        short = (np.hypot(edges[:, :, 0], edges[:, :, 1]) <= max_edge_length).all(axis=1)
+        faces, edges = faces[short], edges[short]
+    # Einheitlich gegen den Uhrzeigersinn orientieren
+    clockwise = edges[:, 0, 0] * edges[:, 1, 1] - edges[:, 0, 1] * edges[:, 1, 0] < 0
+    faces[clockwise] = faces[clockwise][:, [0, 2, 1]]
+    return {'vertices': np.ascontiguousarray(points), 'faces': faces}
+def read_terrain_file(file_path, max_edge_length=None):
+    """
+    Lädt ein Geländemodell als Netz. STL-Dateien werden wie bisher gelesen (read_stl_triangles), ESRI-ASCII-Raster
+    und auf einem Raster liegende XYZ-Punkte werden ohne Triangulierung als Netz abgebildet (grid_to_mesh),
+    unregelmäßige XYZ-Punkte per Delaunay trianguliert (triangulate_points). Aus IFC-Dateien werden die
+    Geländeelemente tesselliert (modules/ifc_terrain.py).
+
+    :param file_path: Pfad zur STL-, IFC-, XYZ- oder ASCII-Rasterdatei
+    :param max_edge_length: Größte Kantenlänge bei der Triangulierung unregelmäßiger Punkte [m]
+    :return: Dreiecksarray (STL) oder indiziertes Netz (IFC, XYZ, ASCII-Raster)
+    """
+    if is_stl_file(file_path):
+        return read_stl_triangles(file_path)
+    if not os.path.isfile(file_path):
+        raise FileNotFoundError(f"Die Geländedatei wurde nicht gefunden: {file_path}")
+    if os.path.splitext(file_path)[1].lower() == '.ifc':
+        # IfcOpenShell erst hier importieren, reine STL-/XYZ-Läufe brauchen es nicht
+        from modules.ifc_terrain import read_ifc_terrain
+        return read_ifc_terrain(file_path)
+    if is_esri_ascii_grid(file_path):
+        return grid_to_mesh(*read_esri_ascii_grid(file_path))
+
+    points = read_xyz_points(file_path)
+    grid = points_to_grid(points)
+    if grid is not None:
+        return grid_to_mesh(*grid)
+    print(f"Unregelmäßige Punkte, Delaunay-Triangulierung: {file_path} ({len(points)} Punkte)")
+    return triangulate_points(points, max_edge_length)
@@ -0,0 +1,1002 @@
+# transport_solvers.py
+import time
+
+import numpy as np
+from scipy.optimize import linprog
+from scipy.sparse import coo_matrix, csr_matrix, hstack, identity, vstack
+from scipy.spatial import cKDTree
+from scipy.spatial.distance import cdist
+
+
+# --- Netzwerk-Simplex für das Transportproblem --- #
+def balance_with_depot(supply, demand, cost_matrix):
+    """
+    Gleicht ein unausgeglichenes Transportproblem über die Deponie aus: Sie wird als zusätzlicher Defizitpunkt
+    (Überschuss größer als Defizit) bzw. Überschusspunkt (sonst) mit Kosten 0 angehängt. Die Deponiekosten
+    sind je m³ für alle Punkte gleich und beeinflussen die Verteilung daher nicht.
+
+    :param supply: Überschussmengen (m,)
+    :param demand: Defizitmengen als positive Werte (n,)
+    :param cost_matrix: Kosten je m³ der Form (m, n)
+    :return: Ausgeglichene Mengen und Kostenmatrix (eine Zeile oder Spalte mehr)
+    """
+    supply = np.asarray(supply, dtype=np.float64)
+    demand = np.asarray(demand, dtype=np.float64)
+    cost_matrix = np.asarray(cost_matrix, dtype=np.float64)
+    imbalance = supply.sum() - demand.sum()
+    if imbalance >= 0:
+        return supply, np.append(demand, imbalance), np.hstack([cost_matrix, np.zeros((len(supply), 1))])
+    return np.append(supply, -imbalance), demand, np.vstack([cost_matrix, np.zeros((1, len(demand)))])
+def solve_transport_network_simplex(supply, demand, cost_matrix, tolerance=1e-9, block_size=None,
+                                    candidates_per_block=32):
+    """
+    Löst das Transportproblem mit dem primalen Netzwerk-Simplex auf dem bipartiten Graphen Überschuss -> Defizit
+    (ohne LP-Modell und ohne Variablenobjekte). Die Basis ist ein stark zulässiger Spannbaum (Cunningham), der
+    mit künstlichen Kanten zu einer Wurzel startet; Baumstruktur und Flüsse liegen in Python-Listen. Die
+    eintretenden Kanten werden per Blocksuche bestimmt: Die reduzierten Kosten eines Blocks von Zeilen der
+    Kostenmatrix werden vektorisiert bewertet, seine stärksten Verbesserungen nacheinander (mit aktuellen
+    Potentialen erneut geprüft) in die Basis genommen und die Blöcke reihum durchlaufen.
+
+    :param supply: Überschussmengen (m,)
+    :param demand: Defizitmengen als positive Werte (n,)
+    :param cost_matrix: Kosten je m³ der Form (m, n), z. B. die Distanzmatrix
+    :param tolerance: Relative Toleranz für negative reduzierte Kosten
+    :param block_size: Anzahl der Matrixeinträge je Block (None = 4 x Wurzel der Kantenzahl, mindestens eine Zeile)
+    :param candidates_per_block: Anzahl der Kandidaten, die je bewertetem Block geprüft werden
+    :return: Dictionary mit 'flows' (m, n), 'depot_flows' (Mengen zur bzw. von der Deponie je Punkt),
+             'depot_transport' (positiv zur Deponie), 'objective' (ohne Deponiekosten), 'supply_duals',
+             'demand_duals' (Schattenpreise je m³), 'iterations', 'time'
+    """
+    start_time = time.perf_counter()
+    num_excess, num_deficit = np.shape(cost_matrix)
+    supply, demand, costs = balance_with_depot(supply, demand, cost_matrix)
+    num_rows, num_cols = costs.shape
+    root = num_rows + num_cols
+    epsilon = tolerance * max(float(costs.max()) if costs.size else 0.0, 1.0)
+    big_cost = (float(costs.max()) if costs.size else 0.0) * (root + 1) + 1.0
+    if block_size is None:
+        block_size = 4 * int(np.sqrt(costs.size))
+    rows_per_block = max(1, block_size // num_cols)
+    block_starts = list(range(0, num_rows, rows_per_block))
+
+    # Startbaum: künstliche Kanten Überschuss -> Wurzel und Wurzel -> Defizit (Knoten 0..m-1, m..m+n-1)
+    parent = [root] * root + [-1]
+    depth = [1] * root + [0]
+    children = [set() for _ in range(root)] + [set(range(root))]
+    tail = list(range(num_rows)) + [root] * num_cols + [-1]
+    head = [root] * num_rows + list(range(num_rows, root)) + [-1]
+    flow = supply.tolist() + demand.tolist() + [0.0]
+    arc_cost = [big_cost] * root + [0.0]
+    # Potentiale pi mit c_ij + pi_i - pi_j = 0 auf den Baumkanten (Liste für Einzelzugriffe, Array für die Blöcke)
+    potential = [-big_cost] * num_rows + [big_cost] * num_cols + [0.0]
+    potentials = np.array(potential)
+
+    iterations = 0
+    block = 0
+    blocks_without_pivot = 0
+    while blocks_without_pivot < len(block_starts):
+        # Blocksuche: kleinste reduzierte Kosten im aktuellen Zeilenblock
+        row_start = block_starts[block]
+        row_end = min(row_start + rows_per_block, num_rows)
+        block = (block + 1) % len(block_starts)
+        reduced = costs[row_start:row_end] + potentials[row_start:row_end, None] - potentials[None, num_rows:root]
+        candidates = np.flatnonzero(reduced < -epsilon)
+        if len(candidates) == 0:
+            blocks_without_pivot += 1
+            continue
+        blocks_without_pivot = 0
+        if len(candidates) > candidates_per_block:
+            candidates = candidates[np.argpartition(reduced.flat[candidates], candidates_per_block)[:candidates_per_block]]
+        candidates = candidates[np.argsort(reduced.flat[candidates])]
+        candidate_costs = costs[row_start:row_end].flat[candidates].tolist()
+
+        for entering, entering_cost in zip(candidates.tolist(), candidate_costs):
+            a, b = divmod(entering, num_cols)
+            a += row_start
+            b += num_rows
+            reduced_cost = entering_cost + potential[a] - potential[b]
+            if reduced_cost >= -epsilon:
+                continue
+            iterations += 1
+
+            # Kreis über den Baum: Wege von a und b bis zum gemeinsamen Vorfahren (join)
+            path_a, path_b = [], []
+            x, y = a, b
+            while x != y:
+                if depth[x] >= depth[y]:
+                    path_a.append(x)
+                    x = parent[x]
+                else:
+                    path_b.append(y)
+                    y = parent[y]
+
+            # Austretende Kante: letzte blockierende Kante in Kreisrichtung ab join (stark zulässige Basis)
+            delta = float('inf')
+            leaving = -1
+            for node in reversed(path_a):
+                if tail[node] == node and flow[node] <= delta:
+                    delta = flow[node]
+                    leaving = node
+            for node in path_b:
+                if head[node] == node and flow[node] <= delta:
+                    delta = flow[node]
+                    leaving = node
+
+            # Flüsse entlang des Kreises a -> b -> join -> a anpassen
+            for node in path_a:
+                flow[node] += delta if tail[node] == parent[node] else -delta
+            for node in path_b:
+                flow[node] += delta if tail[node] == node else -delta
+
+            # Baum umhängen: Der von der austretenden Kante abgetrennte Teilbaum hängt künftig an der neuen Kante
+            if leaving in path_a:
+                inner, outer, shift = a, b, -reduced_cost
+            else:
+                inner, outer, shift = b, a, reduced_cost
+            children[parent[leaving]].discard(leaving)
+            node = inner
+            new_parent = outer
+            arc = (a, b, delta, entering_cost)
+            while True:
+                old_parent = parent[node]
+                old_arc = (tail[node], head[node], flow[node], arc_cost[node])
+                parent[node] = new_parent
+                tail[node], head[node], flow[node], arc_cost[node] = arc
+                children[new_parent].add(node)
+                if node == leaving:
+                    break
+                children[old_parent].discard(node)
+                new_parent, node, arc = node, old_parent, old_arc
+
+            # Tiefen und Potentiale im umgehängten Teilbaum nachführen
+            subtree = [inner]
+            for node in subtree:
+                depth[node] = depth[parent[node]] + 1
+                potential[node] += shift
+                subtree.extend(children[node])
+            potentials[subtree] += shift
+
+    flows = np.zeros((num_rows, num_cols))
+    for node in range(root):
+        if tail[node] != root and head[node] != root and flow[node] != 0.0:
+            flows[tail[node], head[node] - num_rows] += flow[node]
+    artificial_flow = sum(flow[node] for node in range(root) if tail[node] == root or head[node] == root)
+    if artificial_flow > tolerance * max(float(supply.sum()), 1.0):
+        raise ValueError(f"Transportproblem unzulässig ({artificial_flow:.6f} m³ ohne Ziel)")
+
+    # Deponie wieder abtrennen (letzte Spalte bzw. Zeile); die Duale werden auf die Deponie bezogen (Potential 0),
+    # damit sie den Schattenpreisen des LP mit Ungleichungen auf der größeren Seite entsprechen
+    if num_cols > num_deficit:
+        depot_flows = flows[:, num_deficit]
+        depot_node = num_rows + num_deficit
+    else:
+        depot_flows = flows[num_excess]
+        depot_node = num_excess
+    flows = flows[:num_excess, :num_deficit]
+    potentials = np.array(potential) - potential[depot_node]
+    return {
+        'flows': flows,
+        'depot_flows': depot_flows,
+        'depot_transport': float(supply[:num_excess].sum() - demand[:num_deficit].sum()),
+        'objective': float(np.sum(flows * costs[:num_excess, :num_deficit])),
+        'supply_duals': -potentials[:num_excess],
+        'demand_duals': potentials[num_rows:num_rows + num_deficit],
+        'iterations': iterations,
+        'time': time.perf_counter() - start_time
+    }
+
+
+
+# --- LP in Matrixform mit HiGHS (scipy.optimize.linprog) --- #
+def transport_constraint_matrices(num_excess, num_deficit, num_extra_columns=0):
+    """
+    Baut die Angebots- und Nachfragezeilen des Transportproblems direkt im CSR-Format auf. Die Variable x_ij
+    hat den Index i * n + j; Zeile i der Angebotsmatrix summiert über j, Zeile j der Nachfragematrix über i.
+
+    :param num_excess: Anzahl der Überschusspunkte m
+    :param num_deficit: Anzahl der Defizitpunkte n
+    :param num_extra_columns: Anzahl weiterer Variablen hinter den m * n Transportmengen (ohne Einträge)
+    :return: Angebotsmatrix (m, m * n + extra) und Nachfragematrix (n, m * n + extra)
+    """
+    num_vars = num_excess * num_deficit
+    shape_columns = num_vars + num_extra_columns
+    ones = np.ones(num_vars)
+    supply_matrix = csr_matrix(
+        (ones, np.arange(num_vars, dtype=np.int64), np.arange(num_excess + 1, dtype=np.int64) * num_deficit),
+        shape=(num_excess, shape_columns)
+    )
+    demand_columns = np.arange(num_vars, dtype=np.int64).reshape(num_excess, num_deficit).T.ravel()
+    demand_matrix = csr_matrix(
+        (ones, demand_columns, np.arange(num_deficit + 1, dtype=np.int64) * num_excess),
+        shape=(num_deficit, shape_columns)
+    )
+    return supply_matrix, demand_matrix
+def solve_transport_highs(supply, demand, cost_matrix, depot_distance=0.0):
+    """
+    Löst das Transportproblem als LP in Matrixform mit HiGHS im selben Prozess (scipy.optimize.linprog), ohne
+    LP-Datei, CBC-Prozess und Variablenobjekte. Das Modell entspricht dem PuLP-Modell: Transportmengen x_ij,
+    Depot-Transport t (frei) und |t|; die größere Seite als Ungleichung, Bilanz t = Angebot - Nachfrage.
+
+    :param supply: Überschussmengen (m,)
+    :param demand: Defizitmengen als positive Werte (n,)
+    :param cost_matrix: Kosten je m³ der Form (m, n), z. B. die Distanzmatrix
+    :param depot_distance: Kosten je m³ zur bzw. von der Deponie
+    :return: Dictionary wie solve_transport_network_simplex ('flows', 'depot_transport', 'objective' ohne
+             Deponiekosten, 'supply_duals', 'demand_duals') und zusätzlich 'balance_dual', 'status', 'message'
+    """
+    start_time = time.perf_counter()
+    supply = np.asarray(supply, dtype=np.float64)
+    demand = np.asarray(demand, dtype=np.float64)
+    cost_matrix = np.asarray(cost_matrix, dtype=np.float64)
+    num_excess, num_deficit = cost_matrix.shape
+    num_vars = num_excess * num_deficit
+    total_difference = supply.sum() - demand.sum()
+
+    # Variablen: x (m * n), t, |t|
+    costs = np.concatenate([cost_matrix.ravel(), [0.0, depot_distance]])
+    supply_matrix, demand_matrix = transport_constraint_matrices(num_excess, num_deficit, num_extra_columns=2)
+    abs_matrix = csr_matrix(([1.0, -1.0, -1.0, -1.0], [num_vars, num_vars + 1, num_vars, num_vars + 1], [0, 2, 4]),
+                            shape=(2, num_vars + 2))
+    balance_matrix = csr_matrix(([1.0], [num_vars], [0, 1]), shape=(1, num_vars + 2))
+    if total_difference > 0:
+        inequality_matrix, inequality_rhs, equality_matrix, equality_rhs = supply_matrix, supply, demand_matrix, demand
+    else:
+        inequality_matrix, inequality_rhs, equality_matrix, equality_rhs = demand_matrix, demand, supply_matrix, supply
+    build_time = time.perf_counter() - start_time
+
+    result = linprog(
+        costs,
+        A_ub=vstack([inequality_matrix, abs_matrix], format='csr'),
+        b_ub=np.concatenate([inequality_rhs, [0.0, 0.0]]),
+        A_eq=vstack([equality_matrix, balance_matrix], format='csr'),
+        b_eq=np.concatenate([equality_rhs, [total_difference]]),
+        bounds=[(0, None)] * num_vars + [(None, None), (0, None)],
+        method='highs'
+    )
+    if result.status != 0:
+        raise ValueError(f"HiGHS konnte das Transportproblem nicht lösen: {result.message}")
+
+    inequality_duals = result.ineqlin.marginals[:-2]
+    equality_duals = result.eqlin.marginals[:-1]
+    flows = result.x[:num_vars].reshape(num_excess, num_deficit)
+    return {
+        'flows': flows,
+        'depot_transport': float(result.x[num_vars]),
+        'objective': float(np.sum(flows * cost_matrix)),
+        'supply_duals': inequality_duals if total_difference > 0 else equality_duals,
+        'demand_duals': equality_duals if total_difference > 0 else inequality_duals,
+        'balance_dual': float(result.eqlin.marginals[-1]),
+        'iterations': int(result.nit),
+        'status': result.status,
+        'message': result.message,
+        'build_time': build_time,
+        'time': time.perf_counter() - start_time
+    }
+
+
+# --- Dünnes Transportproblem: nächste Nachbarn und Spaltengenerierung --- #
+def nearest_neighbor_arcs(excess_xy, deficit_xy, k):
+    """
+    Bestimmt die Startkanten des dünnen Transportproblems: je Überschusspunkt die k nächsten Defizitpunkte
+    (KD-Baum über den Defizitpunkten) und umgekehrt je Defizitpunkt die k nächsten Überschusspunkte, damit auch
+    entfernte Defizitpunkte von Beginn an erreichbar sind.
+
+    :param excess_xy: Koordinaten der Überschusspunkte (m, 2)
+    :param deficit_xy: Koordinaten der Defizitpunkte (n, 2)
+    :param k: Anzahl der Nachbarn je Punkt
+    :return: Zeilen- und Spaltennummern der Kanten (eindeutig, nach Zeilen sortiert)
+    """
+    num_excess, num_deficit = len(excess_xy), len(deficit_xy)
+    k_deficit = min(k, num_deficit)
+    k_excess = min(k, num_excess)
+    _, nearest_deficit = cKDTree(deficit_xy).query(excess_xy, k=k_deficit)
+    _, nearest_excess = cKDTree(excess_xy).query(deficit_xy, k=k_excess)
+    keys = np.concatenate([
+        np.repeat(np.arange(num_excess, dtype=np.int64), k_deficit) * num_deficit
+        + np.reshape(nearest_deficit, -1),
+        np.reshape(nearest_excess, -1).astype(np.int64) * num_deficit
+        + np.repeat(np.arange(num_deficit, dtype=np.int64), k_excess)
+    ])
+    keys = np.unique(keys)
+    return keys // num_deficit, keys % num_deficit
+def morton_order(xy, bits=16):
+    """
+    Sortiert Punkte entlang der Z-Kurve (Morton-Code der auf 2^bits Stufen gerundeten Koordinaten), sodass im
+    Raum benachbarte Punkte meist auch in der Reihenfolge benachbart sind.
+
+    :param xy: Koordinaten (N, 2)
+    :param bits: Auflösung je Achse in Bit
+    :return: Sortierreihenfolge (N,)
+    """
+    low = xy.min(axis=0)
+    extent = max(float((xy.max(axis=0) - low).max()), 1e-12)
+    cells = np.minimum(((xy - low) / extent * (1 << bits)).astype(np.int64), (1 << bits) - 1)
+    codes = np.zeros(len(xy), dtype=np.int64)
+    for bit in range(bits):
+        codes |= ((cells[:, 0] >> bit) & 1) << (2 * bit + 1)
+        codes |= ((cells[:, 1] >> bit) & 1) << (2 * bit)
+    return np.argsort(codes, kind='stable')
+def curve_feasible_plan(supply, demand, excess_xy, deficit_xy):
+    """
+    Zulässige Startlösung: Nordwesteckenregel mit Überschuss- und Defizitpunkten in der Reihenfolge
+    der Z-Kurve (morton_order). Die kumulierten Mengen beider Seiten werden zusammengeführt, jedes Teilintervall
+    ergibt eine Kante; der Rest der größeren Seite geht zur bzw. kommt von der Deponie. Damit ist das
+    Teilproblem auch dann ohne künstliche Variablen lösbar, wenn Abtrag und Auftrag räumlich getrennt liegen.
+
+    :param supply: Überschussmengen (m,)
+    :param demand: Defizitmengen als positive Werte (n,)
+    :param excess_xy: Koordinaten der Überschusspunkte (m, 2)
+    :param deficit_xy: Koordinaten der Defizitpunkte (n, 2)
+    :return: Zeilen- und Spaltennummern der höchstens m + n - 1 Kanten, Mengen je Kante
+    """
+    excess_order = morton_order(np.vstack([excess_xy, deficit_xy]))
+    deficit_order = excess_order[excess_order >= len(supply)] - len(supply)
+    excess_order = excess_order[excess_order < len(supply)]
+    supply_cumsum = np.cumsum(supply[excess_order])
+    demand_cumsum = np.cumsum(demand[deficit_order])
+    shipped = min(supply_cumsum[-1], demand_cumsum[-1])
+    breaks = np.union1d(supply_cumsum, demand_cumsum)
+    breaks = np.concatenate([[0.0], breaks[breaks < shipped], [shipped]])
+    amounts = np.diff(breaks)
+    midpoints = 0.5 * (breaks[:-1] + breaks[1:])[amounts > 0]
+    rows = excess_order[np.minimum(np.searchsorted(supply_cumsum, midpoints), len(supply) - 1)]
+    cols = deficit_order[np.minimum(np.searchsorted(demand_cumsum, midpoints), len(demand) - 1)]
+    return rows, cols, amounts[amounts > 0]
+def price_missing_arcs(excess_xy, deficit_xy, supply_duals, demand_duals, arc_keys, threshold, max_per_row,
+                       block_rows=256):
+    """
+    Bewertet alle Kanten mit den Schattenpreisen der Lösung des dünnen Problems (reduzierte Kosten
+    d_ij - u_i - v_j) und liefert je Überschusspunkt bis zu max_per_row Kanten mit den stärksten negativen
+    reduzierten Kosten. Die Distanzen werden blockweise für block_rows Zeilen berechnet, die vollständige
+    Distanzmatrix entsteht dabei nicht. Die Zeilen- und Spaltenminima der reduzierten Kosten ergeben
+    zulässige Schattenpreise für die untere Schranke (transport_lower_bound).
+
+    :param excess_xy: Koordinaten der Überschusspunkte (m, 2)
+    :param deficit_xy: Koordinaten der Defizitpunkte (n, 2)
+    :param supply_duals: Schattenpreise der Überschusspunkte (m,)
+    :param demand_duals: Schattenpreise der Defizitpunkte (n,)
+    :param arc_keys: Sortierte Schlüssel (i * n + j) der bereits enthaltenen Kanten
+    :param threshold: Reduzierte Kosten unter -threshold gelten als Verbesserung
+    :param max_per_row: Höchstzahl neuer Kanten je Überschusspunkt und Runde
+    :param block_rows: Anzahl der Zeilen je Distanzblock
+    :return: Zeilen- und Spaltennummern der neuen Kanten, Minimum der reduzierten Kosten je Zeile (m,) und
+             je Spalte (n,)
+    """
+    num_excess, num_deficit = len(excess_xy), len(deficit_xy)
+    max_per_row = min(max_per_row, num_deficit)
+    new_rows = []
+    new_cols = []
+    row_min = np.empty(num_excess)
+    col_min = np.full(num_deficit, np.inf)
+    for row_start in range(0, num_excess, block_rows):
+        row_end = min(row_start + block_rows, num_excess)
+        reduced_costs = cdist(excess_xy[row_start:row_end], deficit_xy)
+        reduced_costs -= supply_duals[row_start:row_end, None]
+        reduced_costs -= demand_duals[None, :]
+        block_min = reduced_costs.min(axis=1)
+        row_min[row_start:row_end] = block_min
+        np.minimum(col_min, reduced_costs.min(axis=0), out=col_min)
+        improving_rows = np.flatnonzero(block_min < -threshold)
+        if len(improving_rows) == 0:
+            continue
+        candidates = np.argpartition(reduced_costs[improving_rows], max_per_row - 1, axis=1)[:, :max_per_row]
+        rows = np.repeat(improving_rows, max_per_row)
+        cols = candidates.ravel()
+        improving = reduced_costs[rows, cols] < -threshold
+        rows, cols = rows[improving] + row_start, cols[improving]
+        # Bereits enthaltene Kanten (numerisch knapp negativ) nicht erneut aufnehmen
+        keys = rows.astype(np.int64) * num_deficit + cols
+        position = np.minimum(np.searchsorted(arc_keys, keys), len(arc_keys) - 1)
+        missing = arc_keys[position] != keys
+        new_rows.append(rows[missing])
+        new_cols.append(cols[missing])
+    if not new_rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), row_min, col_min
+    return np.concatenate(new_rows), np.concatenate(new_cols), row_min, col_min
+def transport_lower_bound(supply, demand, supply_duals, demand_duals, row_min, col_min):
+    """
+    Untere Schranke für die internen Kosten des vollständigen Transportproblems aus den Schattenpreisen einer
+    Teillösung: Die Preise der Gleichungsseite werden um die Minima der reduzierten Kosten korrigiert, die der
+    Ungleichungsseite auf <= 0 begrenzt. Das ergibt eine zulässige Lösung des dualen Problems.
+
+    :param supply: Überschussmengen (m,)
+    :param demand: Defizitmengen als positive Werte (n,)
+    :param supply_duals: Schattenpreise der Überschusspunkte (m,)
+    :param demand_duals: Schattenpreise der Defizitpunkte (n,)
+    :param row_min: Minimum der reduzierten Kosten je Überschusspunkt (price_missing_arcs)
+    :param col_min: Minimum der reduzierten Kosten je Defizitpunkt (price_missing_arcs)
+    :return: Untere Schranke der internen Transportkosten
+    """
+    total_difference = supply.sum() - demand.sum()
+    if total_difference > 0:
+        supply_duals, demand_duals = np.minimum(supply_duals, 0.0), demand_duals + col_min
+    elif total_difference < 0:
+        supply_duals, demand_duals = supply_duals + row_min, np.minimum(demand_duals, 0.0)
+    else:
+        demand_duals = demand_duals + col_min
+    return float(np.dot(supply, supply_duals) + np.dot(demand, demand_duals))
+def solve_sparse_transport_highs(supply, demand, rows, cols, arc_costs, penalty):
+    """
+    Löst das Transportproblem auf einer Teilmenge der Kanten mit HiGHS. Die größere Seite ist eine Ungleichung
+    (Rest zur bzw. von der Deponie), jede Gleichung erhält eine künstliche Variable mit Kosten penalty, damit
+    das Teilproblem auch bei fehlenden Kanten lösbar ist.
+
+    :param supply: Überschussmengen (m,)
+    :param demand: Defizitmengen als positive Werte (n,)
+    :param rows: Überschusspunkt je Kante
+    :param cols: Defizitpunkt je Kante
+    :param arc_costs: Kosten je m³ und Kante
+    :param penalty: Kosten je m³ der künstlichen Variablen
+    :return: Ergebnis von linprog, Schattenpreise der Überschuss- und Defizitpunkte, Mengen der künstlichen
+             Variablen
+    """
+    num_excess, num_deficit = len(supply), len(demand)
+    num_arcs = len(rows)
+    total_difference = supply.sum() - demand.sum()
+    arc_ids = np.arange(num_arcs)
+    supply_matrix = coo_matrix((np.ones(num_arcs), (rows, arc_ids)), shape=(num_excess, num_arcs)).tocsr()
+    demand_matrix = coo_matrix((np.ones(num_arcs), (cols, arc_ids)), shape=(num_deficit, num_arcs)).tocsr()
+
+    # Gleichungsseiten: Defizit bei Überschuss, Angebot bei Defizit, beide bei ausgeglichenem Problem
+    equality_blocks = []
+    equality_rhs = []
+    if total_difference >= 0:
+        equality_blocks.append(demand_matrix)
+        equality_rhs.append(demand)
+    if total_difference <= 0:
+        equality_blocks.append(supply_matrix)
+        equality_rhs.append(supply)
+    num_artificial = sum(block.shape[0] for block in equality_blocks)
+    equality_matrix = hstack([vstack(equality_blocks), identity(num_artificial)], format='csr')
+    costs = np.concatenate([arc_costs, np.full(num_artificial, penalty)])
+
+    if total_difference > 0:
+        inequality_matrix, inequality_rhs = supply_matrix, supply
+    elif total_difference < 0:
+        inequality_matrix, inequality_rhs = demand_matrix, demand
+    else:
+        inequality_matrix, inequality_rhs = None, None
+    if inequality_matrix is not None:
+        inequality_matrix = hstack([inequality_matrix, csr_matrix((inequality_matrix.shape[0], num_artificial))],
+                                   format='csr')
+
+    result = linprog(
+        costs,
+        A_ub=inequality_matrix,
+        b_ub=inequality_rhs,
+        A_eq=equality_matrix,
+        b_eq=np.concatenate(equality_rhs),
+        bounds=(0, None),
+        method='highs'
+    )
+    if result.status != 0:
+        raise ValueError(f"HiGHS konnte das dünne Transportproblem nicht lösen: {result.message}")
+
+    equality_duals = result.eqlin.marginals
+    if total_difference > 0:
+        supply_duals, demand_duals = result.ineqlin.marginals, equality_duals
+    elif total_difference < 0:
+        supply_duals, demand_duals = equality_duals, result.ineqlin.marginals
+    else:
+        demand_duals, supply_duals = equality_duals[:num_deficit], equality_duals[num_deficit:]
+    return result, supply_duals, demand_duals, result.x[num_arcs:]
+def column_generation_rounds(supply, demand, excess_xy, deficit_xy, rows, cols, tolerance=1e-7, max_new_per_row=8,
+                             block_rows=256, max_rounds=None):
+    """
+    Löst das Transportproblem ausgehend von den Kanten rows/cols: Das Teilproblem wird mit HiGHS gelöst
+    (solve_sparse_transport_highs), fehlende Kanten mit negativen reduzierten Kosten werden aufgenommen
+    (price_missing_arcs) und das Teilproblem erneut gelöst, bis keine solchen Kanten mehr existieren oder
+    max_rounds LPs gelöst sind. Jede Bewertung liefert eine untere Schranke (transport_lower_bound) und damit
+    die Optimalitätslücke der Teillösung.
+
+    :param supply: Überschussmengen (m,)
+    :param demand: Defizitmengen als positive Werte (n,)
+    :param excess_xy: Koordinaten der Überschusspunkte (m, 2)
+    :param deficit_xy: Koordinaten der Defizitpunkte (n, 2)
+    :param rows: Überschusspunkt je Startkante
+    :param cols: Defizitpunkt je Startkante
+    :param tolerance: Relative Toleranz für negative reduzierte Kosten (bezogen auf die größte Distanz)
+    :param max_new_per_row: Höchstzahl neuer Kanten je Überschusspunkt und Runde
+    :param block_rows: Anzahl der Zeilen je Distanzblock bei der Bewertung
+    :param max_rounds: Höchstzahl gelöster LPs (None = bis zum Optimum); solange künstliche Variablen
+                       verwendet werden, wird weiter gerechnet
+    :return: Dictionary mit 'flows' (dünne Matrix (m, n)), 'depot_transport', 'objective' (ohne Deponiekosten),
+             'lower_bound', 'gap' (relative Optimalitätslücke), 'supply_duals', 'demand_duals', 'num_arcs',
+             'rounds', 'iterations', 'status', 'message'
+    """
+    num_excess, num_deficit = len(supply), len(demand)
+    # Kosten der künstlichen Variablen: größer als jeder Umweg über alle Knoten (größte Distanz je Kante)
+    all_points = np.vstack([excess_xy, deficit_xy])
+    diameter = float(np.linalg.norm(all_points.max(axis=0) - all_points.min(axis=0)))
+    penalty = (num_excess + num_deficit + 1) * max(diameter, 1.0)
+    threshold = tolerance * max(diameter, 1.0)
+    volume_tolerance = 1e-9 * max(supply.max(), demand.max())
+
+    keys = np.unique(np.asarray(rows, dtype=np.int64) * num_deficit + cols)
+    rounds = 0
+    iterations = 0
+    while True:
+        rows, cols = keys // num_deficit, keys % num_deficit
+        arc_costs = np.linalg.norm(excess_xy[rows] - deficit_xy[cols], axis=1)
+        result, supply_duals, demand_duals, artificial = solve_sparse_transport_highs(
+            supply, demand, rows, cols, arc_costs, penalty
+        )
+        rounds += 1
+        iterations += int(result.nit)
+        new_rows, new_cols, row_min, col_min = price_missing_arcs(
+            excess_xy, deficit_xy, supply_duals, demand_duals, keys, threshold, max_new_per_row, block_rows
+        )
+        uses_artificial = artificial.max(initial=0.0) > volume_tolerance
+        if len(new_rows) == 0:
+            if uses_artificial:
+                raise ValueError("Das Transportproblem ist ohne künstliche Variablen nicht lösbar")
+            break
+        if max_rounds is not None and rounds >= max_rounds and not uses_artificial:
+            break
+        keys = np.unique(np.concatenate([keys, new_rows * num_deficit + new_cols]))
+
+    flows = csr_matrix((result.x[:len(rows)], (rows, cols)), shape=(num_excess, num_deficit))
+    flows.eliminate_zeros()
+    objective = float(np.dot(result.x[:len(rows)], arc_costs))
+    lower_bound = transport_lower_bound(supply, demand, supply_duals, demand_duals, row_min, col_min)
+    return {
+        'flows': flows,
+        'depot_transport': float(supply.sum() - demand.sum()),
+        'objective': objective,
+        'lower_bound': lower_bound,
+        'gap': max(objective - lower_bound, 0.0) / max(objective, 1e-12),
+        'supply_duals': supply_duals,
+        'demand_duals': demand_duals,
+        'num_arcs': len(rows),
+        'rounds': rounds,
+        'iterations': iterations,
+        'status': result.status,
+        'message': result.message
+    }
+def empty_transport_result(supply, demand):
+    """Ergebnis ohne Transport, wenn Überschuss- oder Defizitpunkte fehlen (alles zur bzw. von der Deponie)."""
+    return {
+        'flows': csr_matrix((len(supply), len(demand))),
+        'depot_transport': float(supply.sum() - demand.sum()),
+        'objective': 0.0,
+        'lower_bound': 0.0,
+        'gap': 0.0,
+        'supply_duals': np.zeros(len(supply)),
+        'demand_duals': np.zeros(len(demand)),
+        'num_arcs': 0,
+        'rounds': 0,
+        'iterations': 0
+    }
+def solve_transport_column_generation(supply, demand, excess_xy, deficit_xy, k=8, tolerance=1e-7,
+                                      max_new_per_row=None, block_rows=256):
+    """
+    Löst das Transportproblem mit Distanzen als Kosten, ohne die vollständige Distanzmatrix aufzustellen: Das
+    LP startet mit den Kanten zu den k nächsten Nachbarn (nearest_neighbor_arcs) und wird mit HiGHS gelöst.
+    Anschließend werden fehlende Kanten mit den Schattenpreisen bewertet und Kanten mit negativen reduzierten
+    Kosten aufgenommen, bis keine mehr existieren (column_generation_rounds). Das Ergebnis ist dann das Optimum
+    des vollständigen Problems.
+
+    :param supply: Überschussmengen (m,)
+    :param demand: Defizitmengen als positive Werte (n,)
+    :param excess_xy: Koordinaten der Überschusspunkte (m, 2)
+    :param deficit_xy: Koordinaten der Defizitpunkte (n, 2)
+    :param k: Anzahl der nächsten Nachbarn je Punkt im Start-LP
+    :param tolerance: Relative Toleranz für negative reduzierte Kosten (bezogen auf die größte Distanz)
+    :param max_new_per_row: Höchstzahl neuer Kanten je Überschusspunkt und Runde (None = k)
+    :param block_rows: Anzahl der Zeilen je Distanzblock bei der Bewertung
+    :return: Dictionary wie column_generation_rounds und 'time'
+    """
+    start_time = time.perf_counter()
+    supply = np.asarray(supply, dtype=np.float64)
+    demand = np.asarray(demand, dtype=np.float64)
+    excess_xy = np.asarray(excess_xy, dtype=np.float64)
+    deficit_xy = np.asarray(deficit_xy, dtype=np.float64)
+    if len(supply) == 0 or len(demand) == 0:
+        return dict(empty_transport_result(supply, demand), time=time.perf_counter() - start_time)
+
+    rows, cols = nearest_neighbor_arcs(excess_xy, deficit_xy, k)
+    feasible_rows, feasible_cols, _ = curve_feasible_plan(supply, demand, excess_xy, deficit_xy)
+    result = column_generation_rounds(
+        supply, demand, excess_xy, deficit_xy, np.concatenate([rows, feasible_rows]),
+        np.concatenate([cols, feasible_cols]), tolerance, max_new_per_row or k, block_rows
+    )
+    result['time'] = time.perf_counter() - start_time
+    return result
+
+
+# --- Mehrskalen-Lösung: vergröbern, lösen, verfeinern --- #
+def aggregate_points(xy, volumes, origin, block_size):
+    """
+    Fasst Punkte in quadratischen Blöcken der Kantenlänge block_size zusammen: Mengen werden summiert, die
+    Lage ist der mengengewichtete Schwerpunkt.
+
+    :param xy: Koordinaten der Punkte (N, 2)
+    :param volumes: Mengen je Punkt (N,)
+    :param origin: Ursprung des Blockrasters (2,)
+    :param block_size: Kantenlänge der Blöcke [m]
+    :return: Block je Punkt (N,), Schwerpunkte (B, 2), Mengen (B,), Blockkoordinaten (B, 2, int64)
+    """
+    blocks = np.floor((xy - origin) / block_size).astype(np.int64)
+    node_block, node_of_point = np.unique(blocks, axis=0, return_inverse=True)
+    node_of_point = node_of_point.reshape(-1)
+    node_volume = np.bincount(node_of_point, weights=volumes, minlength=len(node_block))
+    node_xy = np.column_stack([
+        np.bincount(node_of_point, weights=volumes * xy[:, axis], minlength=len(node_block)) for axis in range(2)
+    ]) / node_volume[:, None]
+    return node_of_point, node_xy, node_volume, node_block
+def build_transport_levels(supply, demand, excess_xy, deficit_xy, coarsest_size=500):
+    """
+    Baut die Hierarchie des Mehrskalenverfahrens: Ebene 0 sind die Rasterzellen, jede weitere Ebene fasst
+    Überschuss- und Defizitpunkte getrennt in Blöcken doppelter Kantenlänge zusammen (aggregate_points), bis
+    beide Seiten höchstens coarsest_size Punkte haben. Die Blöcke aller Ebenen liegen im selben Raster und sind
+    daher ineinander geschachtelt.
+
+    :param supply: Überschussmengen (m,)
+    :param demand: Defizitmengen als positive Werte (n,)
+    :param excess_xy: Koordinaten der Überschusspunkte (m, 2)
+    :param deficit_xy: Koordinaten der Defizitpunkte (n, 2)
+    :param coarsest_size: Höchstzahl der Punkte je Seite auf der gröbsten Ebene
+    :return: Liste der Ebenen von fein nach grob; je Ebene ein Dictionary mit 'block_size', 'supply', 'demand',
+             'excess_xy', 'deficit_xy', 'excess_block', 'deficit_block' und 'excess_parent'/'deficit_parent'
+             (Punkt der nächstgröberen Ebene je Punkt, auf der gröbsten Ebene None)
+    """
+    all_points = np.vstack([excess_xy, deficit_xy])
+    origin = all_points.min(axis=0)
+    extent = all_points.max(axis=0) - origin
+    # Mittlerer Punktabstand als Kantenlänge der ersten Ebene
+    spacing = np.sqrt(max(extent[0] * extent[1], extent.max() ** 2 / len(all_points), 1e-12) / len(all_points))
+
+    levels = [{'block_size': 0.0, 'supply': supply, 'demand': demand, 'excess_xy': excess_xy,
+               'deficit_xy': deficit_xy, 'excess_block': None, 'deficit_block': None,
+               'excess_point_node': np.arange(len(supply)), 'deficit_point_node': np.arange(len(demand))}]
+    block_size = spacing
+    while max(len(levels[-1]['supply']), len(levels[-1]['demand'])) > coarsest_size:
+        block_size *= 2.0
+        excess_point_node, coarse_excess_xy, coarse_supply, excess_block = aggregate_points(
+            excess_xy, supply, origin, block_size
+        )
+        deficit_point_node, coarse_deficit_xy, coarse_demand, deficit_block = aggregate_points(
+            deficit_xy, demand, origin, block_size
+        )
+        if len(coarse_supply) == len(levels[-1]['supply']) and len(coarse_demand) == len(levels[-1]['demand']):
+            continue
+        levels.append({'block_size': block_size, 'supply': coarse_supply, 'demand': coarse_demand,
+                       'excess_xy': coarse_excess_xy, 'deficit_xy': coarse_deficit_xy, 'excess_block': excess_block,
+                       'deficit_block': deficit_block, 'excess_point_node': excess_point_node,
+                       'deficit_point_node': deficit_point_node})
+
+    for fine, coarse in zip(levels[:-1], levels[1:]):
+        for side in ('excess', 'deficit'):
+            parent = np.empty(len(fine[f'{side}_xy']), dtype=np.int64)
+            parent[fine[f'{side}_point_node']] = coarse[f'{side}_point_node']
+            fine[f'{side}_parent'] = parent
+    levels[-1]['excess_parent'] = levels[-1]['deficit_parent'] = None
+    for level in levels:
+        del level['excess_point_node'], level['deficit_point_node']
+    return levels
+def refine_support(coarse_flows, coarse_level, fine_level, radius=0):
+    """
+    Überträgt die genutzten Kanten einer groben Ebene auf die nächstfeinere: Zu jeder Kante (p, q) mit Fluss
+    werden auch die Kanten von den Nachbarblöcken von p zu q und von p zu den Nachbarblöcken von q (bis radius
+    Blöcke entfernt) aufgenommen und alle Paare ihrer feinen Punkte als Kanten zurückgegeben.
+
+    :param coarse_flows: Transportplan der groben Ebene (dünne Matrix)
+    :param coarse_level: Grobe Ebene aus build_transport_levels
+    :param fine_level: Feine Ebene (mit 'excess_parent'/'deficit_parent')
+    :param radius: Nachbarschaft in Blöcken der groben Ebene (0 = nur die Blöcke der genutzten Kanten)
+    :return: Zeilen- und Spaltennummern der Kanten auf der feinen Ebene
+    """
+    support_p, support_q = coarse_flows.nonzero()
+    excess_block = coarse_level['excess_block']
+    deficit_block = coarse_level['deficit_block']
+    num_coarse_deficit = len(deficit_block)
+
+    # Blockkoordinaten als sortierte Schlüssel, Nachbarn per Binärsuche
+    low = np.minimum(excess_block.min(axis=0), deficit_block.min(axis=0)) - radius
+    span = max(excess_block[:, 1].max(), deficit_block[:, 1].max()) - low[1] + radius + 1
+    excess_keys = (excess_block[:, 0] - low[0]) * span + excess_block[:, 1] - low[1]
+    deficit_keys = (deficit_block[:, 0] - low[0]) * span + deficit_block[:, 1] - low[1]
+    excess_order = np.argsort(excess_keys)
+    deficit_order = np.argsort(deficit_keys)
+
+    def find_blocks(keys, order, queries):
+        position = np.minimum(np.searchsorted(keys[order], queries), len(order) - 1)
+        nodes = order[position]
+        return np.where(keys[nodes] == queries, nodes, -1)
+
+    pair_keys = [support_p * num_coarse_deficit + support_q]
+    for dx in range(-radius, radius + 1):
+        for dy in range(-radius, radius + 1):
+            offset = dx * span + dy
+            neighbor_p = find_blocks(excess_keys, excess_order, excess_keys[support_p] + offset)
+            neighbor_q = find_blocks(deficit_keys, deficit_order, deficit_keys[support_q] + offset)
+            pair_keys.append((neighbor_p * num_coarse_deficit + support_q)[neighbor_p >= 0])
+            pair_keys.append((support_p * num_coarse_deficit + neighbor_q)[neighbor_q >= 0])
+    pair_keys = np.unique(np.concatenate(pair_keys))
+    coarse_p, coarse_q = pair_keys // num_coarse_deficit, pair_keys % num_coarse_deficit
+
+    # Alle Paare der feinen Punkte je Blockpaar
+    excess_children = np.argsort(fine_level['excess_parent'], kind='stable')
+    deficit_children = np.argsort(fine_level['deficit_parent'], kind='stable')
+    excess_counts = np.bincount(fine_level['excess_parent'], minlength=len(excess_block))
+    deficit_counts = np.bincount(fine_level['deficit_parent'], minlength=num_coarse_deficit)
+    excess_starts = np.cumsum(excess_counts) - excess_counts
+    deficit_starts = np.cumsum(deficit_counts) - deficit_counts
+    pair_sizes = excess_counts[coarse_p] * deficit_counts[coarse_q]
+    pair_index = np.repeat(np.arange(len(pair_keys)), pair_sizes)
+    within = np.arange(pair_sizes.sum()) - np.repeat(np.cumsum(pair_sizes) - pair_sizes, pair_sizes)
+    pair_deficit_counts = deficit_counts[coarse_q][pair_index]
+    rows = excess_children[excess_starts[coarse_p][pair_index] + within // pair_deficit_counts]
+    cols = deficit_children[deficit_starts[coarse_q][pair_index] + within % pair_deficit_counts]
+    return rows, cols
+def solve_transport_multiscale(supply, demand, excess_xy, deficit_xy, coarsest_size=500, radius=0, k=8,
+                               tolerance=1e-7, max_rounds=None, block_rows=256):
+    """
+    Mehrskalenverfahren für große Raster: Überschuss- und Defizitpunkte werden schrittweise zu Blöcken
+    zusammengefasst (build_transport_levels), das kleine Problem der gröbsten Ebene wird gelöst
+    (solve_transport_column_generation) und die Lösung Ebene für Ebene verfeinert. Auf jeder feineren Ebene
+    startet das LP nur mit den Kanten in der Nachbarschaft der zuvor genutzten Kanten (refine_support) und wird
+    per Spaltengenerierung ergänzt (column_generation_rounds). Für jede Ebene werden Optimalitätslücke und
+    Laufzeit festgehalten.
+
+    :param supply: Überschussmengen (m,)
+    :param demand: Defizitmengen als positive Werte (n,)
+    :param excess_xy: Koordinaten der Überschusspunkte (m, 2)
+    :param deficit_xy: Koordinaten der Defizitpunkte (n, 2)
+    :param coarsest_size: Höchstzahl der Punkte je Seite auf der gröbsten Ebene
+    :param radius: Nachbarschaft der Verfeinerung in Blöcken der gröberen Ebene (größere Startprobleme, dafür
+                   meist weniger Runden; die Spaltengenerierung ergänzt fehlende Kanten ohnehin)
+    :param k: Anzahl der nächsten Nachbarn je Punkt im LP der gröbsten Ebene
+    :param tolerance: Relative Toleranz für negative reduzierte Kosten (bezogen auf die größte Distanz)
+    :param max_rounds: Höchstzahl der LPs je verfeinerter Ebene (None = bis zum Optimum, 1 = nur die
+                       verfeinerten Kanten, die Lücke gibt dann die mögliche Verbesserung an)
+    :param block_rows: Anzahl der Zeilen je Distanzblock bei der Bewertung
+    :return: Dictionary wie column_generation_rounds (Ergebnis der feinsten Ebene) und 'levels' (je Ebene von
+             grob nach fein 'level', 'block_size', 'num_excess', 'num_deficit', 'num_arcs', 'rounds',
+             'objective', 'lower_bound', 'gap', 'time'), 'time'
+    """
+    start_time = time.perf_counter()
+    supply = np.asarray(supply, dtype=np.float64)
+    demand = np.asarray(demand, dtype=np.float64)
+    excess_xy = np.asarray(excess_xy, dtype=np.float64)
+    deficit_xy = np.asarray(deficit_xy, dtype=np.float64)
+    if len(supply) == 0 or len(demand) == 0:
+        return dict(empty_transport_result(supply, demand), levels=[], time=time.perf_counter() - start_time)
+
+    levels = build_transport_levels(supply, demand, excess_xy, deficit_xy, coarsest_size)
+    reports = []
+    result = None
+    iterations = 0
+    for index in range(len(levels) - 1, -1, -1):
+        level_start = time.perf_counter()
+        level = levels[index]
+        if result is None:
+            result = solve_transport_column_generation(
+                level['supply'], level['demand'], level['excess_xy'], level['deficit_xy'], k, tolerance,
+                block_rows=block_rows
+            )
+        else:
+            rows, cols = refine_support(result['flows'], levels[index + 1], level, radius)
+            result = column_generation_rounds(
+                level['supply'], level['demand'], level['excess_xy'], level['deficit_xy'], rows, cols, tolerance,
+                k, block_rows, max_rounds
+            )
+        iterations += result['iterations']
+        reports.append({
+            'level': index,
+            'block_size': level['block_size'],
+            'num_excess': len(level['supply']),
+            'num_deficit': len(level['demand']),
+            'num_arcs': result['num_arcs'],
+            'rounds': result['rounds'],
+            'objective': result['objective'],
+            'lower_bound': result['lower_bound'],
+            'gap': result['gap'],
+            'time': time.perf_counter() - level_start
+        })
+    result['iterations'] = iterations
+    result['levels'] = reports
+    result['time'] = time.perf_counter() - start_time
+    return result
+
+
+# --- Näherung mit Entropie-Regularisierung (Sinkhorn im Log-Bereich) --- #
+def depot_cost_block(excess_xy, deficit_xy, row_start, row_end, depot_row, depot_column):
+    """
+    Berechnet einen Zeilenblock der Kostenmatrix des über die Deponie ausgeglichenen Problems: Distanzen
+    zwischen Überschuss- und Defizitpunkten, Kosten 0 in der Deponiezeile bzw. -spalte.
+
+    :param excess_xy: Koordinaten der Überschusspunkte (m, 2)
+    :param deficit_xy: Koordinaten der Defizitpunkte (n, 2)
+    :param row_start: Erste Zeile des Blocks
+    :param row_end: Erste Zeile nach dem Block (höchstens m + depot_row)
+    :param depot_row: Die Deponie ist eine zusätzliche Zeile (Zeile m)
+    :param depot_column: Die Deponie ist eine zusätzliche Spalte (Spalte n)
+    :return: Kostenblock der Form (row_end - row_start, n + depot_column)
+    """
+    num_excess = len(excess_xy)
+    costs = np.zeros((row_end - row_start, len(deficit_xy) + depot_column))
+    point_end = min(row_end, num_excess)
+    if point_end > row_start:
+        costs[:point_end - row_start, :len(deficit_xy)] = cdist(excess_xy[row_start:point_end], deficit_xy)
+    return costs
+def round_to_feasible_plan(rows, cols, values, supply, demand, excess_xy, deficit_xy):
+    """
+    Rundet einen näherungsweisen Transportplan auf einen zulässigen (Altschuler, Weed, Rigollet): Zeilen und
+    Spalten, die mehr als ihre Menge führen, werden herunterskaliert; die verbleibenden Restmengen werden nicht
+    wie dort über eine dichte Rang-1-Matrix, sondern mit der Nordwesteckenregel entlang der Z-Kurve
+    (curve_feasible_plan) verteilt, sodass der Plan dünn bleibt.
+
+    :param rows: Zeile je Eintrag des Näherungsplans
+    :param cols: Spalte je Eintrag
+    :param values: Mengen je Eintrag
+    :param supply: Mengen der Zeilen (ausgeglichenes Problem)
+    :param demand: Mengen der Spalten (gleiche Summe wie supply)
+    :param excess_xy: Koordinaten der Zeilen (für die Reihenfolge der Restverteilung)
+    :param deficit_xy: Koordinaten der Spalten
+    :return: Zulässiger Plan als dünne Matrix (len(supply), len(demand))
+    """
+    shape = (len(supply), len(demand))
+    plan = csr_matrix((values, (rows, cols)), shape=shape)
+    row_sums = np.asarray(plan.sum(axis=1)).ravel()
+    plan = csr_matrix(plan.multiply(np.minimum(1.0, supply / np.maximum(row_sums, 1e-300))[:, None]))
+    col_sums = np.asarray(plan.sum(axis=0)).ravel()
+    plan = csr_matrix(plan.multiply(np.minimum(1.0, demand / np.maximum(col_sums, 1e-300))[None, :]))
+
+    supply_rest = np.maximum(supply - np.asarray(plan.sum(axis=1)).ravel(), 0.0)
+    demand_rest = np.maximum(demand - np.asarray(plan.sum(axis=0)).ravel(), 0.0)
+    # Die Restmengen beider Seiten sind bis auf Rundungsfehler gleich groß
+    demand_rest *= supply_rest.sum() / max(demand_rest.sum(), 1e-300)
+    if supply_rest.sum() <= 0:
+        return plan
+    rest_rows, rest_cols, rest_amounts = curve_feasible_plan(supply_rest, demand_rest, excess_xy, deficit_xy)
+    return csr_matrix(plan + csr_matrix((rest_amounts, (rest_rows, rest_cols)), shape=shape))
+def solve_transport_sinkhorn(supply, demand, excess_xy, deficit_xy, epsilon=0.003, tolerance=1e-4,
+                             max_iterations=2000, block_rows=256, keep_tolerance=1e-6):
+    """
+    Schnelle Näherung des Transportproblems mit Entropie-Regularisierung: Sinkhorn-Iterationen im Log-Bereich
+    auf dem über die Deponie ausgeglichenen Problem (zusätzliche Zeile bzw. Spalte mit Kosten 0). Jede
+    Iteration durchläuft die Kostenmatrix in Zeilenblöcken (depot_cost_block): Die Potentiale der Zeilen
+    werden je Block neu bestimmt und die Log-Summen der Spalten blockweise fortgeschrieben; die Matrix liegt
+    nie vollständig im Speicher. ε wird vom Durchmesser ausgehend schrittweise halbiert. Der Näherungsplan wird
+    auf einen zulässigen Plan gerundet (round_to_feasible_plan), dessen Kosten eine obere Schranke sind; die
+    zweifache c-Transformierte der Spaltenpotentiale ergibt zulässige Schattenpreise und damit eine untere
+    Schranke für das exakte Optimum.
+
+    :param supply: Überschussmengen (m,)
+    :param demand: Defizitmengen als positive Werte (n,)
+    :param excess_xy: Koordinaten der Überschusspunkte (m, 2)
+    :param deficit_xy: Koordinaten der Defizitpunkte (n, 2)
+    :param epsilon: Regularisierung relativ zum Durchmesser der Punktmenge (kleiner = genauer, langsamer)
+    :param tolerance: Zulässige Abweichung der Zeilensummen relativ zur Gesamtmenge je ε-Stufe
+    :param max_iterations: Höchstzahl der Iterationen insgesamt
+    :param block_rows: Anzahl der Zeilen je Kostenblock
+    :param keep_tolerance: Einträge des Näherungsplans unter diesem Anteil der Zeilenmenge entfallen
+    :return: Dictionary wie solve_transport_column_generation ('flows' als dünne Matrix, 'objective' =
+             'upper_bound' Kosten des gerundeten Plans ohne Deponiekosten, 'lower_bound', 'gap') und
+             'epsilon' [m], 'marginal_error', 'time'
+    """
+    start_time = time.perf_counter()
+    supply = np.asarray(supply, dtype=np.float64)
+    demand = np.asarray(demand, dtype=np.float64)
+    excess_xy = np.asarray(excess_xy, dtype=np.float64)
+    deficit_xy = np.asarray(deficit_xy, dtype=np.float64)
+    num_excess, num_deficit = len(supply), len(demand)
+    if num_excess == 0 or num_deficit == 0:
+        return dict(empty_transport_result(supply, demand), upper_bound=0.0, epsilon=0.0, marginal_error=0.0,
+                    time=time.perf_counter() - start_time)
+
+    # Ausgleich über die Deponie, Mengen normiert auf die Gesamtmenge
+    imbalance = supply.sum() - demand.sum()
+    depot_column = imbalance > 0
+    depot_row = imbalance < 0
+    row_mass = np.append(supply, -imbalance) if depot_row else supply
+    col_mass = np.append(demand, imbalance) if depot_column else demand
+    total_mass = row_mass.sum()
+    log_row_mass = np.log(row_mass / total_mass)
+    log_col_mass = np.log(col_mass / total_mass)
+    num_rows, num_cols = len(row_mass), len(col_mass)
+
+    all_points = np.vstack([excess_xy, deficit_xy])
+    diameter = max(float(np.linalg.norm(all_points.max(axis=0) - all_points.min(axis=0))), 1e-12)
+    target_epsilon = epsilon * diameter
+    row_potentials = np.zeros(num_rows)
+    col_potentials = np.zeros(num_cols)
+
+    iterations = 0
+    current_epsilon = diameter
+    marginal_error = np.inf
+    while True:
+        current_epsilon = max(0.5 * current_epsilon, target_epsilon)
+        stage_iterations = 0
+        while iterations < max_iterations:
+            col_log_max = np.full(num_cols, -np.inf)
+            col_log_sum = np.zeros(num_cols)
+            marginal_error = 0.0
+            for row_start in range(0, num_rows, block_rows):
+                row_end = min(row_start + block_rows, num_rows)
+                costs = depot_cost_block(excess_xy, deficit_xy, row_start, row_end, depot_row, depot_column)
+                # Zeilenpotentiale: f_i = -ε log Σ_j b_j exp((g_j - c_ij) / ε)
+                exponents = log_col_mass[None, :] + (col_potentials[None, :] - costs) / current_epsilon
+                block_max = exponents.max(axis=1)
+                new_potentials = -current_epsilon * (
+                    block_max + np.log(np.exp(exponents - block_max[:, None]).sum(axis=1))
+                )
+                # Zeilensummen des Plans der vorigen Iteration aus der Änderung der Potentiale
+                marginal_error += np.abs(np.expm1(
+                    (row_potentials[row_start:row_end] - new_potentials) / current_epsilon
+                ) * np.exp(log_row_mass[row_start:row_end])).sum()
+                row_potentials[row_start:row_end] = new_potentials
+                # Spaltenpotentiale: Log-Summen über die Zeilenblöcke fortschreiben
+                exponents = log_row_mass[row_start:row_end, None] + (new_potentials[:, None] - costs) / current_epsilon
+                block_max = exponents.max(axis=0)
+                new_max = np.maximum(col_log_max, block_max)
+                col_log_sum = col_log_sum * np.exp(col_log_max - new_max) \
+                    + np.exp(exponents - new_max[None, :]).sum(axis=0)
+                col_log_max = new_max
+            col_potentials = -current_epsilon * (col_log_max + np.log(col_log_sum))
+            iterations += 1
+            stage_iterations += 1
+            if stage_iterations > 1 and marginal_error <= tolerance:
+                break
+        if current_epsilon <= target_epsilon or iterations >= max_iterations:
+            break
+
+    # Näherungsplan (ohne vernachlässigbare Einträge) und c-Transformierte der Spaltenpotentiale
+    plan_rows = []
+    plan_cols = []
+    plan_values = []
+    bound_potentials = np.empty(num_rows)
+    for row_start in range(0, num_rows, block_rows):
+        row_end = min(row_start + block_rows, num_rows)
+        costs = depot_cost_block(excess_xy, deficit_xy, row_start, row_end, depot_row, depot_column)
+        bound_potentials[row_start:row_end] = (costs - col_potentials[None, :]).min(axis=1)
+        values = np.exp(log_row_mass[row_start:row_end, None] + log_col_mass[None, :] + (
+            row_potentials[row_start:row_end, None] + col_potentials[None, :] - costs) / current_epsilon)
+        block_row_ids, block_cols = np.nonzero(values > keep_tolerance * row_mass[row_start:row_end, None] / total_mass)
+        plan_rows.append(block_row_ids + row_start)
+        plan_cols.append(block_cols)
+        plan_values.append(values[block_row_ids, block_cols] * total_mass)
+    # Zweite c-Transformation: Spaltenpotentiale zu den neuen Zeilenpotentialen (nie schlechtere Schranke)
+    bound_col_potentials = np.full(num_cols, np.inf)
+    for row_start in range(0, num_rows, block_rows):
+        row_end = min(row_start + block_rows, num_rows)
+        costs = depot_cost_block(excess_xy, deficit_xy, row_start, row_end, depot_row, depot_column)
+        np.minimum(bound_col_potentials, (costs - bound_potentials[row_start:row_end, None]).min(axis=0),
+                   out=bound_col_potentials)
+    lower_bound = float(np.dot(row_mass, bound_potentials) + np.dot(col_mass, bound_col_potentials))
+
+    # Deponie als Punkt im Schwerpunkt (Kosten 0, nur für die Reihenfolge der Restverteilung)
+    center = all_points.mean(axis=0)
+    row_xy = np.vstack([excess_xy, center]) if depot_row else excess_xy
+    col_xy = np.vstack([deficit_xy, center]) if depot_column else deficit_xy
+    plan = round_to_feasible_plan(
+        np.concatenate(plan_rows), np.concatenate(plan_cols), np.concatenate(plan_values), row_mass, col_mass,
+        row_xy, col_xy
+    )
+    flows = csr_matrix(plan[:num_excess, :num_deficit])
+    flows.eliminate_zeros()
+    flow_rows, flow_cols = flows.nonzero()
+    upper_bound = float(np.dot(
+        np.asarray(flows[flow_rows, flow_cols]).ravel(),
+        np.linalg.norm(excess_xy[flow_rows] - deficit_xy[flow_cols], axis=1)
+    ))
+
+    # Potentiale relativ zur Deponie wie beim Netzwerk-Simplex
+    depot_potential = bound_col_potentials[-1] if depot_column else (-bound_potentials[-1] if depot_row else 0.0)
+    return {
+        'flows': flows,
+        'depot_transport': float(imbalance),
+        'objective': upper_bound,
+        'upper_bound': upper_bound,
+        'lower_bound': lower_bound,
+        'gap': max(upper_bound - lower_bound, 0.0) / max(upper_bound, 1e-12),
+        'supply_duals': bound_potentials[:num_excess] + depot_potential,
+        'demand_duals': bound_col_potentials[:num_deficit] - depot_potential,
+        'num_arcs': flows.nnz,
+        'rounds': 1,
+        'iterations': iterations,
+        'epsilon': current_epsilon,
+        'marginal_error': marginal_error,
+        'time': time.perf_counter() - start_time
+    }